@@ -0,0 +1,20 @@
+from . import crud, models
+from .database import engine, SessionLocal
+
+# Rebuild the skills, job_keywords and applicant_skills tables from the JSON
+# columns of every job and applicant. The API does this on startup until a
+# backfill has finished; run it by hand (python -m backend.backfill_skills)
+# to rebuild after rows were written by an older version.
+def backfill():
+    models.Base.metadata.create_all(bind=engine)
+    models.create_missing_indexes(engine)
+    db = SessionLocal()
+    try:
+        jobs, applicants = crud.backfill_skills(db)
+        crud.record_migration(db, crud.SKILLS_BACKFILL)
+        print(f"Rebuilt skills for {jobs} jobs and {applicants} applicants")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    backfill()
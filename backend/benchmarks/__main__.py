@@ -0,0 +1,84 @@
+import sys
+import shutil
+import argparse
+import tempfile
+from . import fakes, runner
+
+# Offline benchmarks: python -m backend.benchmarks --sizes 100,1000 --output results.json
+#
+# Gemini, Pinecone and Kafka are replaced by the fakes in fakes.py (with
+# optional injected latency), and the database, vector store and caches live
+# in a scratch directory. Exits with status 1 when a threshold or baseline
+# check fails.
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m backend.benchmarks", description="Run the offline benchmark suite.")
+    parser.add_argument("--sizes", default="100,1000", help="Comma-separated numbers of jobs and applicants to run at")
+    parser.add_argument("--iterations", type=int, default=20, help="Timed calls per benchmark and size")
+    parser.add_argument("--warmup", type=int, default=2, help="Untimed calls before each benchmark")
+    parser.add_argument("--only", help="Comma-separated benchmark names to run (default: all)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the generated data and picks")
+    parser.add_argument("--llm-latency-ms", type=float, default=fakes.BENCH_LLM_LATENCY_MS, help="Latency added to each LLM call")
+    parser.add_argument("--embedding-latency-ms", type=float, default=fakes.BENCH_EMBEDDING_LATENCY_MS, help="Latency added to each embedding call")
+    parser.add_argument("--output", default="benchmark-results.json", help="Where to write the JSON report")
+    parser.add_argument("--thresholds", help='JSON file of limits, e.g. {"search_text": {"p95Ms": 20}, "list_jobs@1000": {"p50Ms": 15}}')
+    parser.add_argument("--baseline", help="Earlier JSON report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed p50 slowdown against --baseline (0.2 = 20%%)")
+    parser.add_argument("--workdir", help="Directory for the scratch database and indexes (default: a temporary one, removed afterwards)")
+    return parser.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+    workdir = args.workdir or tempfile.mkdtemp(prefix="benchmarks-")
+
+    # The backend reads its settings at import, so configure first
+    fakes.configure_environment(workdir)
+    from . import scenarios
+
+    names = args.only.split(",") if args.only else list(scenarios.BENCHMARKS)
+    unknown = [name for name in names if name not in scenarios.BENCHMARKS]
+    if unknown:
+        print(f"Unknown benchmarks: {', '.join(unknown)}")
+        return 2
+
+    installed = fakes.install()
+    installed.llm.latency_ms = args.llm_latency_ms
+    installed.embeddings.latency_ms = args.embedding_latency_ms
+
+    results = []
+    ctx = scenarios.create_context(installed, args.seed)
+    try:
+        for size in sizes:
+            print(f"Seeding {size} jobs and applicants")
+            scenarios.seed(ctx, size)
+            for name in names:
+                calls = scenarios.BENCHMARKS[name](ctx, args.warmup + args.iterations)
+                results.append(runner.measure(name, size, calls, warmup=args.warmup))
+                print(f"  {name}: p50 {results[-1]['p50Ms']:.2f} ms")
+    finally:
+        scenarios.close_context(ctx)
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    runner.print_table(results)
+    runner.write_json(args.output, runner.report(results, {
+        "sizes": sizes,
+        "iterations": args.iterations,
+        "warmup": args.warmup,
+        "seed": args.seed,
+        "llmLatencyMs": args.llm_latency_ms,
+        "embeddingLatencyMs": args.embedding_latency_ms
+    }))
+    print(f"Wrote {args.output}")
+
+    failures = []
+    if args.thresholds:
+        failures += runner.check_thresholds(results, runner.load_json(args.thresholds))
+    if args.baseline:
+        failures += runner.check_baseline(results, runner.load_json(args.baseline), args.max_regression)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
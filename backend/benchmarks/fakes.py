@@ -0,0 +1,225 @@
+import os
+import json
+import time
+import queue
+import random
+import asyncio
+import hashlib
+import threading
+from concurrent.futures import Future
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+
+# Offline stand-ins for Gemini, Pinecone and Kafka. Every answer is derived
+# from a hash of the input, so runs with the same data are reproducible.
+# Nothing in this module imports the backend: configure_environment() has to
+# run before the backend modules read their settings at import time.
+
+# Injected latency per call, on top of the (small) cost of the fake itself
+BENCH_LLM_LATENCY_MS = float(os.getenv("BENCH_LLM_LATENCY_MS", "0"))
+BENCH_EMBEDDING_LATENCY_MS = float(os.getenv("BENCH_EMBEDDING_LATENCY_MS", "0"))
+
+SKILLS = [
+    "Python", "Go", "Rust", "Java", "TypeScript", "React", "Kubernetes", "Docker", "AWS", "GCP",
+    "SQL", "PostgreSQL", "Kafka", "Spark", "Machine Learning", "PyTorch", "Terraform", "GraphQL",
+    "Node.js", "C++", "Airflow", "Redis", "Linux", "CI/CD"
+]
+TITLES = ["Backend Engineer", "Data Engineer", "Frontend Developer", "ML Engineer", "Platform Engineer", "SRE"]
+LEVELS = ["Entry-level", "Mid-level", "Senior", "Lead"]
+COMPANIES = ["Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries"]
+COUNTRIES = ["US", "UK", "Germany", "Canada", "India"]
+EDUCATION = ["None", "Bachelor's", "Master's", "PhD"]
+
+def _seed(text: str) -> int:
+    return int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:16], 16)
+
+def _sleep(latency_ms: float):
+    if latency_ms > 0:
+        time.sleep(latency_ms / 1000)
+
+async def _asleep(latency_ms: float):
+    if latency_ms > 0:
+        await asyncio.sleep(latency_ms / 1000)
+
+class FakeLLM:
+    """Chat model returning canned JSON for each prompt the pipelines send."""
+
+    def __init__(self, latency_ms: float = BENCH_LLM_LATENCY_MS):
+        self.latency_ms = latency_ms
+        self.calls = 0
+
+    def invoke(self, prompt: str) -> Any:
+        self.calls += 1
+        _sleep(self.latency_ms)
+        return SimpleNamespace(content=json.dumps(self._answer(prompt)))
+
+    async def ainvoke(self, prompt: str) -> Any:
+        self.calls += 1
+        await _asleep(self.latency_ms)
+        return SimpleNamespace(content=json.dumps(self._answer(prompt)))
+
+    def _answer(self, prompt: str) -> Dict[str, Any]:
+        rng = random.Random(_seed(prompt))
+        if "from this job description" in prompt:
+            return job_record(rng)
+        if "from this resume" in prompt:
+            return applicant_record(rng)
+        if "skillGaps" in prompt:
+            return {
+                "skillGaps": rng.sample(SKILLS, 3),
+                "recommendations": [f"Gain experience with {skill}" for skill in rng.sample(SKILLS, 2)]
+            }
+        return {
+            "summary": " ".join(rng.choice(SKILLS) for _ in range(40)),
+            "insights": [f"Strong fit for {skill} work" for skill in rng.sample(SKILLS, 3)]
+        }
+
+class FakeEmbeddings:
+    """Embedding model returning unit-length pseudo-random vectors seeded by the text."""
+
+    def __init__(self, dimension: int, latency_ms: float = BENCH_EMBEDDING_LATENCY_MS):
+        self.dimension = dimension
+        self.latency_ms = latency_ms
+        self.calls = 0
+
+    def _vector(self, text: str) -> List[float]:
+        vector = np.random.default_rng(_seed(text)).standard_normal(self.dimension)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        _sleep(self.latency_ms)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        await _asleep(self.latency_ms)
+        return [self._vector(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+class InMemoryQueue:
+    """Drop-in for producer.MessageProducer that keeps messages in a local queue.
+
+    Messages are JSON round-tripped like they would be through Kafka and
+    "delivered" immediately; drain() hands them to a consumer.
+    """
+
+    def __init__(self):
+        self._messages: "queue.Queue[Tuple[str, Optional[str], Dict[str, Any]]]" = queue.Queue()
+        self.produced = 0
+        self._lock = threading.Lock()
+
+    def produce(self, topic: str, data: Dict[str, Any], key: Optional[str] = None) -> Future:
+        self._messages.put((topic, key, json.loads(json.dumps(data))))
+        with self._lock:
+            self.produced += 1
+        future = Future()
+        future.set_result(None)
+        return future
+
+    def drain(self, topic: str, max_messages: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Take queued messages for a topic; messages for other topics stay queued."""
+        taken, kept = [], []
+        while max_messages is None or len(taken) < max_messages:
+            try:
+                message = self._messages.get_nowait()
+            except queue.Empty:
+                break
+            (taken if message[0] == topic else kept).append(message)
+        for message in kept:
+            self._messages.put(message)
+        return [data for _, _, data in taken]
+
+    def flush(self, timeout: float = 0) -> int:
+        return 0
+
+    def close(self, timeout: float = 0):
+        pass
+
+def configure_environment(workdir: str):
+    """Point the database, vector store, caches and keyword index at workdir.
+
+    The local vector store stands in for Pinecone. Has to be called before
+    any backend module is imported.
+    """
+    os.makedirs(workdir, exist_ok=True)
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'benchmark.db')}"
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    os.environ["VECTOR_STORE_BACKEND"] = "local"
+    os.environ["VECTOR_STORE_PATH"] = os.path.join(workdir, "vectors")
+    os.environ["CACHE_DIR"] = os.path.join(workdir, "cache")
+    os.environ["LEXICAL_INDEX_PATH"] = os.path.join(workdir, "lexical")
+
+def install() -> SimpleNamespace:
+    """Swap the fakes in for the real clients and Kafka producer."""
+    from .. import clients, producer
+    from ..vector_store import EMBEDDING_DIMENSION
+
+    fakes = SimpleNamespace(
+        llm=FakeLLM(),
+        embeddings=FakeEmbeddings(EMBEDDING_DIMENSION),
+        queue=InMemoryQueue()
+    )
+    clients.set_client("llm", fakes.llm)
+    clients.set_client("embeddings", fakes.embeddings)
+    # produce_message() looks the producer up on each call
+    producer.producer = fakes.queue
+    return fakes
+
+# Synthetic records, shaped like the LLM's parse output
+def job_record(rng: random.Random) -> Dict[str, Any]:
+    title = rng.choice(TITLES)
+    keywords = rng.sample(SKILLS, rng.randint(3, 6))
+    return {
+        "title": f"{rng.choice(LEVELS).split('-')[0]} {title}",
+        "company": rng.choice(COMPANIES),
+        "description": " ".join(
+            f"You will build {rng.choice(SKILLS)} services with a {rng.choice(SKILLS)} stack." for _ in range(20)
+        ),
+        "country": rng.choice(COUNTRIES),
+        "date": "2024-01-01",
+        "sponsorship": rng.random() < 0.3,
+        "minYearsExperience": rng.randint(0, 10),
+        "minEducation": rng.choice(EDUCATION),
+        "positionLevel": rng.choice(LEVELS),
+        "keywords": keywords,
+        "recruiterId": "recruiter-1",
+        "recruiterName": "Recruitment Team"
+    }
+
+def applicant_record(rng: random.Random) -> Dict[str, Any]:
+    experience = [
+        {
+            "company": rng.choice(COMPANIES),
+            "title": rng.choice(TITLES),
+            "start_date": f"{2010 + i * 3}-01",
+            "end_date": f"{2013 + i * 3}-01",
+            "description": " ".join(f"Worked on {rng.choice(SKILLS)} systems." for _ in range(10)),
+            "skills": rng.sample(SKILLS, rng.randint(2, 5))
+        }
+        for i in range(rng.randint(1, 4))
+    ]
+    return {
+        "name": f"Applicant {rng.randrange(10 ** 6)}",
+        "workAuthorization": rng.choice(["Citizen", "Permanent Resident", "Visa Required"]),
+        "yearsOfExperience": rng.randint(0, 20),
+        "countryOfOrigin": rng.choice(COUNTRIES),
+        "personalStatement": " ".join(f"I enjoy {rng.choice(SKILLS)}." for _ in range(8)),
+        "resumeFileType": "PDF",
+        "workExperience": experience,
+        "education": [{
+            "institution": "State University",
+            "degree": rng.choice(EDUCATION[1:]),
+            "field": "Computer Science",
+            "start_date": "2006-09",
+            "end_date": "2010-06"
+        }],
+        "lastPosition": experience[-1]["title"],
+        "lastPositionLevel": rng.choice(["Entry", "Mid", "Senior"])
+    }
@@ -0,0 +1,105 @@
+import json
+import time
+import platform
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+def measure(name: str, size: int, calls: List[Callable[[], Any]], warmup: int = 1) -> Dict[str, Any]:
+    """Time each call and summarize in milliseconds. The first warmup calls aren't counted."""
+    for call in calls[:warmup]:
+        call()
+    timings = []
+    for call in calls[warmup:]:
+        start = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    mean = sum(timings) / len(timings)
+    return {
+        "name": name,
+        "size": size,
+        "iterations": len(timings),
+        "meanMs": round(mean, 3),
+        "p50Ms": round(_percentile(timings, 0.50), 3),
+        "p95Ms": round(_percentile(timings, 0.95), 3),
+        "minMs": round(timings[0], 3),
+        "maxMs": round(timings[-1], 3),
+        "opsPerSecond": round(1000 / mean, 2) if mean else None
+    }
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    """Linear interpolation between closest ranks."""
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+def report(results: List[Dict[str, Any]], config: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "createdAt": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "config": config,
+        "results": results
+    }
+
+def print_table(results: List[Dict[str, Any]]):
+    print(f"{'benchmark':<38}{'size':>7}{'iters':>7}{'mean ms':>11}{'p50 ms':>11}{'p95 ms':>11}")
+    for result in results:
+        print(
+            f"{result['name']:<38}{result['size']:>7}{result['iterations']:>7}"
+            f"{result['meanMs']:>11.2f}{result['p50Ms']:>11.2f}{result['p95Ms']:>11.2f}"
+        )
+
+def check_thresholds(results: List[Dict[str, Any]], thresholds: Dict[str, Dict[str, float]]) -> List[str]:
+    """Failures against absolute limits.
+
+    thresholds maps "name" (every size) or "name@size" to limits such as
+    {"p50Ms": 20, "p95Ms": 50}; a name@size entry overrides a name entry.
+    """
+    failures = []
+    for result in results:
+        limits = {
+            **thresholds.get(result["name"], {}),
+            **thresholds.get(f"{result['name']}@{result['size']}", {})
+        }
+        for metric, limit in limits.items():
+            if result.get(metric) is not None and result[metric] > limit:
+                failures.append(f"{result['name']}@{result['size']}: {metric} {result[metric]:.2f} > limit {limit:.2f}")
+    return failures
+
+def check_baseline(
+    results: List[Dict[str, Any]],
+    baseline: Dict[str, Any],
+    max_regression: float,
+    metric: str = "p50Ms",
+    min_delta_ms: float = 1.0
+) -> List[str]:
+    """Failures where metric got more than max_regression (e.g. 0.2 = 20%) slower than in a baseline report.
+
+    Differences under min_delta_ms are ignored; they are mostly noise for
+    sub-millisecond benchmarks.
+    """
+    previous = {(result["name"], result["size"]): result for result in baseline.get("results", [])}
+    failures = []
+    for result in results:
+        before: Optional[Dict[str, Any]] = previous.get((result["name"], result["size"]))
+        if before is None or not before.get(metric):
+            continue
+        allowed = before[metric] * (1 + max_regression)
+        if result[metric] > allowed and result[metric] - before[metric] >= min_delta_ms:
+            failures.append(
+                f"{result['name']}@{result['size']}: {metric} {result[metric]:.2f} vs baseline "
+                f"{before[metric]:.2f} (+{(result[metric] / before[metric] - 1) * 100:.0f}%)"
+            )
+    return failures
+
+def load_json(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+def write_json(path: str, data: Dict[str, Any]):
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
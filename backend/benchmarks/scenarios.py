@@ -0,0 +1,178 @@
+import random
+import itertools
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List
+import fitz  # PyMuPDF, to build resume PDFs
+from fastapi.testclient import TestClient
+from .. import crud, kafka_worker, main
+from ..database import SessionLocal
+from ..extraction import pdf_extractor
+from . import fakes
+
+# Each benchmark prepares one call per iteration up front, so building inputs
+# isn't timed. Read benchmarks run before write benchmarks, which add rows.
+SEARCH_LIMIT = 10
+HEATMAP_PEERS = 10
+LIST_LIMIT = 100
+
+def create_context(installed: SimpleNamespace, seed: int) -> SimpleNamespace:
+    client = TestClient(main.app)
+    client.__enter__()  # Runs the startup event
+    return SimpleNamespace(
+        client=client,
+        fakes=installed,
+        rng=random.Random(seed),
+        counter=itertools.count(),
+        job_ids=[],
+        applicant_ids=[]
+    )
+
+def close_context(ctx: SimpleNamespace):
+    ctx.client.__exit__(None, None, None)
+    pdf_extractor.shutdown()
+
+def seed(ctx: SimpleNamespace, size: int):
+    """Add jobs and applicants until there are size of each, through the Kafka worker's embedding path."""
+    db = SessionLocal()
+    try:
+        ctx.job_ids = crud.get_job_ids(db)
+        ctx.applicant_ids = crud.get_applicant_ids(db)
+    finally:
+        db.close()
+
+    items = []
+    for k in range(len(ctx.job_ids), size):
+        items.append({"type": "job", "data": {**fakes.job_record(ctx.rng), "id": f"bench-job-{k}"}})
+    for k in range(len(ctx.applicant_ids), size):
+        items.append({"type": "applicant", "data": {**fakes.applicant_record(ctx.rng), "id": f"bench-applicant-{k}"}})
+    ctx.rng.shuffle(items)
+
+    # Seeding isn't measured, so skip the injected latency
+    llm_latency, embedding_latency = ctx.fakes.llm.latency_ms, ctx.fakes.embeddings.latency_ms
+    ctx.fakes.llm.latency_ms = ctx.fakes.embeddings.latency_ms = 0
+    try:
+        for start in range(0, len(items), kafka_worker.EMBEDDING_BATCH_SIZE):
+            kafka_worker.process_embedding_batch(items[start:start + kafka_worker.EMBEDDING_BATCH_SIZE])
+    finally:
+        ctx.fakes.llm.latency_ms, ctx.fakes.embeddings.latency_ms = llm_latency, embedding_latency
+
+    ctx.job_ids += [item["data"]["id"] for item in items if item["type"] == "job"]
+    ctx.applicant_ids += [item["data"]["id"] for item in items if item["type"] == "applicant"]
+
+def _ok(response: Any) -> Any:
+    if response.status_code >= 400:
+        raise RuntimeError(f"{response.request.method} {response.request.url} returned {response.status_code}: {response.text[:200]}")
+    return response
+
+def _get(ctx: SimpleNamespace, url: str, **kwargs) -> Callable[[], Any]:
+    return lambda: _ok(ctx.client.get(url, **kwargs))
+
+def _pick(ctx: SimpleNamespace, ids: List[str]) -> str:
+    return ids[ctx.rng.randrange(len(ids))]
+
+# Read benchmarks
+def list_jobs(ctx, count):
+    return [_get(ctx, "/jobs/", params={"limit": LIST_LIMIT}) for _ in range(count)]
+
+def list_job_summaries(ctx, count):
+    return [_get(ctx, "/jobs/summaries", params={"limit": LIST_LIMIT}) for _ in range(count)]
+
+def list_applicants(ctx, count):
+    return [_get(ctx, "/applicants/", params={"limit": LIST_LIMIT}) for _ in range(count)]
+
+def search_jobs_for_applicant(ctx, count):
+    # Unfiltered, so answered from the materialized matches
+    return [
+        _get(ctx, f"/search/jobs-for-applicant/{_pick(ctx, ctx.applicant_ids)}", params={"limit": SEARCH_LIMIT})
+        for _ in range(count)
+    ]
+
+def search_applicants_for_job_filtered(ctx, count):
+    # Filtered, so a live vector query
+    return [
+        _get(ctx, f"/search/applicants-for-job/{_pick(ctx, ctx.job_ids)}", params={"limit": SEARCH_LIMIT, "country": "US"})
+        for _ in range(count)
+    ]
+
+def search_jobs_hybrid(ctx, count):
+    return [
+        _get(ctx, f"/search/jobs-for-applicant/{_pick(ctx, ctx.applicant_ids)}", params={"limit": SEARCH_LIMIT, "mode": "hybrid"})
+        for _ in range(count)
+    ]
+
+def search_text(ctx, count):
+    return [_get(ctx, "/search/text", params={"q": ctx.rng.choice(fakes.SKILLS)}) for _ in range(count)]
+
+def compare(ctx, count):
+    # A pair not compared before, so the comparison is computed rather than read back
+    calls = []
+    for _ in range(count):
+        k = next(ctx.counter)
+        a = ctx.applicant_ids[k % len(ctx.applicant_ids)]
+        b = ctx.applicant_ids[(k * 7 + 1) % len(ctx.applicant_ids)]
+        if a == b:
+            b = ctx.applicant_ids[(k + 1) % len(ctx.applicant_ids)]
+        calls.append(_get(ctx, f"/compare/{a}/{b}"))
+    return calls
+
+def heatmap(ctx, count):
+    calls = []
+    for _ in range(count):
+        peers = ctx.rng.sample(ctx.applicant_ids, min(HEATMAP_PEERS, len(ctx.applicant_ids)))
+        calls.append(_get(ctx, f"/compare/heatmap/{_pick(ctx, ctx.applicant_ids)}", params={"peer_ids": ",".join(peers)}))
+    return calls
+
+# Write benchmarks. Inputs are unique, so the parse and embedding caches miss.
+def parse_job(ctx, count):
+    calls = []
+    for _ in range(count):
+        text = f"Job posting {next(ctx.counter)}: {fakes.job_record(ctx.rng)['description']}".encode("utf-8")
+        calls.append(lambda text=text: _ok(ctx.client.post("/jobs/parse", files={"file": ("job.txt", text, "text/plain")})))
+    return calls
+
+def parse_resume(ctx, count):
+    calls = []
+    for _ in range(count):
+        pdf = _resume_pdf(f"Resume {next(ctx.counter)}\n{fakes.applicant_record(ctx.rng)['personalStatement']}")
+        calls.append(lambda pdf=pdf: _ok(ctx.client.post("/applicants/parse", files={"file": ("resume.pdf", pdf, "application/pdf")})))
+    return calls
+
+def embedding_upsert(ctx, count):
+    """One call per Kafka worker batch of generate-embedding messages, read from the in-memory queue."""
+    ctx.fakes.queue.drain("generate-embedding")  # Left over from the parse benchmarks
+    batch_size = kafka_worker.EMBEDDING_BATCH_SIZE
+    for _ in range(count * batch_size):
+        k = next(ctx.counter)
+        if k % 2:
+            data = {**fakes.job_record(ctx.rng), "id": f"bench-job-upsert-{k}"}
+            kafka_worker.produce_message("generate-embedding", {"type": "job", "data": data}, key=data["id"])
+        else:
+            data = {**fakes.applicant_record(ctx.rng), "id": f"bench-applicant-upsert-{k}"}
+            kafka_worker.produce_message("generate-embedding", {"type": "applicant", "data": data}, key=data["id"])
+    return [
+        lambda: kafka_worker.process_embedding_batch(ctx.fakes.queue.drain("generate-embedding", batch_size))
+        for _ in range(count)
+    ]
+
+def _resume_pdf(text: str) -> bytes:
+    document = fitz.open()
+    page = document.new_page()
+    page.insert_textbox(fitz.Rect(50, 50, 550, 800), text, fontsize=10)
+    pdf = document.tobytes()
+    document.close()
+    return pdf
+
+BENCHMARKS: Dict[str, Callable[[SimpleNamespace, int], List[Callable[[], Any]]]] = {
+    "list_jobs": list_jobs,
+    "list_job_summaries": list_job_summaries,
+    "list_applicants": list_applicants,
+    "search_jobs_for_applicant": search_jobs_for_applicant,
+    "search_applicants_for_job_filtered": search_applicants_for_job_filtered,
+    "search_jobs_hybrid": search_jobs_hybrid,
+    "search_text": search_text,
+    "compare": compare,
+    "heatmap": heatmap,
+    "parse_job": parse_job,
+    "parse_resume": parse_resume,
+    "embedding_upsert": embedding_upsert,
+}
@@ -0,0 +1,297 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set
+
+# Cache configuration
+CACHE_DIR = os.getenv("CACHE_DIR", "./data/cache")
+
+# Registered caches, reported by cache_stats(). Each has a stats() method.
+_caches: Dict[str, Any] = {}
+
+def register_cache(name: str, cache: Any):
+    _caches[name] = cache
+
+def content_hash(*parts: str) -> str:
+    """Stable key for a tuple of strings."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+class LRUCache:
+    """Thread-safe in-memory LRU cache with an optional TTL.
+
+    Entries are bounded by count, and also by total size when max_bytes is
+    set, with sizeof giving the size of each value.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[Any], int]] = None
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.bytes = 0
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, stored_at, _ = entry
+            if self.ttl is not None and time.time() - stored_at > self.ttl:
+                self._remove(key)
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any):
+        size = self.sizeof(value) if self.sizeof else 0
+        with self._lock:
+            self._remove(key)
+            self._data[key] = (value, time.time(), size)
+            self.bytes += size
+            while len(self._data) > self.max_entries or (self.max_bytes is not None and self.bytes > self.max_bytes):
+                self._remove(next(iter(self._data)))
+
+    def _remove(self, key: str):
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[2]
+
+    def pop(self, key: str):
+        with self._lock:
+            self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def __len__(self):
+        return len(self._data)
+
+class DiskCache:
+    """SQLite-backed byte cache evicting least recently used entries above max_bytes."""
+
+    # Re-check the total size after this many writes
+    EVICTION_INTERVAL = 100
+
+    def __init__(self, path: str, max_bytes: int, ttl: Optional[float] = None):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._writes = self.EVICTION_INTERVAL - 1  # So the first write checks the size
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value BLOB, size INTEGER, created_at REAL, accessed_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_accessed_at ON cache (accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[bytes]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if self.ttl is not None and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return row[0]
+
+    def set(self, key: str, value: bytes):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), now, now)
+            )
+            self._writes += 1
+            if self._writes >= self.EVICTION_INTERVAL:
+                self._writes = 0
+                self._evict()
+            self._conn.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def _evict(self):
+        """Drop expired entries, then the least recently used ones until under max_bytes."""
+        if self.ttl is not None:
+            self._conn.execute("DELETE FROM cache WHERE created_at < ?", (time.time() - self.ttl,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        while total > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM cache ORDER BY accessed_at LIMIT 500"
+            ).fetchall()
+            if not rows:
+                break
+            evicted = []
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                evicted.append((key,))
+                total -= size
+            self._conn.executemany("DELETE FROM cache WHERE key = ?", evicted)
+
+class ChangeLog:
+    """When keys last changed, in a SQLite table shared by the processes on a host.
+
+    Lets each process's in-memory cache drop entries that another process has
+    since replaced. Rows older than ttl are pruned, since anything cached
+    before them has expired anyway.
+    """
+
+    # Prune after this many writes
+    PRUNE_INTERVAL = 100
+
+    def __init__(self, path: str, ttl: Optional[float] = None):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS changes (key TEXT PRIMARY KEY, changed_at REAL)")
+        self._conn.commit()
+
+    def touch(self, keys: List[str], now: float):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO changes (key, changed_at) VALUES (?, ?)", [(key, now) for key in keys]
+            )
+            self._writes += 1
+            if self.ttl is not None and self._writes >= self.PRUNE_INTERVAL:
+                self._writes = 0
+                self._conn.execute("DELETE FROM changes WHERE changed_at < ?", (now - self.ttl,))
+            self._conn.commit()
+
+    def changed_since(self, since: Dict[str, float]) -> Set[str]:
+        """Keys that changed after the time given for each."""
+        keys = list(since)
+        changed = set()
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, changed_at FROM changes WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                )
+                changed.update(key for key, changed_at in rows if changed_at > since[key])
+        return changed
+
+class TieredCache:
+    """In-memory LRU tier in front of a persistent DiskCache, with hit/miss counters."""
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int,
+        max_bytes: int,
+        serialize: Callable[[Any], bytes],
+        deserialize: Callable[[bytes], Any],
+        ttl: Optional[float] = None,
+        directory: str = CACHE_DIR
+    ):
+        self.name = name
+        self.memory = LRUCache(max_entries, ttl=ttl)
+        self.disk = DiskCache(os.path.join(directory, f"{name}.sqlite"), max_bytes, ttl=ttl)
+        self.serialize = serialize
+        self.deserialize = deserialize
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        register_cache(name, self)
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.memory.get(key)
+        if value is not None:
+            self.memory_hits += 1
+            return value
+
+        raw = self.disk.get(key)
+        if raw is not None:
+            value = self.deserialize(raw)
+            self.memory.set(key, value)
+            self.disk_hits += 1
+            return value
+
+        self.misses += 1
+        return None
+
+    def set(self, key: str, value: Any):
+        self.memory.set(key, value)
+        self.disk.set(key, self.serialize(value))
+
+    def delete(self, key: str):
+        self.memory.pop(key)
+        self.disk.delete(key)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "memory_entries": len(self.memory)
+        }
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into a single execution."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Hit/miss counters for every registered cache."""
+    return {name: cache.stats() for name, cache in _caches.items()}
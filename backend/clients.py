@@ -0,0 +1,127 @@
+import os
+import time
+import random
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
+from .vector_store import get_vector_store, VectorRecord
+
+# API keys
+GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
+
+# Models
+LLM_MODEL = "gemini-1.5-flash"
+EMBEDDING_MODEL = "models/embedding-001"
+
+# HTTP connections kept open per Pinecone index handle
+PINECONE_POOL_SIZE = int(os.getenv("PINECONE_POOL_SIZE", "32"))
+
+# Batched vector operations: ids/vectors per request, requests in flight at
+# once, and retries (with jittered exponential backoff) per request
+VECTOR_FETCH_BATCH_SIZE = int(os.getenv("VECTOR_FETCH_BATCH_SIZE", "200"))
+VECTOR_UPSERT_BATCH_SIZE = int(os.getenv("VECTOR_UPSERT_BATCH_SIZE", "100"))
+VECTOR_BATCH_CONCURRENCY = int(os.getenv("VECTOR_BATCH_CONCURRENCY", "4"))
+VECTOR_MAX_RETRIES = int(os.getenv("VECTOR_MAX_RETRIES", "3"))
+VECTOR_RETRY_BACKOFF_SECONDS = float(os.getenv("VECTOR_RETRY_BACKOFF_SECONDS", "0.5"))
+
+# Clients are created on first use and shared by every thread in the process
+_clients: Dict[str, Any] = {}
+_clients_lock = threading.Lock()
+
+_batch_executor = ThreadPoolExecutor(max_workers=VECTOR_BATCH_CONCURRENCY, thread_name_prefix="vector-batch")
+
+def _client(name: str, create: Callable[[], Any]) -> Any:
+    with _clients_lock:
+        if name not in _clients:
+            _clients[name] = create()
+        return _clients[name]
+
+def set_client(name: str, client: Any):
+    """Use client in place of the named one ("llm", "embeddings", "pinecone" or
+    "pinecone-index:<name>") from now on, e.g. a fake in tests and benchmarks."""
+    with _clients_lock:
+        _clients[name] = client
+
+def get_llm() -> ChatGoogleGenerativeAI:
+    return _client("llm", lambda: ChatGoogleGenerativeAI(model=LLM_MODEL, google_api_key=GOOGLE_API_KEY, temperature=0))
+
+def get_embeddings() -> GoogleGenerativeAIEmbeddings:
+    return _client("embeddings", lambda: GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL, google_api_key=GOOGLE_API_KEY))
+
+def get_pinecone():
+    def create():
+        from pinecone import Pinecone
+        return Pinecone(api_key=PINECONE_API_KEY)
+    return _client("pinecone", create)
+
+def get_pinecone_index(name: str):
+    """Long-lived handle for a Pinecone index.
+
+    The host is looked up once, and the handle keeps a pool of up to
+    PINECONE_POOL_SIZE keep-alive connections, so concurrent calls reuse
+    connections instead of opening new ones. The pool is sized through
+    pinecone-client 3.x internals; other versions get the client's default
+    handle and pool size.
+    """
+    def create():
+        import pinecone
+        pc = get_pinecone()
+        host = pc.describe_index(name).host
+        if pinecone.__version__.startswith("3."):
+            try:
+                from pinecone.config.openapi import OpenApiConfigFactory
+                openapi_config = OpenApiConfigFactory.build(api_key=PINECONE_API_KEY, host=host)
+                openapi_config.connection_pool_maxsize = PINECONE_POOL_SIZE
+                return pinecone.Index(api_key=PINECONE_API_KEY, host=host, openapi_config=openapi_config)
+            except (ImportError, AttributeError, TypeError) as e:
+                print(f"Can't size the Pinecone connection pool ({e}), using the default")
+        return pc.Index(host=host)
+    return _client(f"pinecone-index:{name}", create)
+
+def with_retries(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Call fn, retrying failures after a random delay of up to the exponential backoff."""
+    for attempt in range(VECTOR_MAX_RETRIES + 1):
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if attempt == VECTOR_MAX_RETRIES:
+                raise
+            delay = random.uniform(0, VECTOR_RETRY_BACKOFF_SECONDS * 2 ** attempt)
+            print(f"Vector store call failed ({e}), retrying in {delay:.2f}s")
+            time.sleep(delay)
+
+def _run_chunks(fn: Callable[[List[Any]], Any], items: List[Any], chunk_size: int, retry: bool) -> List[Any]:
+    """Run fn on each chunk of items, several chunks at a time, retrying failures if retry is set."""
+    if retry:
+        fn = functools.partial(with_retries, fn)
+    chunks = [items[start:start + chunk_size] for start in range(0, len(items), chunk_size)]
+    if len(chunks) <= 1:
+        return [fn(chunk) for chunk in chunks]
+    futures = [_batch_executor.submit(fn, chunk) for chunk in chunks]
+    return [future.result() for future in futures]
+
+def fetch_many(index: str, ids: List[str], namespace: str) -> Dict[str, VectorRecord]:
+    """Fetch any number of vectors, VECTOR_FETCH_BATCH_SIZE ids per request."""
+    vector_store = get_vector_store()
+    records = {}
+    for chunk_records in _run_chunks(
+        lambda chunk: vector_store.fetch(index, ids=chunk, namespace=namespace),
+        list(dict.fromkeys(ids)),
+        VECTOR_FETCH_BATCH_SIZE,
+        retry=vector_store.remote
+    ):
+        records.update(chunk_records)
+    return records
+
+def upsert_many(index: str, vectors: List[Tuple[str, Any, Dict[str, Any]]], namespace: str):
+    """Upsert any number of vectors, VECTOR_UPSERT_BATCH_SIZE per request."""
+    vector_store = get_vector_store()
+    _run_chunks(
+        lambda chunk: vector_store.upsert(index, chunk, namespace=namespace),
+        vectors,
+        VECTOR_UPSERT_BATCH_SIZE,
+        retry=vector_store.remote
+    )
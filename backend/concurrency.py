@@ -0,0 +1,42 @@
+import os
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+# Maximum concurrent calls from the API to each downstream service
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "8"))
+EMBEDDING_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", "8"))
+VECTOR_DB_CONCURRENCY = int(os.getenv("VECTOR_DB_CONCURRENCY", "16"))
+
+class Limiter:
+    """Bounds concurrent async work against one downstream service.
+
+    Use ``async with limiter:`` around native async calls, or ``await
+    limiter.run(fn, ...)`` to run a blocking call on the limiter's own thread
+    pool, so slow calls to one service can't exhaust the threads another needs.
+    """
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = limit
+        self._semaphore = asyncio.Semaphore(limit)
+        self._executor = ThreadPoolExecutor(max_workers=limit, thread_name_prefix=name)
+
+    async def __aenter__(self):
+        await self._semaphore.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._semaphore.release()
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+llm = Limiter("llm", LLM_CONCURRENCY)
+embeddings = Limiter("embeddings", EMBEDDING_CONCURRENCY)
+vector_db = Limiter("vector-db", VECTOR_DB_CONCURRENCY)
@@ -1,69 +1,355 @@
 
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import JSON, Text, cast, delete, func, insert, or_, select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+import html
 import uuid
 from datetime import datetime
 from . import models, schemas
 
+# INSERT constructs with ON CONFLICT DO NOTHING/UPDATE, for the databases that have it
+UPSERT_INSERTS = {"sqlite": sqlite_insert, "postgresql": postgresql_insert}
+
+def _upsert_insert(db: Session, model: Any):
+    """INSERT into model's table that supports on_conflict_do_*, in db's SQL dialect."""
+    return UPSERT_INSERTS[db.get_bind().dialect.name](model)
+
+# Model columns that pipelines.JOB_SUMMARY_FIELDS / APPLICANT_SUMMARY_FIELDS (the
+# metadata keys a RAG summary is generated from) are built from; changing one
+# invalidates the stored summary
+JOB_SUMMARY_COLUMNS = {
+    "title", "company", "country", "min_years_experience", "min_education", "position_level", "keywords"
+}
+APPLICANT_SUMMARY_COLUMNS = {
+    "name", "years_of_experience", "last_position", "last_position_level", "work_authorization", "work_experience"
+}
+
+# Columns loaded for list views, leaving out descriptions and JSON blobs
+JOB_LIST_COLUMNS = [
+    models.Job.id, models.Job.title, models.Job.company, models.Job.country, models.Job.date,
+    models.Job.sponsorship, models.Job.position_level, models.Job.keywords, models.Job.created_at
+]
+APPLICANT_LIST_COLUMNS = [
+    models.Applicant.id, models.Applicant.name, models.Applicant.work_authorization,
+    models.Applicant.years_of_experience, models.Applicant.country_of_origin,
+    models.Applicant.last_position, models.Applicant.last_position_level, models.Applicant.created_at
+]
+
+def _list_statement(model: Any, skip: int, limit: Optional[int], after: Optional[Tuple[datetime, str]], columns: Optional[List[Any]]):
+    """Rows in (created_at, id) order, starting after the given (created_at, id) key.
+
+    Seeking past a key uses the (created_at, id) index, so deep pages cost
+    the same as the first one; skip is an offset and gets slower with depth.
+    """
+    statement = select(model)
+    if columns:
+        statement = statement.options(load_only(*columns))
+    if after is not None:
+        statement = statement.where(tuple_(model.created_at, model.id) > tuple_(*after))
+    return statement.order_by(model.created_at, model.id).offset(skip).limit(limit)
+
 # Job operations
 def get_job(db: Session, job_id: str):
     return db.query(models.Job).filter(models.Job.id == job_id).first()
 
-def get_jobs(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Job).offset(skip).limit(limit).all()
+def get_jobs_by_ids(db: Session, job_ids: List[str]):
+    return db.query(models.Job).filter(models.Job.id.in_(job_ids)).all()
 
-def create_job(db: Session, job: schemas.JobCreate):
-    job_id = f"job-{uuid.uuid4()}"
-    db_job = models.Job(
-        id=job_id,
-        **job.dict(exclude_unset=True),
-        created_at=datetime.utcnow(),
-        updated_at=datetime.utcnow()
-    )
-    db.add(db_job)
+def get_jobs(
+    db: Session,
+    skip: int = 0,
+    limit: Optional[int] = 100,
+    after: Optional[Tuple[datetime, str]] = None,
+    columns: Optional[List[Any]] = None
+):
+    return db.scalars(_list_statement(models.Job, skip, limit, after, columns)).all()
+
+def get_job_ids(db: Session) -> List[str]:
+    return [job_id for job_id, in db.query(models.Job.id)]
+
+def create_jobs(db: Session, jobs: List[Tuple[str, schemas.JobCreate]]) -> List[str]:
+    """Insert many jobs with one executemany in one transaction."""
+    rows = _rows(jobs)
+    if rows:
+        db.execute(insert(models.Job), rows)
+        _set_job_keywords(db, {row["id"]: row["keywords"] for row in rows})
     db.commit()
-    db.refresh(db_job)
-    return db_job
+    return [row["id"] for row in rows]
+
+def upsert_jobs(db: Session, jobs: List[Tuple[str, schemas.JobCreate]]) -> List[str]:
+    """Insert many jobs, overwriting existing ones with the same id, in one transaction."""
+    rows = _rows(jobs)
+    _upsert(db, models.Job, rows)
+    _set_job_keywords(db, {row["id"]: row["keywords"] for row in rows})
+    db.commit()
+    return [row["id"] for row in rows]
 
 def update_job(db: Session, job_id: str, job_data: dict):
     db_job = get_job(db, job_id)
     if db_job:
+        if _changes_any(db_job, job_data, JOB_SUMMARY_COLUMNS):
+            delete_rag_summary(db, job_id, commit=False)
         for key, value in job_data.items():
             setattr(db_job, key, value)
+        if "keywords" in job_data:
+            _set_job_keywords(db, {job_id: db_job.keywords})
         db_job.updated_at = datetime.utcnow()
         db.commit()
-        db.refresh(db_job)
     return db_job
 
 # Applicant operations
 def get_applicant(db: Session, applicant_id: str):
     return db.query(models.Applicant).filter(models.Applicant.id == applicant_id).first()
 
-def get_applicants(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Applicant).offset(skip).limit(limit).all()
+def get_applicants_by_ids(db: Session, applicant_ids: List[str]):
+    return db.query(models.Applicant).filter(models.Applicant.id.in_(applicant_ids)).all()
 
-def create_applicant(db: Session, applicant: schemas.ApplicantCreate):
-    applicant_id = f"applicant-{uuid.uuid4()}"
-    db_applicant = models.Applicant(
-        id=applicant_id,
-        **applicant.dict(exclude_unset=True),
-        created_at=datetime.utcnow(),
-        updated_at=datetime.utcnow()
-    )
-    db.add(db_applicant)
+def get_applicants(
+    db: Session,
+    skip: int = 0,
+    limit: Optional[int] = 100,
+    after: Optional[Tuple[datetime, str]] = None,
+    columns: Optional[List[Any]] = None
+):
+    return db.scalars(_list_statement(models.Applicant, skip, limit, after, columns)).all()
+
+def get_applicant_ids(db: Session) -> List[str]:
+    return [applicant_id for applicant_id, in db.query(models.Applicant.id)]
+
+def create_applicants(db: Session, applicants: List[Tuple[str, schemas.ApplicantCreate]]) -> List[str]:
+    """Insert many applicants with one executemany in one transaction."""
+    rows = _rows(applicants)
+    if rows:
+        db.execute(insert(models.Applicant), rows)
+        _set_applicant_skills(db, {row["id"]: row["work_experience"] for row in rows})
     db.commit()
-    db.refresh(db_applicant)
-    return db_applicant
+    return [row["id"] for row in rows]
+
+def upsert_applicants(db: Session, applicants: List[Tuple[str, schemas.ApplicantCreate]]) -> List[str]:
+    """Insert many applicants, overwriting existing ones with the same id, in one transaction."""
+    rows = _rows(applicants)
+    _upsert(db, models.Applicant, rows)
+    _set_applicant_skills(db, {row["id"]: row["work_experience"] for row in rows})
+    db.commit()
+    return [row["id"] for row in rows]
 
 def update_applicant(db: Session, applicant_id: str, applicant_data: dict):
     db_applicant = get_applicant(db, applicant_id)
     if db_applicant:
+        if _changes_any(db_applicant, applicant_data, APPLICANT_SUMMARY_COLUMNS):
+            delete_rag_summary(db, applicant_id, commit=False)
         for key, value in applicant_data.items():
             setattr(db_applicant, key, value)
+        if "work_experience" in applicant_data:
+            _set_applicant_skills(db, {applicant_id: db_applicant.work_experience})
         db_applicant.updated_at = datetime.utcnow()
         db.commit()
-        db.refresh(db_applicant)
     return db_applicant
 
+# Skill operations. Job keywords and the skills listed under an applicant's
+# work experience are also kept in the job_keywords and applicant_skills
+# tables, against a dictionary of canonical skill names, so skill lookups
+# are indexed joins instead of scans over the JSON columns.
+def canonical_skill(name: Any) -> str:
+    """Dictionary key for a skill: lower-cased, with runs of whitespace collapsed."""
+    return " ".join(str(name).lower().split())
+
+def applicant_skill_names(work_experience: Optional[List[Any]]) -> List[str]:
+    return [skill for experience in work_experience or [] for skill in experience.get("skills") or []]
+
+def _skill_ids(db: Session, names: Iterable[Any]) -> Dict[str, int]:
+    """Canonical name -> id for the given skills, adding any the dictionary doesn't have yet."""
+    display_names: Dict[str, str] = {}
+    for name in names:
+        key = canonical_skill(name)
+        if key:
+            display_names.setdefault(key, str(name).strip())
+    if not display_names:
+        return {}
+    db.execute(
+        _upsert_insert(db, models.Skill).on_conflict_do_nothing(index_elements=[models.Skill.name]),
+        [{"name": key, "display_name": display_name} for key, display_name in display_names.items()]
+    )
+    return dict(db.execute(
+        select(models.Skill.name, models.Skill.id).where(models.Skill.name.in_(list(display_names)))
+    ).all())
+
+def _set_skills(db: Session, owner_column: Any, skills_by_owner: Dict[str, List[Any]]):
+    """Replace the skill rows of the given owners (jobs or applicants) in owner_column's table."""
+    if not skills_by_owner:
+        return
+    link_model = owner_column.class_
+    skill_ids = _skill_ids(db, (skill for skills in skills_by_owner.values() for skill in skills or []))
+    db.execute(delete(link_model).where(owner_column.in_(list(skills_by_owner))))
+    links = {
+        (owner_id, skill_ids[canonical_skill(skill)])
+        for owner_id, skills in skills_by_owner.items()
+        for skill in skills or []
+        if canonical_skill(skill)
+    }
+    if links:
+        db.execute(insert(link_model), [{owner_column.key: owner_id, "skill_id": skill_id} for owner_id, skill_id in links])
+
+def _set_job_keywords(db: Session, keywords_by_job: Dict[str, List[str]]):
+    _set_skills(db, models.JobKeyword.job_id, keywords_by_job)
+
+def _set_applicant_skills(db: Session, work_experience_by_applicant: Dict[str, Any]):
+    _set_skills(db, models.ApplicantSkill.applicant_id, {
+        applicant_id: applicant_skill_names(work_experience)
+        for applicant_id, work_experience in work_experience_by_applicant.items()
+    })
+
+def _with_skills_statement(owner_column: Any, model: Any, columns: List[Any], skills: List[str], match_all: bool, limit: int):
+    """Jobs or applicants having any (or all) of the given skills, most matches first."""
+    keys = {canonical_skill(skill) for skill in skills} - {""}
+    link_model = owner_column.class_
+    matched = (
+        select(owner_column.label("owner_id"), func.count().label("overlap"))
+        .join(models.Skill, models.Skill.id == link_model.skill_id)
+        .where(models.Skill.name.in_(keys))
+        .group_by(owner_column)
+    )
+    if match_all:
+        matched = matched.having(func.count() == len(keys))
+    matched = matched.subquery()
+    return (
+        select(model)
+        .options(load_only(*columns))
+        .join(matched, matched.c.owner_id == model.id)
+        .order_by(matched.c.overlap.desc(), model.created_at, model.id)
+        .limit(limit)
+    )
+
+def _skill_overlap_statement(owner_column: Any, other_column: Any, other_id: str, limit: int):
+    """(id, shared skill count) of the owners sharing the most skills with the given job or applicant."""
+    other_skills = select(other_column.class_.skill_id).where(other_column == other_id)
+    overlap = func.count().label("overlap")
+    return (
+        select(owner_column, overlap)
+        .where(owner_column.class_.skill_id.in_(other_skills))
+        .group_by(owner_column)
+        .order_by(overlap.desc(), owner_column)
+        .limit(limit)
+    )
+
+def _shared_skills_statement(owner_column: Any, owner_ids: List[str], other_column: Any, other_id: str):
+    """(owner id, canonical skill name) for each skill the owners share with the given job or applicant."""
+    other_skills = select(other_column.class_.skill_id).where(other_column == other_id)
+    return (
+        select(owner_column, models.Skill.name)
+        .join(models.Skill, models.Skill.id == owner_column.class_.skill_id)
+        .where(owner_column.in_(owner_ids), owner_column.class_.skill_id.in_(other_skills))
+        .order_by(models.Skill.name)
+    )
+
+def _skill_counts_statement(prefix: Optional[str], limit: int):
+    """Skills with the number of applicants and jobs listing each, most common first."""
+    applicant_counts = (
+        select(models.ApplicantSkill.skill_id, func.count().label("count"))
+        .group_by(models.ApplicantSkill.skill_id)
+        .subquery()
+    )
+    job_counts = (
+        select(models.JobKeyword.skill_id, func.count().label("count"))
+        .group_by(models.JobKeyword.skill_id)
+        .subquery()
+    )
+    applicant_count = func.coalesce(applicant_counts.c.count, 0)
+    job_count = func.coalesce(job_counts.c.count, 0)
+    statement = (
+        select(models.Skill.name, models.Skill.display_name, applicant_count, job_count)
+        .outerjoin(applicant_counts, applicant_counts.c.skill_id == models.Skill.id)
+        .outerjoin(job_counts, job_counts.c.skill_id == models.Skill.id)
+    )
+    if prefix:
+        statement = statement.where(models.Skill.name.startswith(canonical_skill(prefix), autoescape=True))
+    return statement.order_by((applicant_count + job_count).desc(), models.Skill.name).limit(limit)
+
+# One-off data migrations, recorded once they have finished
+SKILLS_BACKFILL = "skills-backfill"
+
+def has_migrated(db: Session, name: str) -> bool:
+    return db.get(models.Migration, name) is not None
+
+def record_migration(db: Session, name: str):
+    db.execute(
+        _upsert_insert(db, models.Migration).on_conflict_do_nothing(index_elements=[models.Migration.name]),
+        [{"name": name, "completed_at": datetime.utcnow()}]
+    )
+    db.commit()
+
+def backfill_skills(db: Session, batch_size: int = 1000) -> Tuple[int, int]:
+    """Rebuild the skill rows of every existing job and applicant from their JSON columns.
+
+    Rows are read and written batch_size at a time, committing after each
+    batch. Returns the number of (jobs, applicants) processed.
+    """
+    counts = []
+    for model, column, set_skills in [
+        (models.Job, models.Job.keywords, _set_job_keywords),
+        (models.Applicant, models.Applicant.work_experience, _set_applicant_skills),
+    ]:
+        count = 0
+        after = None
+        while True:
+            page = db.scalars(_list_statement(model, 0, batch_size, after, [model.id, model.created_at, column])).all()
+            if not page:
+                break
+            set_skills(db, {row.id: getattr(row, column.key) for row in page})
+            db.commit()
+            db.expunge_all()
+            count += len(page)
+            after = (page[-1].created_at, page[-1].id)
+        counts.append(count)
+    return counts[0], counts[1]
+
+# Full-text search over the FTS5 tables created by models.create_text_search_tables.
+# Weights are per FTS column (the first, id, isn't indexed), so title words
+# count for more than description words. snippet() can't escape the stored
+# text, so it marks matches with control characters that highlight_snippet
+# turns into <mark> tags once the text is HTML-escaped.
+TEXT_SEARCH_SNIPPET_TOKENS = 16
+TEXT_SEARCH_MARKS = ("\x02", "\x03")
+TEXT_SEARCH = {
+    "job": {"table": "jobs_fts", "title": "title", "subtitle": "company", "weights": "0, 10.0, 5.0, 1.0"},
+    "applicant": {"table": "applicants_fts", "title": "name", "subtitle": "last_position", "weights": "0, 5.0, 5.0, 1.0, 1.0"},
+}
+
+def text_search_query(query: str) -> str:
+    """FTS5 query for documents containing every term of a free-text query.
+
+    Terms are quoted, so input like "c++" or "node.js" can't break the FTS5
+    query syntax; a trailing * is kept for prefix matching.
+    """
+    terms = []
+    for term in query.split():
+        prefix = term.endswith("*")
+        term = term.rstrip("*")
+        if term:
+            terms.append('"' + term.replace('"', '""') + '"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+def highlight_snippet(snippet: Optional[str]) -> str:
+    """HTML-escaped snippet with matched terms in <mark> tags."""
+    start, end = TEXT_SEARCH_MARKS
+    return html.escape(snippet or "").replace(start, "<mark>").replace(end, "</mark>")
+
+def _text_search_statement(entity_type: str):
+    search = TEXT_SEARCH[entity_type]
+    table = search["table"]
+    return text(f"""
+        SELECT id, {search["title"]} AS title, {search["subtitle"]} AS subtitle,
+            snippet({table}, -1, :mark_start, :mark_end, '…', {TEXT_SEARCH_SNIPPET_TOKENS}) AS snippet,
+            bm25({table}, {search["weights"]}) AS score
+        FROM {table}
+        WHERE {table} MATCH :query
+        ORDER BY score
+        LIMIT :limit OFFSET :skip
+    """)
+
 # Comparison operations
 def get_comparison(db: Session, comparison_id: str):
     return db.query(models.ComparisonResult).filter(models.ComparisonResult.id == comparison_id).first()
@@ -73,8 +359,17 @@ def get_comparisons_for_user(db: Session, user_id: str, skip: int = 0, limit: in
         models.ComparisonResult.user_id == user_id
     ).offset(skip).limit(limit).all()
 
-def create_comparison(db: Session, comparison: schemas.ComparisonResultCreate):
-    comparison_id = f"comparison-{uuid.uuid4()}"
+def get_latest_comparison(db: Session, user_id: str, peer_id: str, created_after: Optional[datetime] = None):
+    query = db.query(models.ComparisonResult).filter(
+        models.ComparisonResult.user_id == user_id,
+        models.ComparisonResult.peer_id == peer_id
+    )
+    if created_after is not None:
+        query = query.filter(models.ComparisonResult.created_at >= created_after)
+    return query.order_by(models.ComparisonResult.created_at.desc()).first()
+
+def create_comparison(db: Session, comparison: schemas.ComparisonResultCreate, comparison_id: Optional[str] = None):
+    comparison_id = comparison_id or f"comparison-{uuid.uuid4()}"
     db_comparison = models.ComparisonResult(
         id=comparison_id,
         **comparison.dict(exclude_unset=True),
@@ -82,5 +377,346 @@ def create_comparison(db: Session, comparison: schemas.ComparisonResultCreate):
     )
     db.add(db_comparison)
     db.commit()
-    db.refresh(db_comparison)
     return db_comparison
+
+# RAG summary operations
+def get_rag_summary(db: Session, entity_id: str, metadata_hash: str):
+    return db.query(models.RAGSummary).filter(
+        models.RAGSummary.entity_id == entity_id,
+        models.RAGSummary.metadata_hash == metadata_hash
+    ).first()
+
+def save_rag_summary(db: Session, entity_id: str, entity_type: str, metadata_hash: str, summary: Dict[str, Any]):
+    db_summary = db.query(models.RAGSummary).filter(models.RAGSummary.entity_id == entity_id).first()
+    if db_summary is None:
+        db_summary = models.RAGSummary(entity_id=entity_id, entity_type=entity_type)
+        db.add(db_summary)
+    db_summary.metadata_hash = metadata_hash
+    db_summary.summary = summary.get("summary", "")
+    db_summary.insights = summary.get("insights", [])
+    db_summary.created_at = datetime.utcnow()
+    db.commit()
+    return db_summary
+
+def delete_rag_summary(db: Session, entity_id: str, commit: bool = True):
+    db.query(models.RAGSummary).filter(models.RAGSummary.entity_id == entity_id).delete()
+    if commit:
+        db.commit()
+
+# Materialized match operations
+def get_match_list(db: Session, entity_type: str, entity_id: str):
+    return db.query(models.MatchList).filter(
+        models.MatchList.entity_type == entity_type,
+        models.MatchList.entity_id == entity_id
+    ).first()
+
+def get_matches(db: Session, entity_type: str, entity_id: str, limit: int):
+    return db.scalars(_matches_statement(entity_type, entity_id, limit)).all()
+
+def _matches_statement(entity_type: str, entity_id: str, limit: int):
+    return select(models.Match).where(
+        models.Match.entity_type == entity_type,
+        models.Match.entity_id == entity_id
+    ).order_by(models.Match.score.desc()).limit(limit)
+
+def get_match_list_owners(db: Session, entity_type: str, match_ids: List[str]) -> Set[str]:
+    """Ids whose entity_type lists contain any of match_ids."""
+    rows = db.query(models.Match.entity_id).filter(
+        models.Match.entity_type == entity_type,
+        models.Match.match_id.in_(match_ids)
+    ).distinct()
+    return {entity_id for entity_id, in rows}
+
+def get_match_list_entries(db: Session, entity_type: str, entity_ids: List[str]) -> Dict[str, Dict[str, float]]:
+    """match_id -> score for each existing list among entity_ids, in one query."""
+    rows = db.execute(
+        select(models.MatchList.entity_id, models.Match.match_id, models.Match.score).outerjoin(
+            models.Match,
+            (models.Match.entity_type == models.MatchList.entity_type) & (models.Match.entity_id == models.MatchList.entity_id)
+        ).where(
+            models.MatchList.entity_type == entity_type,
+            models.MatchList.entity_id.in_(entity_ids)
+        )
+    )
+    lists: Dict[str, Dict[str, float]] = {}
+    for entity_id, match_id, score in rows:
+        entries = lists.setdefault(entity_id, {})
+        if match_id is not None:
+            entries[match_id] = score
+    return lists
+
+def get_match_list_floors(db: Session, entity_type: str) -> Dict[str, Tuple[int, Optional[float]]]:
+    """(entry count, lowest score) of every stored entity_type list, in one query."""
+    rows = db.execute(
+        select(models.MatchList.entity_id, func.count(models.Match.match_id), func.min(models.Match.score)).outerjoin(
+            models.Match,
+            (models.Match.entity_type == models.MatchList.entity_type) & (models.Match.entity_id == models.MatchList.entity_id)
+        ).where(
+            models.MatchList.entity_type == entity_type
+        ).group_by(models.MatchList.entity_id)
+    )
+    return {entity_id: (count, lowest) for entity_id, count, lowest in rows}
+
+def replace_match_lists(db: Session, entity_type: str, lists: Dict[str, List[Tuple[str, float]]], commit: bool = True):
+    """Replace whole top-K lists, rebuilt from their owners' vectors, with (match_id, score) pairs."""
+    if not lists:
+        return
+    db.execute(delete(models.Match).where(
+        models.Match.entity_type == entity_type,
+        models.Match.entity_id.in_(list(lists))
+    ))
+    rows = [
+        {"entity_type": entity_type, "entity_id": entity_id, "match_id": match_id, "score": score}
+        for entity_id, matches in lists.items()
+        for match_id, score in matches
+    ]
+    if rows:
+        db.execute(insert(models.Match), rows)
+    _touch_match_lists(db, entity_type, list(lists), recomputed=True)
+    if commit:
+        db.commit()
+
+def merge_match_lists(
+    db: Session,
+    entity_type: str,
+    added: List[Tuple[str, str, float]],
+    removed: List[Tuple[str, str]],
+    commit: bool = True
+):
+    """Apply merged entries to existing lists: insert or rescore (entity_id,
+    match_id, score) rows and delete the (entity_id, match_id) rows trimmed
+    from the bottom."""
+    if removed:
+        db.execute(delete(models.Match).where(
+            models.Match.entity_type == entity_type,
+            tuple_(models.Match.entity_id, models.Match.match_id).in_(removed)
+        ))
+    if added:
+        statement = _upsert_insert(db, models.Match)
+        db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[models.Match.entity_type, models.Match.entity_id, models.Match.match_id],
+                set_={"score": statement.excluded.score}
+            ),
+            [
+                {"entity_type": entity_type, "entity_id": entity_id, "match_id": match_id, "score": score}
+                for entity_id, match_id, score in added
+            ]
+        )
+    _touch_match_lists(db, entity_type, list({entity_id for entity_id, _, _ in added}), recomputed=False)
+    if commit:
+        db.commit()
+
+def _touch_match_lists(db: Session, entity_type: str, entity_ids: List[str], recomputed: bool):
+    """Move updated_at of the given lists, and computed_at too for lists rebuilt in full."""
+    if not entity_ids:
+        return
+    now = datetime.utcnow()
+    statement = _upsert_insert(db, models.MatchList)
+    changed = {"updated_at": statement.excluded.updated_at}
+    if recomputed:
+        changed["computed_at"] = statement.excluded.computed_at
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[models.MatchList.entity_type, models.MatchList.entity_id], set_=changed
+        ),
+        [{"entity_type": entity_type, "entity_id": entity_id, "computed_at": now, "updated_at": now} for entity_id in entity_ids]
+    )
+
+# Ingest batch operations
+def create_ingest_batch(db: Session, kind: str, total: int):
+    db_batch = _new_ingest_batch(kind, total)
+    db.add(db_batch)
+    db.commit()
+    return db_batch
+
+def _new_ingest_batch(kind: str, total: int) -> models.IngestBatch:
+    return models.IngestBatch(
+        id=f"batch-{uuid.uuid4()}",
+        kind=kind,
+        status="running",
+        total=total,
+        succeeded=0,
+        failed=0,
+        errors=[],
+        created_at=datetime.utcnow(),
+        updated_at=datetime.utcnow()
+    )
+
+def get_ingest_batch(db: Session, batch_id: str):
+    return db.query(models.IngestBatch).filter(models.IngestBatch.id == batch_id).first()
+
+def update_ingest_batch(
+    db: Session,
+    batch_id: str,
+    succeeded: int = 0,
+    failed: int = 0,
+    errors: Optional[List[Dict[str, str]]] = None,
+    status: Optional[str] = None,
+    max_errors: int = 100
+):
+    """Add to a batch's progress counters and error list."""
+    db_batch = get_ingest_batch(db, batch_id)
+    if db_batch:
+        db_batch.succeeded += succeeded
+        db_batch.failed += failed
+        if errors:
+            db_batch.errors = ((db_batch.errors or []) + errors)[:max_errors]
+        if status:
+            db_batch.status = status
+        db_batch.updated_at = datetime.utcnow()
+        db.commit()
+    return db_batch
+
+def fail_running_ingest_batches(db: Session) -> int:
+    """Mark batches still running as failed. Batches run inside the API
+    process, so at startup any batch left running was interrupted."""
+    count = db.query(models.IngestBatch).filter(models.IngestBatch.status == "running").update(
+        {"status": "failed", "updated_at": datetime.utcnow()}, synchronize_session=False
+    )
+    db.commit()
+    return count
+
+def _rows(records: List[Tuple[str, Any]]) -> List[Dict[str, Any]]:
+    """Column values for bulk writes; every row has the same keys, as executemany needs."""
+    now = datetime.utcnow()
+    return [{"id": record_id, **record.dict(), "created_at": now, "updated_at": now} for record_id, record in records]
+
+def _upsert(db: Session, model: Any, rows: List[Dict[str, Any]]):
+    """INSERT ... ON CONFLICT (id) DO UPDATE for many rows, keeping created_at of existing rows.
+
+    Existing rows are only updated when a column actually changes, so a
+    replayed or re-embedded record keeps its updated_at, which cached
+    comparisons and stored match lists are checked against.
+    """
+    if not rows:
+        return
+    statement = _upsert_insert(db, model)
+    columns = [column for column in model.__table__.columns if column.name not in ("id", "created_at")]
+    statement = statement.on_conflict_do_update(
+        index_elements=[model.id],
+        set_={column.name: statement.excluded[column.name] for column in columns},
+        where=or_(*(
+            _comparable(column).is_distinct_from(_comparable(statement.excluded[column.name]))
+            for column in columns
+            if column.name != "updated_at"
+        ))
+    )
+    db.execute(statement, rows)
+
+def _comparable(column: Any) -> Any:
+    # PostgreSQL's json type has no equality operator, so JSON is compared as text
+    return cast(column, Text) if isinstance(column.type, JSON) else column
+
+def _changes_any(db_obj: Any, data: Dict[str, Any], fields: Set[str]) -> bool:
+    """Whether applying data to db_obj would change any of the given fields."""
+    return any(key in fields and getattr(db_obj, key) != value for key, value in data.items())
+
+# Async operations, used by the API endpoints. The Kafka worker and batch
+# ingestion use the sync versions above.
+async def aget_job(db: AsyncSession, job_id: str):
+    return await db.get(models.Job, job_id)
+
+async def aget_jobs(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: Optional[int] = 100,
+    after: Optional[Tuple[datetime, str]] = None,
+    columns: Optional[List[Any]] = None
+):
+    return (await db.scalars(_list_statement(models.Job, skip, limit, after, columns))).all()
+
+async def aget_jobs_by_ids(db: AsyncSession, job_ids: List[str]):
+    return (await db.scalars(select(models.Job).where(models.Job.id.in_(job_ids)))).all()
+
+async def aget_job_ids(db: AsyncSession) -> List[str]:
+    return list(await db.scalars(select(models.Job.id)))
+
+async def acreate_jobs(db: AsyncSession, jobs: List[Tuple[str, schemas.JobCreate]]) -> List[str]:
+    rows = _rows(jobs)
+    if rows:
+        await db.execute(insert(models.Job), rows)
+        await db.run_sync(_set_job_keywords, {row["id"]: row["keywords"] for row in rows})
+    await db.commit()
+    return [row["id"] for row in rows]
+
+async def aget_applicant(db: AsyncSession, applicant_id: str):
+    return await db.get(models.Applicant, applicant_id)
+
+async def aget_applicants(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: Optional[int] = 100,
+    after: Optional[Tuple[datetime, str]] = None,
+    columns: Optional[List[Any]] = None
+):
+    return (await db.scalars(_list_statement(models.Applicant, skip, limit, after, columns))).all()
+
+async def aget_applicants_by_ids(db: AsyncSession, applicant_ids: List[str]):
+    return (await db.scalars(select(models.Applicant).where(models.Applicant.id.in_(applicant_ids)))).all()
+
+async def aget_applicant_ids(db: AsyncSession) -> List[str]:
+    return list(await db.scalars(select(models.Applicant.id)))
+
+async def acreate_applicants(db: AsyncSession, applicants: List[Tuple[str, schemas.ApplicantCreate]]) -> List[str]:
+    rows = _rows(applicants)
+    if rows:
+        await db.execute(insert(models.Applicant), rows)
+        await db.run_sync(_set_applicant_skills, {row["id"]: row["work_experience"] for row in rows})
+    await db.commit()
+    return [row["id"] for row in rows]
+
+async def aget_match_list(db: AsyncSession, entity_type: str, entity_id: str):
+    return await db.get(models.MatchList, (entity_type, entity_id))
+
+async def aget_matches(db: AsyncSession, entity_type: str, entity_id: str, limit: int):
+    return (await db.scalars(_matches_statement(entity_type, entity_id, limit))).all()
+
+async def acreate_ingest_batch(db: AsyncSession, kind: str, total: int):
+    db_batch = _new_ingest_batch(kind, total)
+    db.add(db_batch)
+    await db.commit()
+    return db_batch
+
+async def aget_ingest_batch(db: AsyncSession, batch_id: str):
+    return await db.get(models.IngestBatch, batch_id)
+
+async def aget_jobs_with_keywords(db: AsyncSession, keywords: List[str], match_all: bool = False, limit: int = 100):
+    return (await db.scalars(_with_skills_statement(
+        models.JobKeyword.job_id, models.Job, JOB_LIST_COLUMNS, keywords, match_all, limit
+    ))).all()
+
+async def aget_applicants_with_skills(db: AsyncSession, skills: List[str], match_all: bool = False, limit: int = 100):
+    return (await db.scalars(_with_skills_statement(
+        models.ApplicantSkill.applicant_id, models.Applicant, APPLICANT_LIST_COLUMNS, skills, match_all, limit
+    ))).all()
+
+async def _aget_skill_overlap(db: AsyncSession, owner_column: Any, other_column: Any, other_id: str, limit: int) -> List[Tuple[str, int, List[str]]]:
+    """(id, shared skill count, shared skills) for the entities sharing the most skills with other_id."""
+    ranked = (await db.execute(_skill_overlap_statement(owner_column, other_column, other_id, limit))).all()
+    shared: Dict[str, List[str]] = {}
+    if ranked:
+        for owner_id, name in await db.execute(
+            _shared_skills_statement(owner_column, [owner_id for owner_id, _ in ranked], other_column, other_id)
+        ):
+            shared.setdefault(owner_id, []).append(name)
+    return [(owner_id, overlap, shared.get(owner_id, [])) for owner_id, overlap in ranked]
+
+async def aget_applicants_sharing_job_keywords(db: AsyncSession, job_id: str, limit: int = 10):
+    return await _aget_skill_overlap(db, models.ApplicantSkill.applicant_id, models.JobKeyword.job_id, job_id, limit)
+
+async def aget_jobs_sharing_applicant_skills(db: AsyncSession, applicant_id: str, limit: int = 10):
+    return await _aget_skill_overlap(db, models.JobKeyword.job_id, models.ApplicantSkill.applicant_id, applicant_id, limit)
+
+async def aget_skill_counts(db: AsyncSession, prefix: Optional[str] = None, limit: int = 100):
+    return (await db.execute(_skill_counts_statement(prefix, limit))).all()
+
+async def atext_search(db: AsyncSession, entity_type: str, query: str, skip: int = 0, limit: int = 20):
+    """Jobs or applicants matching a free-text query, best BM25 score first."""
+    fts_query = text_search_query(query)
+    if not fts_query:
+        return []
+    return (await db.execute(
+        _text_search_statement(entity_type),
+        {"query": fts_query, "mark_start": TEXT_SEARCH_MARKS[0], "mark_end": TEXT_SEARCH_MARKS[1], "skip": skip, "limit": limit}
+    )).all()
@@ -0,0 +1,170 @@
+import os
+import asyncio
+import threading
+import multiprocessing
+import fitz  # PyMuPDF for PDF processing
+from fastapi.concurrency import run_in_threadpool
+from typing import Any, Callable, List, Union
+
+# PDF extraction runs in separate worker processes so a slow or malformed
+# document can be killed without taking the API or a worker down with it
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", "2"))
+PDF_EXTRACT_TIMEOUT_SECONDS = float(os.getenv("PDF_EXTRACT_TIMEOUT_SECONDS", "15"))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "200"))
+# Workers are spawned, not forked: the API and worker processes are
+# multi-threaded, and a forked child can inherit a lock another thread held.
+# Starting an interpreter takes a moment, which isn't charged to a document.
+PDF_WORKER_START_TIMEOUT_SECONDS = float(os.getenv("PDF_WORKER_START_TIMEOUT_SECONDS", "30"))
+
+class ExtractionError(Exception):
+    pass
+
+def _extract(pdf: Union[str, bytes], max_chars: int, max_pages: int) -> str:
+    """Extract text page by page until max_chars is reached. Runs in a pool process."""
+    if isinstance(pdf, (bytes, bytearray)):
+        doc = fitz.open(stream=pdf, filetype="pdf")
+    else:
+        doc = fitz.open(pdf)
+    try:
+        if doc.page_count > max_pages:
+            raise ExtractionError(f"PDF has {doc.page_count} pages, the limit is {max_pages}")
+
+        parts = []
+        length = 0
+        for page in doc:
+            text = page.get_text()
+            parts.append(text)
+            length += len(text)
+            if length >= max_chars:
+                break
+        return "".join(parts)[:max_chars]
+    finally:
+        doc.close()
+
+def _serve(conn: Any, extract: Callable[..., str]):
+    """Worker process loop: extract each document received on conn and send back the outcome."""
+    conn.send(None)  # Started
+    while True:
+        try:
+            args = conn.recv()
+        except EOFError:
+            return
+        try:
+            conn.send((True, extract(*args)))
+        except Exception as e:
+            conn.send((False, str(e)))
+
+class _WorkerCrashed(Exception):
+    pass
+
+class _ExtractionWorker:
+    """One extraction process, fed documents over a pipe one at a time."""
+
+    def __init__(self, context: Any, extract: Callable[..., str]):
+        self._conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child_conn, extract), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self._started = False
+
+    def run(self, args: tuple, timeout: float) -> str:
+        """Extract in the worker process. Raises TimeoutError, or _WorkerCrashed if
+        the process died or never started."""
+        try:
+            if not self._started:
+                if not self._conn.poll(PDF_WORKER_START_TIMEOUT_SECONDS):
+                    raise _WorkerCrashed
+                self._conn.recv()
+                self._started = True
+            self._conn.send(args)
+            ready = self._conn.poll(timeout)
+            if ready:
+                ok, result = self._conn.recv()
+        except (EOFError, OSError):
+            raise _WorkerCrashed
+        if not ready:
+            raise TimeoutError
+        if not ok:
+            raise ExtractionError(result)
+        return result
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self._conn.close()
+
+class PDFExtractor:
+    """Worker processes for PDF text extraction with a per-document timeout.
+
+    Each document runs in a worker process of its own, and at most ``workers``
+    documents are extracted at a time, so the timeout only covers time spent
+    extracting. A document that times out has its worker killed and replaced
+    without disturbing the others; a document whose worker crashes is retried
+    once on a fresh one.
+    """
+
+    def __init__(
+        self,
+        workers: int = PDF_EXTRACT_WORKERS,
+        timeout: float = PDF_EXTRACT_TIMEOUT_SECONDS,
+        extract: Callable[..., str] = _extract
+    ):
+        self.workers = workers
+        self.timeout = timeout
+        self._extract = extract  # Run in the worker processes, so it has to be picklable
+        self._context = multiprocessing.get_context("spawn")
+        self._idle: List[_ExtractionWorker] = []
+        self._idle_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(workers)
+        self._async_slots = None
+
+    def _take_worker(self) -> _ExtractionWorker:
+        with self._idle_lock:
+            if self._idle:
+                return self._idle.pop()
+        return _ExtractionWorker(self._context, self._extract)
+
+    def _return_worker(self, worker: _ExtractionWorker):
+        with self._idle_lock:
+            self._idle.append(worker)
+
+    def extract(self, pdf: Union[str, bytes], max_chars: int, max_pages: int = PDF_MAX_PAGES) -> str:
+        """Extract up to max_chars of text, raising ExtractionError on failure or timeout."""
+        with self._slots:
+            for attempt in range(2):
+                worker = self._take_worker()
+                try:
+                    text = worker.run((pdf, max_chars, max_pages), self.timeout)
+                except TimeoutError:
+                    worker.kill()
+                    raise ExtractionError(f"PDF extraction timed out after {self.timeout}s")
+                except _WorkerCrashed:
+                    worker.kill()
+                    if attempt:
+                        raise ExtractionError("PDF extraction process crashed")
+                    continue
+                except ExtractionError:
+                    self._return_worker(worker)
+                    raise
+                except BaseException:
+                    # Interrupted mid-document: the reply would be read as the next document's
+                    worker.kill()
+                    raise
+                self._return_worker(worker)
+                return text
+
+    async def aextract(self, pdf: Union[str, bytes], max_chars: int, max_pages: int = PDF_MAX_PAGES) -> str:
+        """Async extract. Waits for a free worker on the event loop, so only
+        documents being extracted hold a thread."""
+        if self._async_slots is None:
+            self._async_slots = asyncio.Semaphore(self.workers)
+        async with self._async_slots:
+            return await run_in_threadpool(self.extract, pdf, max_chars, max_pages)
+
+    def shutdown(self):
+        with self._idle_lock:
+            workers, self._idle = self._idle, []
+        for worker in workers:
+            worker.kill()
+
+pdf_extractor = PDFExtractor()
@@ -0,0 +1,290 @@
+import io
+import os
+import time
+import asyncio
+import zipfile
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+
+from . import crud, schemas, pipelines, summaries
+from . import concurrency as limits
+from .matches import update_matches
+from .database import SessionLocal
+from .uploads import UploadedDocument, MAX_UPLOAD_BYTES
+
+# Bulk ingestion configuration
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", "8"))  # Documents parsed at once per batch
+INGEST_DB_BATCH_SIZE = int(os.getenv("INGEST_DB_BATCH_SIZE", "50"))  # Rows per insert transaction
+INGEST_DB_BATCH_LINGER_SECONDS = float(os.getenv("INGEST_DB_BATCH_LINGER_SECONDS", "1.0"))
+MAX_BATCH_ERRORS = 100  # Errors kept on the batch record
+
+# Running batches, so their tasks aren't garbage collected mid-flight
+_tasks = set()
+
+class IngestItem(NamedTuple):
+    """One document in a batch: a plain upload, or an entry inside a zip upload."""
+    document: UploadedDocument
+    entry: Optional[str]
+
+    @property
+    def name(self) -> str:
+        return self.entry or self.document.filename
+
+def is_archive(document: UploadedDocument) -> bool:
+    return (document.filename or "").lower().endswith(".zip")
+
+def list_items(documents: List[UploadedDocument]) -> List[IngestItem]:
+    """Expand zip uploads into their file entries. Reads only the archive directory."""
+    items = []
+    for document in documents:
+        if not is_archive(document):
+            items.append(IngestItem(document, None))
+            continue
+
+        source = document.path or io.BytesIO(document.data)
+        with zipfile.ZipFile(source) as archive:
+            for info in archive.infolist():
+                name = os.path.basename(info.filename)
+                # Skip directories and OS metadata (e.g. __MACOSX/, .DS_Store)
+                if info.is_dir() or not name or name.startswith(".") or info.filename.startswith("__MACOSX/"):
+                    continue
+                items.append(IngestItem(document, info.filename))
+    return items
+
+def _read_item(item: IngestItem, archives: Dict[int, zipfile.ZipFile]) -> bytes:
+    """Read one item's bytes, enforcing the single-upload size limit on zip entries.
+
+    archives holds the zip uploads opened so far, by document, so each
+    archive's central directory is only read once per batch.
+    """
+    if item.entry is None:
+        if item.document.path is None:
+            return item.document.data
+        with open(item.document.path, "rb") as f:
+            return f.read()
+
+    archive = archives.get(id(item.document))
+    if archive is None:
+        archive = archives[id(item.document)] = zipfile.ZipFile(item.document.path or io.BytesIO(item.document.data))
+    info = archive.getinfo(item.entry)
+    if info.file_size > MAX_UPLOAD_BYTES:
+        raise ValueError(f"File exceeds the maximum size of {MAX_UPLOAD_BYTES} bytes")
+    return archive.read(info)
+
+# Per-kind parse/persist/embed steps
+async def _parse_job(data: bytes) -> Tuple[Dict[str, Any], Any]:
+    job_data, _ = await pipelines.aparse_job_description_cached(data.decode("utf-8", errors="replace"))
+    return job_data, schemas.JobCreate(**job_data)
+
+async def _parse_applicant(data: bytes) -> Tuple[Dict[str, Any], Any]:
+    applicant_data, _ = await pipelines.aparse_resume_cached(data)
+    if "error" in applicant_data:
+        raise ValueError(applicant_data["error"])
+    return applicant_data, schemas.ApplicantCreate(**applicant_data)
+
+KINDS = {
+    "job": {
+        "extensions": None,  # Job descriptions are read as text whatever the extension
+        "parse": _parse_job,
+        "create": crud.create_jobs,
+        "embed": pipelines.aupsert_job_embeddings,
+    },
+    "applicant": {
+        "extensions": (".pdf",),
+        "parse": _parse_applicant,
+        "create": crud.create_applicants,
+        "embed": pipelines.aupsert_applicant_embeddings,
+    },
+}
+
+class _Progress:
+    """Counts results in memory and writes them to the batch record with each insert."""
+
+    def __init__(self, batch_id: str):
+        self.batch_id = batch_id
+        self.succeeded = 0
+        self.failed = 0
+        self.errors: List[Dict[str, str]] = []
+
+    def fail(self, name: str, error: str):
+        self.failed += 1
+        self.errors.append({"file": name, "error": error})
+
+    def take(self) -> Dict[str, Any]:
+        """Return and reset the counts gathered since the last call."""
+        counts = {"succeeded": self.succeeded, "failed": self.failed, "errors": self.errors}
+        self.succeeded = 0
+        self.failed = 0
+        self.errors = []
+        return counts
+
+    async def flush(self, status: Optional[str] = None):
+        # Take the counts on the event loop so no update is lost while the write runs
+        counts = self.take()
+        await run_in_threadpool(_save_progress, self.batch_id, counts, status)
+
+def _save_progress(batch_id: str, counts: Dict[str, Any], status: Optional[str]):
+    db = SessionLocal()
+    try:
+        crud.update_ingest_batch(db, batch_id, status=status, max_errors=MAX_BATCH_ERRORS, **counts)
+    finally:
+        db.close()
+
+async def _read_stage(items: List[IngestItem], kind: str, queue: asyncio.Queue, progress: _Progress, workers: int):
+    """Feed raw documents to the parse workers; the bounded queue keeps only a few in memory."""
+    extensions = KINDS[kind]["extensions"]
+    archives: Dict[int, zipfile.ZipFile] = {}
+    try:
+        for item in items:
+            if extensions and not item.name.lower().endswith(extensions):
+                progress.fail(item.name, "Only PDF files are supported")
+                continue
+            try:
+                data = await run_in_threadpool(_read_item, item, archives)
+            except Exception as e:
+                progress.fail(item.name, str(e))
+                continue
+            await queue.put((item.name, data))
+    finally:
+        for archive in archives.values():
+            archive.close()
+
+    for _ in range(workers):
+        await queue.put(None)
+
+async def _parse_stage(kind: str, in_queue: asyncio.Queue, out_queue: asyncio.Queue, progress: _Progress):
+    """Extract and parse documents; LLM and PDF work is bounded by the shared limiters."""
+    parse = KINDS[kind]["parse"]
+    while True:
+        entry = await in_queue.get()
+        if entry is None:
+            await out_queue.put(None)
+            return
+
+        name, data = entry
+        try:
+            parsed, record = await parse(data)
+        except ValidationError as e:
+            progress.fail(name, f"Parsed data is invalid: {e.errors()[0]['msg']}")
+            continue
+        except Exception as e:
+            progress.fail(name, str(e))
+            continue
+        await out_queue.put((name, parsed, record))
+
+def _insert(kind: str, db, chunk: List[Tuple[str, Dict[str, Any], Any]]):
+    """Insert a chunk in one transaction, falling back to row by row to isolate failures.
+
+    Returns the inserted records and (name, error) pairs for the rows that failed.
+    """
+    create = KINDS[kind]["create"]
+    try:
+        create(db, [(parsed["id"], record) for _, parsed, record in chunk])
+        return [parsed for _, parsed, _ in chunk], []
+    except Exception:
+        db.rollback()
+
+    inserted, failures = [], []
+    for name, parsed, record in chunk:
+        try:
+            create(db, [(parsed["id"], record)])
+            inserted.append(parsed)
+        except Exception as e:
+            db.rollback()
+            failures.append((name, f"Could not save: {e}"))
+    return inserted, failures
+
+async def _persist_stage(kind: str, queue: asyncio.Queue, progress: _Progress, workers: int):
+    """Insert parsed records in batched transactions, then embed each inserted chunk."""
+    embed = KINDS[kind]["embed"]
+    db = SessionLocal()
+    try:
+        remaining = workers
+        while remaining:
+            # Collect up to INGEST_DB_BATCH_SIZE records, or whatever arrives within the linger time
+            chunk = []
+            deadline = None
+            while remaining and len(chunk) < INGEST_DB_BATCH_SIZE:
+                try:
+                    if deadline is None:
+                        entry = await queue.get()
+                    else:
+                        entry = await asyncio.wait_for(queue.get(), max(deadline - time.monotonic(), 0.001))
+                except asyncio.TimeoutError:
+                    break
+                if entry is None:
+                    remaining -= 1
+                else:
+                    chunk.append(entry)
+                    if deadline is None:
+                        deadline = time.monotonic() + INGEST_DB_BATCH_LINGER_SECONDS
+
+            if chunk:
+                inserted, failures = await run_in_threadpool(_insert, kind, db, chunk)
+                for name, error in failures:
+                    progress.fail(name, error)
+                try:
+                    await embed(inserted)
+                    progress.succeeded += len(inserted)
+                except Exception as e:
+                    # Rows are saved; only the vectors are missing
+                    inserted_ids = {parsed["id"] for parsed in inserted}
+                    for name, parsed, _ in chunk:
+                        if parsed["id"] in inserted_ids:
+                            progress.fail(name, f"Saved but could not be embedded: {e}")
+                else:
+                    try:
+                        await limits.vector_db.run(update_matches, db, kind, [parsed["id"] for parsed in inserted])
+                    except Exception as e:
+                        # Rows and vectors are in place; only the stored match lists lag behind
+                        print(f"Error updating matches for batch {progress.batch_id}: {e}")
+                    
+                    # Precompute RAG summaries, as the Kafka worker does for what it embeds
+                    await asyncio.gather(*[limits.llm.run(_precompute_summary, kind, parsed) for parsed in inserted])
+
+            await progress.flush()
+    finally:
+        db.close()
+
+def _precompute_summary(kind: str, item_data: Dict[str, Any]):
+    # Runs on the LLM limiter's threads, each with its own session
+    db = SessionLocal()
+    try:
+        summaries.precompute_summary(db, kind, item_data)
+    finally:
+        db.close()
+
+async def run_batch(batch_id: str, kind: str, documents: List[UploadedDocument], items: List[IngestItem]):
+    """Run a batch through read -> parse -> persist -> embed, with the stages overlapping."""
+    workers = max(1, min(INGEST_CONCURRENCY, len(items)))
+    progress = _Progress(batch_id)
+    raw_queue = asyncio.Queue(maxsize=workers * 2)
+    parsed_queue = asyncio.Queue(maxsize=INGEST_DB_BATCH_SIZE * 2)
+    stages = [
+        asyncio.ensure_future(_read_stage(items, kind, raw_queue, progress, workers)),
+        *[asyncio.ensure_future(_parse_stage(kind, raw_queue, parsed_queue, progress)) for _ in range(workers)],
+        asyncio.ensure_future(_persist_stage(kind, parsed_queue, progress, workers))
+    ]
+    status = "failed"
+    try:
+        await asyncio.gather(*stages)
+        status = "completed"
+    except Exception as e:
+        print(f"Error processing batch {batch_id}: {e}")
+    finally:
+        # Stop the other stages if one failed, so none is left blocked on a queue
+        for stage in stages:
+            stage.cancel()
+
+        for document in documents:
+            document.close()
+
+        await progress.flush(status)
+
+def start_batch(batch_id: str, kind: str, documents: List[UploadedDocument], items: List[IngestItem]):
+    """Run a batch in the background on the current event loop."""
+    task = asyncio.create_task(run_batch(batch_id, kind, documents, items))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return task
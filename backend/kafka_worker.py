@@ -2,121 +2,473 @@
 import os
 import json
 import time
-from confluent_kafka import Consumer, Producer, KafkaError
-from typing import Dict, Any
+import zlib
+import signal
+import threading
+import multiprocessing
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from confluent_kafka import Consumer, KafkaError, KafkaException, TopicPartition
+from typing import Dict, Any, List, Set, Tuple
+from pydantic import ValidationError
+from . import crud, models, schemas
+from .producer import producer, produce_message, KAFKA_BOOTSTRAP_SERVERS
+from .database import SessionLocal, engine
+from .summaries import precompute_summary
+from .matches import update_matches
 from .pipelines import (
     parse_job_description, 
     parse_resume, 
-    upsert_job_embedding, 
-    upsert_applicant_embedding
+    upsert_job_embeddings, 
+    upsert_applicant_embeddings
 )
 
-# Kafka configuration
-KAFKA_BOOTSTRAP_SERVERS = os.getenv("KAFKA_BOOTSTRAP_SERVERS", "localhost:9092")
+# Embedding batching: a batch is flushed once it holds EMBEDDING_BATCH_SIZE
+# messages or EMBEDDING_BATCH_LINGER_MS has passed, whichever comes first
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+EMBEDDING_BATCH_LINGER_MS = int(os.getenv("EMBEDDING_BATCH_LINGER_MS", "500"))
 
-# Producer configuration
-producer_conf = {
-    'bootstrap.servers': KAFKA_BOOTSTRAP_SERVERS,
-    'client.id': 'recruitment-producer'
-}
+# Worker pool: WORKER_PROCESSES consumers in the same group, each running
+# messages on WORKER_CONCURRENCY lanes with at most WORKER_MAX_IN_FLIGHT
+# messages dispatched but not finished
+WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", "2"))
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "4"))
+WORKER_MAX_IN_FLIGHT = int(os.getenv("WORKER_MAX_IN_FLIGHT", "256"))
+WORKER_SHUTDOWN_TIMEOUT_SECONDS = float(os.getenv("WORKER_SHUTDOWN_TIMEOUT_SECONDS", "60"))
+
+# RAG summaries of embedded records are precomputed on a pool of their own,
+# SUMMARY_CONCURRENCY LLM calls at a time, so they don't hold up the embedding
+# lane. Past SUMMARY_MAX_PENDING queued summaries the rest are skipped, and
+# generated on their first request instead.
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "4"))
+SUMMARY_MAX_PENDING = int(os.getenv("SUMMARY_MAX_PENDING", "256"))
+
+# Failed messages are retried with exponential backoff, then sent to the dead-letter topic
+WORKER_MAX_RETRIES = int(os.getenv("WORKER_MAX_RETRIES", "3"))
+RETRY_BACKOFF_SECONDS = float(os.getenv("WORKER_RETRY_BACKOFF_SECONDS", "1"))
+DEAD_LETTER_TOPIC = os.getenv("DEAD_LETTER_TOPIC", "recruitment-dead-letter")
+DEAD_LETTER_TIMEOUT_SECONDS = 30
+
+TOPICS = ['parse-job', 'parse-resume', 'generate-embedding']
 
 # Consumer configuration
 consumer_conf = {
     'bootstrap.servers': KAFKA_BOOTSTRAP_SERVERS,
     'group.id': 'recruitment-consumers',
-    'auto.offset.reset': 'earliest'
+    'auto.offset.reset': 'earliest',
+    # Offsets are committed by the worker once messages have been processed
+    'enable.auto.commit': False
 }
 
-# Initialize producer
-producer = Producer(producer_conf)
+def process_message(topic: str, data: Dict[str, Any]):
+    """Handle a parse-job or parse-resume message."""
+    if topic == 'parse-job':
+        # Parse job description
+        job_text = data.get('text', '')
+        job_data = parse_job_description(job_text)
+        
+        # Send to embedding generation
+        produce_message('generate-embedding', {
+            'type': 'job',
+            'data': job_data
+        }, key=job_data['id'])
+        
+    elif topic == 'parse-resume':
+        # Parse resume
+        resume_path = data.get('path', '')
+        applicant_data = parse_resume(resume_path)
+        if "error" in applicant_data:
+            print(f"Skipping resume {resume_path}: {applicant_data['error']}")
+            return
+        
+        # Send to embedding generation
+        produce_message('generate-embedding', {
+            'type': 'applicant',
+            'data': applicant_data
+        }, key=applicant_data['id'])
 
-def delivery_report(err, msg):
-    """Callback for message delivery reports."""
-    if err is not None:
-        print(f'Message delivery failed: {err}')
-    else:
-        print(f'Message delivered to {msg.topic()} [{msg.partition()}]')
+def process_embedding_batch(items: List[Dict[str, Any]]) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    """Embed and upsert a batch of generate-embedding payloads, grouped by type.
 
-def produce_message(topic: str, data: Dict[str, Any]):
-    """Produce a message to Kafka topic."""
-    try:
-        producer.produce(
-            topic, 
-            json.dumps(data).encode('utf-8'), 
-            callback=delivery_report
-        )
-        # Trigger any available delivery report callbacks
-        producer.poll(0)
-    except Exception as e:
-        print(f"Failed to produce message: {str(e)}")
+    Returns the job and applicant payloads it embedded, by id.
+    """
+    jobs, applicants = _group_embedding_items(items)
     
-    # Wait for any outstanding messages to be delivered
-    producer.flush()
+    db = SessionLocal()
+    try:
+        # Save the records first: resumes and job descriptions parsed by this
+        # worker aren't in the database yet, and rows saved by the API are
+        # overwritten with the same data
+        crud.upsert_jobs(db, _valid_records(schemas.JobCreate, jobs))
+        crud.upsert_applicants(db, _valid_records(schemas.ApplicantCreate, applicants))
+        
+        upsert_job_embeddings(list(jobs.values()))
+        upsert_applicant_embeddings(list(applicants.values()))
+        
+        # Merge the new vectors into the materialized match lists
+        for entity_type, ids in (('job', list(jobs)), ('applicant', list(applicants))):
+            try:
+                update_matches(db, entity_type, ids)
+            except Exception as e:
+                # Records and vectors are in place; only the stored match lists lag behind
+                print(f"Error updating {entity_type} matches: {str(e)}")
+    finally:
+        db.close()
+    return jobs, applicants
+
+def _group_embedding_items(items: List[Any]) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    """Job and applicant payloads by id. Later messages for the same entity
+    replace earlier ones; payloads without a type or id are skipped, since
+    retrying them can't help."""
+    jobs, applicants = {}, {}
+    for item in items:
+        data_type = item.get('type') if isinstance(item, dict) else None
+        item_data = item.get('data') if isinstance(item, dict) else None
+        if data_type not in ('job', 'applicant') or not isinstance(item_data, dict) or not item_data.get('id'):
+            print(f"Skipping malformed generate-embedding payload: {str(item)[:200]}")
+            continue
+        
+        if data_type == 'job':
+            jobs[item_data['id']] = item_data
+        else:
+            applicants[item_data['id']] = item_data
+    return jobs, applicants
+
+def _valid_records(schema, items: Dict[str, Dict[str, Any]]) -> List[Tuple[str, Any]]:
+    """(id, record) pairs for the payloads that validate; the rest are only embedded."""
+    records = []
+    for item_id, item_data in items.items():
+        try:
+            records.append((item_id, schema(**item_data)))
+        except ValidationError as e:
+            print(f"Not saving {item_id}: {e}")
+    return records
+
+def _with_retries(fn, *args):
+    """Call fn, retrying with exponential backoff before giving up."""
+    for attempt in range(WORKER_MAX_RETRIES + 1):
+        try:
+            return fn(*args)
+        except Exception as e:
+            if attempt == WORKER_MAX_RETRIES:
+                raise
+            delay = RETRY_BACKOFF_SECONDS * (2 ** attempt)
+            print(f"Attempt {attempt + 1} failed ({str(e)}), retrying in {delay}s")
+            time.sleep(delay)
+
+def send_to_dead_letter(msg, error: Exception):
+    """Publish a message that can't be processed to the dead-letter topic."""
+    value = msg.value()
+    future = produce_message(DEAD_LETTER_TOPIC, {
+        'topic': msg.topic(),
+        'partition': msg.partition(),
+        'offset': msg.offset(),
+        'key': msg.key().decode('utf-8', errors='replace') if msg.key() else None,
+        'value': value.decode('utf-8', errors='replace') if value else None,
+        'error': str(error),
+        'failedAt': time.time()
+    }, key=msg.key())
+    # Wait for delivery so the offset isn't committed past a message that was lost
+    future.result(timeout=DEAD_LETTER_TIMEOUT_SECONDS)
+    print(f"Sent message {msg.topic()}[{msg.partition()}]@{msg.offset()} to {DEAD_LETTER_TOPIC}: {str(error)}")
+
+class OffsetTracker:
+    """Tracks in-flight offsets per partition and the offsets that are safe to commit.
+
+    Messages finish out of order across lanes, so a partition is only committed
+    up to its oldest in-flight message.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[str, int], Set[int]] = {}
+        self._next: Dict[Tuple[str, int], int] = {}
+        self._committed: Dict[Tuple[str, int], int] = {}
+
+    def add(self, msg):
+        key = (msg.topic(), msg.partition())
+        with self._lock:
+            self._pending.setdefault(key, set()).add(msg.offset())
+            self._next[key] = max(self._next.get(key, 0), msg.offset() + 1)
+
+    def done(self, msg):
+        with self._lock:
+            self._pending.get((msg.topic(), msg.partition()), set()).discard(msg.offset())
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return sum(len(offsets) for offsets in self._pending.values())
+
+    def commit_offsets(self) -> List[TopicPartition]:
+        """Offsets that moved since the last call, marked as committed."""
+        offsets = []
+        with self._lock:
+            for key, next_offset in self._next.items():
+                pending = self._pending.get(key)
+                offset = min(pending) if pending else next_offset
+                if self._committed.get(key) != offset:
+                    self._committed[key] = offset
+                    offsets.append(TopicPartition(key[0], key[1], offset))
+        return offsets
+
+    def forget(self, partitions: List[TopicPartition]):
+        """Drop state for partitions that were revoked."""
+        with self._lock:
+            for partition in partitions:
+                key = (partition.topic, partition.partition)
+                self._pending.pop(key, None)
+                self._next.pop(key, None)
+                self._committed.pop(key, None)
+
+class ConsumerWorker:
+    """Runs consumed messages on parallel lanes while keeping per-key order.
+
+    Parse messages are hashed by key (the entity id) onto one of
+    ``concurrency`` single-threaded lanes, so a slow PDF or LLM call only holds
+    up its own lane. Embedding messages are batched onto a lane of their own.
+    """
+
+    def __init__(self, consumer: Consumer, concurrency: int = WORKER_CONCURRENCY):
+        self.consumer = consumer
+        self.tracker = OffsetTracker()
+        self.lanes = [
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"lane-{i}")
+            for i in range(concurrency)
+        ]
+        self.embedding_lane = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embeddings")
+        self.summary_pool = ThreadPoolExecutor(max_workers=SUMMARY_CONCURRENCY, thread_name_prefix="summaries")
+        self._summary_slots = threading.BoundedSemaphore(SUMMARY_MAX_PENDING)
+        self._futures: Set[Future] = set()
+        self._futures_lock = threading.Lock()
+        # Set when a message could neither be processed nor dead-lettered
+        self.failed = threading.Event()
+
+    def _submit(self, executor: ThreadPoolExecutor, fn, *args):
+        future = executor.submit(fn, *args)
+        with self._futures_lock:
+            self._futures.add(future)
+        future.add_done_callback(self._discard)
+
+    def _discard(self, future: Future):
+        with self._futures_lock:
+            self._futures.discard(future)
+
+    def _lane(self, key: bytes) -> ThreadPoolExecutor:
+        return self.lanes[zlib.crc32(key) % len(self.lanes)]
+
+    def dispatch(self, messages: List[Any]):
+        """Hand a consumed batch to the lanes."""
+        embedding_messages = []
+        embedding_items = []
+        for msg in messages:
+            self.tracker.add(msg)
+            key = msg.key() or str(msg.offset()).encode('utf-8')
+            try:
+                data = json.loads(msg.value().decode('utf-8'))
+            except Exception as e:
+                # Malformed payloads won't get better with retries
+                self._submit(self._lane(key), self._finish, msg, e)
+                continue
+            
+            if msg.topic() == 'generate-embedding':
+                # Collected and embedded together below
+                embedding_messages.append(msg)
+                embedding_items.append(data)
+            else:
+                self._submit(self._lane(key), self._process, msg, data)
+        
+        if embedding_messages:
+            self._submit(self.embedding_lane, self._process_embeddings, embedding_messages, embedding_items)
+
+    def _process(self, msg, data: Dict[str, Any]):
+        error = None
+        try:
+            _with_retries(process_message, msg.topic(), data)
+        except Exception as e:
+            error = e
+        self._finish(msg, error)
 
-def start_worker():
-    """Start Kafka worker to process messages."""
+    def _process_embeddings(self, messages: List[Any], items: List[Dict[str, Any]]):
+        errors = [None] * len(messages)
+        embedded = {'job': {}, 'applicant': {}}
+        try:
+            jobs, applicants = _with_retries(process_embedding_batch, items)
+            embedded['job'].update(jobs)
+            embedded['applicant'].update(applicants)
+        except Exception as e:
+            # Retry one by one so a bad message doesn't take the batch with it
+            print(f"Error processing embedding batch of {len(items)}: {str(e)}")
+            for i, item in enumerate(items):
+                try:
+                    jobs, applicants = process_embedding_batch([item])
+                    embedded['job'].update(jobs)
+                    embedded['applicant'].update(applicants)
+                except Exception as item_error:
+                    errors[i] = item_error
+        
+        for msg, error in zip(messages, errors):
+            self._finish(msg, error)
+        
+        # Precompute RAG summaries so profile pages don't wait on the LLM
+        for entity_type, records in embedded.items():
+            for item_data in records.values():
+                self._submit_summary(entity_type, item_data)
+
+    def _submit_summary(self, entity_type: str, item_data: Dict[str, Any]):
+        if not self._summary_slots.acquire(blocking=False):
+            print(f"Summary queue full, leaving {entity_type} {item_data['id']} to its first request")
+            return
+        self.summary_pool.submit(self._precompute_summary, entity_type, item_data)
+
+    def _precompute_summary(self, entity_type: str, item_data: Dict[str, Any]):
+        # Runs on the summary pool, each call with its own session
+        db = SessionLocal()
+        try:
+            precompute_summary(db, entity_type, item_data)
+        finally:
+            db.close()
+            self._summary_slots.release()
+
+    def _finish(self, msg, error: Exception = None):
+        """Mark a message done, dead-lettering it first if it failed.
+
+        If the dead-letter publish fails too, the offset stays pending so it is
+        never committed, and the worker stops so the message is redelivered.
+        """
+        if error is not None:
+            try:
+                _with_retries(send_to_dead_letter, msg, error)
+            except Exception as e:
+                print(f"Failed to dead-letter {msg.topic()}[{msg.partition()}]@{msg.offset()}, stopping: {str(e)}")
+                self.failed.set()
+                return
+        self.tracker.done(msg)
+
+    def commit(self, asynchronous: bool = True):
+        """Commit every partition up to its oldest in-flight message."""
+        offsets = self.tracker.commit_offsets()
+        if offsets:
+            try:
+                self.consumer.commit(offsets=offsets, asynchronous=asynchronous)
+            except KafkaException as e:
+                print(f"Failed to commit offsets: {str(e)}")
+
+    def drain(self):
+        """Wait for everything dispatched so far."""
+        with self._futures_lock:
+            futures = list(self._futures)
+        wait(futures)
+
+    def on_revoke(self, consumer: Consumer, partitions: List[TopicPartition]):
+        # Finish and commit in-flight work before the partitions move elsewhere
+        self.drain()
+        self.commit(asynchronous=False)
+        self.tracker.forget(partitions)
+
+    def shutdown(self):
+        for lane in self.lanes + [self.embedding_lane]:
+            lane.shutdown(wait=True)
+        # Summaries not started yet are left to their first request
+        self.summary_pool.shutdown(wait=True, cancel_futures=True)
+
+def run_consumer(worker_id: int = 0):
+    """Consume and process messages until stopped. Runs in each worker process."""
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *args: stopping.set())
+    
     consumer = Consumer(consumer_conf)
-    consumer.subscribe(['parse-job', 'parse-resume', 'generate-embedding'])
+    worker = ConsumerWorker(consumer)
+    consumer.subscribe(TOPICS, on_revoke=worker.on_revoke)
+    print(f"Worker {worker_id} started")
+    paused = False
     
     try:
-        while True:
-            msg = consumer.poll(1.0)
+        while not stopping.is_set() and not worker.failed.is_set():
+            # Stop fetching while too much is in flight; consume() still serves rebalances
+            if worker.tracker.in_flight() >= WORKER_MAX_IN_FLIGHT:
+                consumer.pause(consumer.assignment())
+                paused = True
+            elif paused:
+                consumer.resume(consumer.assignment())
+                paused = False
             
-            if msg is None:
-                continue
-                
-            if msg.error():
-                if msg.error().code() == KafkaError._PARTITION_EOF:
-                    # End of partition event - not an error
-                    continue
-                else:
+            # Wait until a full batch arrives or the linger time expires
+            messages = consumer.consume(
+                num_messages=EMBEDDING_BATCH_SIZE,
+                timeout=EMBEDDING_BATCH_LINGER_MS / 1000
+            )
+            
+            batch = []
+            for msg in messages:
+                if msg.error():
+                    if msg.error().code() == KafkaError._PARTITION_EOF:
+                        # End of partition event - not an error
+                        continue
+                    if msg.error().fatal():
+                        raise KafkaException(msg.error())
+                    # Transient errors are retried by the client
                     print(f"Error: {msg.error()}")
-                    break
-                    
-            # Process message
-            try:
-                data = json.loads(msg.value().decode('utf-8'))
-                topic = msg.topic()
-                
-                if topic == 'parse-job':
-                    # Parse job description
-                    job_text = data.get('text', '')
-                    job_data = parse_job_description(job_text)
-                    
-                    # Send to embedding generation
-                    produce_message('generate-embedding', {
-                        'type': 'job',
-                        'data': job_data
-                    })
-                    
-                elif topic == 'parse-resume':
-                    # Parse resume
-                    resume_path = data.get('path', '')
-                    applicant_data = parse_resume(resume_path)
-                    
-                    # Send to embedding generation
-                    produce_message('generate-embedding', {
-                        'type': 'applicant',
-                        'data': applicant_data
-                    })
-                    
-                elif topic == 'generate-embedding':
-                    # Generate embeddings
-                    data_type = data.get('type', '')
-                    item_data = data.get('data', {})
-                    
-                    if data_type == 'job':
-                        upsert_job_embedding(item_data)
-                    elif data_type == 'applicant':
-                        upsert_applicant_embedding(item_data)
-                
-            except Exception as e:
-                print(f"Error processing message: {str(e)}")
+                    continue
+                batch.append(msg)
+            
+            if batch:
+                worker.dispatch(batch)
+            worker.commit()
                 
     except KeyboardInterrupt:
         pass
     finally:
+        worker.drain()
+        worker.commit(asynchronous=False)
         consumer.close()
+        worker.shutdown()
+        # Deliver anything the parse handlers produced before exiting
+        producer.close()
+    
+    if worker.failed.is_set():
+        # Exit non-zero so the pool restarts the worker from the last committed offset
+        raise SystemExit(1)
+
+def start_worker(processes: int = WORKER_PROCESSES):
+    """Start the Kafka worker pool, restarting worker processes that exit."""
+    models.Base.metadata.create_all(bind=engine)
+    models.create_missing_indexes(engine)
+    models.create_text_search_tables(engine)
+    
+    if processes <= 1:
+        run_consumer()
+        return
+    
+    # Don't hand pooled SQLite connections to the worker processes
+    engine.dispose()
+    context = multiprocessing.get_context("spawn")
+    workers: Dict[int, Any] = {}
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *args: stopping.set())
+    
+    try:
+        while not stopping.is_set():
+            for worker_id in range(processes):
+                process = workers.get(worker_id)
+                if process is not None and process.is_alive():
+                    continue
+                if process is not None:
+                    print(f"Worker {worker_id} exited with code {process.exitcode}, restarting")
+                workers[worker_id] = context.Process(
+                    target=run_consumer, args=(worker_id,), name=f"kafka-worker-{worker_id}"
+                )
+                workers[worker_id].start()
+            stopping.wait(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # SIGTERM lets each worker finish its in-flight messages and commit
+        for process in workers.values():
+            if process.is_alive():
+                process.terminate()
+        for process in workers.values():
+            process.join(WORKER_SHUTDOWN_TIMEOUT_SECONDS)
+            if process.is_alive():
+                process.kill()
 
 if __name__ == "__main__":
     start_worker()
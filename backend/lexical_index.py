@@ -0,0 +1,164 @@
+import os
+import re
+import json
+import math
+import heapq
+import fcntl
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+# Lexical index configuration
+LEXICAL_INDEX_PATH = os.getenv("LEXICAL_INDEX_PATH", "./data/lexical")
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Words too common in job ads and resumes to say anything about a match
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it",
+    "of", "on", "or", "our", "the", "to", "we", "will", "with", "you", "your"
+}
+
+# Keeps tokens like "c++", "c#", "node.js" and "ci/cd" whole
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:[./\-][a-z0-9+#]+)*")
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+class BM25Index:
+    """Inverted index with BM25 scoring, persisted as an append-only log.
+
+    Each line of ``<name>.log`` holds a document's term frequencies (or a
+    deletion); later lines for the same id replace earlier ones. As with the
+    local vector store, writers append under a file lock and readers in any
+    process replay new lines before each call. The log is rewritten once
+    superseded lines outnumber live documents.
+    """
+
+    def __init__(self, name: str, directory: str = LEXICAL_INDEX_PATH):
+        os.makedirs(directory, exist_ok=True)
+        self.log_path = os.path.join(directory, f"{name}.log")
+        self.lock_path = os.path.join(directory, f"{name}.lock")
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._docs: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._total_length = 0
+        self._log_offset = 0
+        self._log_inode = None
+        self._log_lines = 0
+
+    def _refresh(self):
+        """Replay log lines written since the last refresh, reloading if the log was compacted."""
+        with self._lock:
+            try:
+                stat = os.stat(self.log_path)
+            except FileNotFoundError:
+                return
+            if stat.st_ino == self._log_inode and stat.st_size <= self._log_offset:
+                return
+
+            with open(self.log_path, "rb") as f:
+                # Compaction may have replaced the log since the stat above, so
+                # check the file actually opened before seeking into it
+                inode = os.fstat(f.fileno()).st_ino
+                if self._log_inode is not None and inode != self._log_inode:
+                    self._reset()
+                self._log_inode = inode
+                f.seek(self._log_offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # Partially written line, pick it up next time
+                    self._log_offset += len(line)
+                    self._log_lines += 1
+                    entry = json.loads(line)
+                    self._apply(entry["id"], entry.get("tf"))
+
+    def _apply(self, doc_id: str, tf: Optional[Dict[str, int]]):
+        old = self._docs.pop(doc_id, None)
+        if old is not None:
+            for term in old:
+                postings = self._postings[term]
+                del postings[doc_id]
+                if not postings:
+                    del self._postings[term]
+            self._total_length -= self._lengths.pop(doc_id)
+
+        if tf:
+            self._docs[doc_id] = tf
+            self._lengths[doc_id] = sum(tf.values())
+            self._total_length += self._lengths[doc_id]
+            for term, count in tf.items():
+                self._postings.setdefault(term, {})[doc_id] = count
+
+    def _append(self, entries: List[Dict]):
+        with self._lock, open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._refresh()
+                with open(self.log_path, "ab") as f:
+                    f.write("".join(json.dumps(entry) + "\n" for entry in entries).encode("utf-8"))
+                self._refresh()
+                if self._log_lines > 1000 and self._log_lines > 2 * len(self._docs):
+                    self._compact()
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _compact(self):
+        """Rewrite the log with one line per live document. Called with the file lock held."""
+        tmp_path = self.log_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            for doc_id, tf in self._docs.items():
+                f.write((json.dumps({"id": doc_id, "tf": tf}) + "\n").encode("utf-8"))
+        os.replace(tmp_path, self.log_path)
+        self._reset()
+        self._refresh()
+
+    def upsert(self, documents: List[Tuple[str, str]]):
+        """Index (id, text) pairs, replacing earlier versions of the same ids."""
+        if documents:
+            self._append([{"id": doc_id, "tf": dict(Counter(tokenize(text)))} for doc_id, text in documents])
+
+    def delete(self, doc_ids: List[str]):
+        if doc_ids:
+            self._append([{"id": doc_id, "tf": None} for doc_id in doc_ids])
+
+    def search(self, query: str, top_k: int) -> List[Tuple[str, float]]:
+        """Top (id, score) pairs for a free-text query."""
+        self._refresh()
+        with self._lock:
+            count = len(self._docs)
+            if count == 0 or top_k <= 0:
+                return []
+            average_length = self._total_length / count
+
+            scores: Dict[str, float] = {}
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[doc_id] / average_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+    def __len__(self):
+        self._refresh()
+        return len(self._docs)
+
+_indexes: Dict[str, BM25Index] = {}
+_indexes_lock = threading.Lock()
+
+def get_lexical_index(name: str) -> BM25Index:
+    """Return the process-wide BM25 index with the given name."""
+    with _indexes_lock:
+        if name not in _indexes:
+            _indexes[name] = BM25Index(name)
+        return _indexes[name]
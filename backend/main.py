@@ -1,20 +1,29 @@
 
-from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Form, BackgroundTasks
+from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Form, BackgroundTasks, Request, Response, Query
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 import os
-import tempfile
-import shutil
+import json
 import uuid
-from typing import List, Optional
+import base64
+import zipfile
+from typing import Any, List, Optional, Tuple
 from datetime import datetime
 
-from . import crud, models, schemas, pipelines
-from .database import engine, get_db
-from .kafka_worker import produce_message
+from . import crud, models, schemas, pipelines, summaries, ingest, matches
+from . import concurrency as limits
+from . import uploads
+from .cache import cache_stats, SingleFlight
+from .database import engine, async_engine, get_db, get_async_db, SessionLocal
+from .producer import producer, produce_message
 
 # Create tables
 models.Base.metadata.create_all(bind=engine)
+models.create_missing_indexes(engine)
+models.create_text_search_tables(engine)
 
 # Create FastAPI app
 app = FastAPI(
@@ -32,25 +41,114 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Ensure Pinecone indexes exist on startup
+# Reject oversized uploads from their Content-Length before the body is read
+# (multipart framing adds a little on top of the file itself)
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    content_length = request.headers.get("content-length")
+    max_bytes = uploads.MAX_BATCH_UPLOAD_BYTES if request.url.path.endswith("/parse-batch") else uploads.MAX_UPLOAD_BYTES
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes + 64 * 1024:
+        return JSONResponse(
+            status_code=413,
+            content={"detail": f"Upload exceeds the maximum size of {max_bytes} bytes"}
+        )
+    return await call_next(request)
+
+# Ensure vector indexes exist on startup
 @app.on_event("startup")
 def startup_event():
-    pipelines.ensure_pinecone_indexes()
+    pipelines.ensure_vector_indexes()
+    
+    # Index existing rows for keyword search the first time it runs
+    db = SessionLocal()
+    try:
+        if len(pipelines.job_lexical_index) == 0:
+            pipelines.index_jobs_lexical(
+                [pipelines.job_data_from_model(db_job) for db_job in crud.get_jobs(db, limit=None)]
+            )
+        if len(pipelines.applicant_lexical_index) == 0:
+            pipelines.index_applicants_lexical(
+                [pipelines.applicant_data_from_model(db_applicant) for db_applicant in crud.get_applicants(db, limit=None)]
+            )
+        
+        # Batches that were running when the API last stopped won't finish
+        interrupted = crud.fail_running_ingest_batches(db)
+        if interrupted:
+            print(f"Marked {interrupted} interrupted ingest batches as failed")
+        
+        # Fill the skill tables from rows saved before they existed. The
+        # backfill is recorded once it finishes, so an interrupted one reruns
+        if not crud.has_migrated(db, crud.SKILLS_BACKFILL):
+            crud.backfill_skills(db)
+            crud.record_migration(db, crud.SKILLS_BACKFILL)
+    finally:
+        db.close()
+
+# Deliver queued Kafka messages and close pooled database connections before the process exits
+@app.on_event("shutdown")
+async def shutdown_event():
+    await run_in_threadpool(producer.close)
+    await async_engine.dispose()
 
 # Root endpoint
 @app.get("/")
 def read_root():
     return {"message": "Recruitment Matching API is running"}
 
+# Lists are ordered by (created_at, id). When a page is full, its
+# X-Next-Cursor header is the cursor to pass for the next page.
+def _encode_cursor(row: Any) -> str:
+    return base64.urlsafe_b64encode(f"{row.created_at.isoformat()}|{row.id}".encode("utf-8")).decode("ascii")
+
+def _decode_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, str]]:
+    if cursor is None:
+        return None
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|", 1)
+        return datetime.fromisoformat(created_at), row_id
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _page(response: Response, rows: List[Any], limit: int) -> List[Any]:
+    if len(rows) == limit:
+        response.headers["X-Next-Cursor"] = _encode_cursor(rows[-1])
+    return rows
+
 # Job endpoints
 @app.get("/jobs/", response_model=List[schemas.Job])
-def read_jobs(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    jobs = crud.get_jobs(db, skip=skip, limit=limit)
-    return jobs
+async def read_jobs(
+    response: Response,
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    jobs = await crud.aget_jobs(db, skip=skip, limit=limit, after=_decode_cursor(cursor))
+    return _page(response, jobs, limit)
+
+@app.get("/jobs/summaries", response_model=List[schemas.JobSummary])
+async def read_job_summaries(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    jobs = await crud.aget_jobs(db, limit=limit, after=_decode_cursor(cursor), columns=crud.JOB_LIST_COLUMNS)
+    return _page(response, jobs, limit)
+
+@app.get("/jobs/with-keywords", response_model=List[schemas.JobSummary])
+async def read_jobs_with_keywords(
+    keywords: List[str] = Query(...),
+    match: str = Query("any", pattern="^(any|all)$"),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Jobs listing any (or all) of the keywords, most matching keywords first
+    return await crud.aget_jobs_with_keywords(db, _split_values(keywords) or [], match_all=match == "all", limit=limit)
 
 @app.get("/jobs/{job_id}", response_model=schemas.Job)
-def read_job(job_id: str, db: Session = Depends(get_db)):
-    db_job = crud.get_job(db, job_id=job_id)
+async def read_job(job_id: str, db: AsyncSession = Depends(get_async_db)):
+    db_job = await crud.aget_job(db, job_id=job_id)
     if db_job is None:
         raise HTTPException(status_code=404, detail="Job not found")
     return db_job
@@ -59,46 +157,127 @@ def read_job(job_id: str, db: Session = Depends(get_db)):
 async def parse_job(
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    # Create temp file
-    temp_file = tempfile.NamedTemporaryFile(delete=False)
+    # Read the upload, in memory unless it is large enough to spool
+    document = await _read_upload(file)
     try:
-        # Save uploaded file to temp location
-        with temp_file as f:
-            shutil.copyfileobj(file.file, f)
-        
         # Read the file content
-        with open(temp_file.name, 'r') as f:
-            content = f.read()
+        content = await document.text()
         
         # Parse job description
-        job_data = pipelines.parse_job_description(content)
+        job_data, from_cache = await pipelines.aparse_job_description_cached(content)
         
         # Save to database
-        db_job = crud.create_job(db, schemas.JobCreate(**job_data))
+        await crud.acreate_jobs(db, [(job_data["id"], schemas.JobCreate(**job_data))])
         
         # Send to Kafka for async processing (embedding generation)
         background_tasks.add_task(
             produce_message,
             'generate-embedding',
-            {'type': 'job', 'data': job_data}
+            {'type': 'job', 'data': job_data},
+            key=job_data["id"]
         )
         
-        return {"jobData": job_data}
+        return {"jobData": job_data, "fromCache": from_cache}
     finally:
-        # Clean up temp file
-        os.unlink(temp_file.name)
+        # Clean up spooled file, if any
+        document.close()
+
+@app.post("/jobs/parse-batch", response_model=schemas.IngestBatch, status_code=202)
+async def parse_jobs_batch(
+    files: List[UploadFile] = File(...),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Text files and/or zip archives of them; poll GET /batches/{batch_id} for progress
+    return await _start_batch("job", files, db)
+
+async def _read_upload(file: UploadFile, max_bytes: int = uploads.MAX_UPLOAD_BYTES) -> uploads.UploadedDocument:
+    try:
+        return await uploads.read_upload(file, max_bytes=max_bytes)
+    except uploads.UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+async def _start_batch(kind: str, files: List[UploadFile], db: AsyncSession):
+    # Read every upload before responding; the request's files are closed afterwards
+    documents = []
+    try:
+        for file in files:
+            max_bytes = uploads.MAX_BATCH_UPLOAD_BYTES if file.filename.lower().endswith(".zip") else uploads.MAX_UPLOAD_BYTES
+            documents.append(await _read_upload(file, max_bytes=max_bytes))
+        items = await run_in_threadpool(ingest.list_items, documents)
+    except zipfile.BadZipFile:
+        for document in documents:
+            document.close()
+        raise HTTPException(status_code=400, detail="Invalid zip archive")
+    except BaseException:
+        for document in documents:
+            document.close()
+        raise
+    
+    if not items:
+        for document in documents:
+            document.close()
+        raise HTTPException(status_code=400, detail="No files to process")
+    
+    db_batch = await crud.acreate_ingest_batch(db, kind, len(items))
+    
+    # Process in the background; the batch owns the documents from here on
+    ingest.start_batch(db_batch.id, kind, documents, items)
+    
+    return _batch_response(db_batch)
+
+def _batch_response(db_batch: models.IngestBatch):
+    return {
+        "id": db_batch.id,
+        "kind": db_batch.kind,
+        "status": db_batch.status,
+        "total": db_batch.total,
+        "processed": db_batch.succeeded + db_batch.failed,
+        "succeeded": db_batch.succeeded,
+        "failed": db_batch.failed,
+        "errors": db_batch.errors or [],
+        "createdAt": db_batch.created_at.isoformat(),
+        "updatedAt": db_batch.updated_at.isoformat()
+    }
 
 # Applicant endpoints
 @app.get("/applicants/", response_model=List[schemas.Applicant])
-def read_applicants(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    applicants = crud.get_applicants(db, skip=skip, limit=limit)
-    return applicants
+async def read_applicants(
+    response: Response,
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    applicants = await crud.aget_applicants(db, skip=skip, limit=limit, after=_decode_cursor(cursor))
+    return _page(response, applicants, limit)
+
+@app.get("/applicants/summaries", response_model=List[schemas.ApplicantSummary])
+async def read_applicant_summaries(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    applicants = await crud.aget_applicants(
+        db, limit=limit, after=_decode_cursor(cursor), columns=crud.APPLICANT_LIST_COLUMNS
+    )
+    return _page(response, applicants, limit)
+
+@app.get("/applicants/with-skills", response_model=List[schemas.ApplicantSummary])
+async def read_applicants_with_skills(
+    skills: List[str] = Query(...),
+    match: str = Query("any", pattern="^(any|all)$"),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Applicants with any (or all) of the skills, most matching skills first
+    return await crud.aget_applicants_with_skills(db, _split_values(skills) or [], match_all=match == "all", limit=limit)
 
 @app.get("/applicants/{applicant_id}", response_model=schemas.Applicant)
-def read_applicant(applicant_id: str, db: Session = Depends(get_db)):
-    db_applicant = crud.get_applicant(db, applicant_id=applicant_id)
+async def read_applicant(applicant_id: str, db: AsyncSession = Depends(get_async_db)):
+    db_applicant = await crud.aget_applicant(db, applicant_id=applicant_id)
     if db_applicant is None:
         raise HTTPException(status_code=404, detail="Applicant not found")
     return db_applicant
@@ -107,72 +286,237 @@ def read_applicant(applicant_id: str, db: Session = Depends(get_db)):
 async def parse_applicant(
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Validate file is PDF
     if not file.filename.endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Only PDF files are supported")
     
-    # Create temp file
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
+    # Read the upload, in memory unless it is large enough to spool
+    document = await _read_upload(file)
     try:
-        # Save uploaded file to temp location
-        with temp_file as f:
-            shutil.copyfileobj(file.file, f)
-        
-        # Parse resume
-        applicant_data = pipelines.parse_resume(temp_file.name)
+        # Parse resume straight from memory (or from the spooled file)
+        applicant_data, from_cache = await pipelines.aparse_resume_cached(document.source)
         
         if "error" in applicant_data:
             raise HTTPException(status_code=400, detail=applicant_data["error"])
         
         # Save to database
-        db_applicant = crud.create_applicant(db, schemas.ApplicantCreate(**applicant_data))
+        await crud.acreate_applicants(db, [(applicant_data["id"], schemas.ApplicantCreate(**applicant_data))])
         
         # Send to Kafka for async processing (embedding generation)
         background_tasks.add_task(
             produce_message,
             'generate-embedding',
-            {'type': 'applicant', 'data': applicant_data}
+            {'type': 'applicant', 'data': applicant_data},
+            key=applicant_data["id"]
         )
         
-        return {"applicantData": applicant_data}
+        return {"applicantData": applicant_data, "fromCache": from_cache}
     finally:
-        # Clean up temp file
-        os.unlink(temp_file.name)
+        # Clean up spooled file, if any
+        document.close()
+
+@app.post("/applicants/parse-batch", response_model=schemas.IngestBatch, status_code=202)
+async def parse_applicants_batch(
+    files: List[UploadFile] = File(...),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # PDF resumes and/or zip archives of them; poll GET /batches/{batch_id} for progress
+    return await _start_batch("applicant", files, db)
+
+# Skill endpoints
+@app.get("/skills/", response_model=List[schemas.SkillCount])
+async def read_skills(
+    prefix: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Skills by how many applicants and jobs list them
+    return [
+        {"name": name, "displayName": display_name, "applicantCount": applicant_count, "jobCount": job_count}
+        for name, display_name, applicant_count, job_count in await crud.aget_skill_counts(db, prefix=prefix, limit=limit)
+    ]
+
+@app.get("/skills/applicants-for-job/{job_id}", response_model=List[schemas.SkillOverlap])
+async def applicants_sharing_job_keywords(
+    job_id: str,
+    limit: int = Query(10, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if await crud.aget_job(db, job_id=job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _skill_overlap_response(await crud.aget_applicants_sharing_job_keywords(db, job_id, limit=limit))
+
+@app.get("/skills/jobs-for-applicant/{applicant_id}", response_model=List[schemas.SkillOverlap])
+async def jobs_sharing_applicant_skills(
+    applicant_id: str,
+    limit: int = Query(10, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if await crud.aget_applicant(db, applicant_id=applicant_id) is None:
+        raise HTTPException(status_code=404, detail="Applicant not found")
+    return _skill_overlap_response(await crud.aget_jobs_sharing_applicant_skills(db, applicant_id, limit=limit))
+
+def _skill_overlap_response(rows: List[Tuple[str, int, List[str]]]) -> List[dict]:
+    return [{"id": id, "overlap": overlap, "skills": skills} for id, overlap, skills in rows]
+
+# Bulk ingestion endpoints
+@app.get("/batches/{batch_id}", response_model=schemas.IngestBatch)
+async def read_batch(batch_id: str, db: AsyncSession = Depends(get_async_db)):
+    db_batch = await crud.aget_ingest_batch(db, batch_id=batch_id)
+    if db_batch is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return _batch_response(db_batch)
 
 # Search endpoints
+def search_filters(
+    keywords: Optional[List[str]] = Query(None),
+    min_years_experience: Optional[int] = Query(None, alias="minYearsExperience"),
+    max_years_experience: Optional[int] = Query(None, alias="maxYearsExperience"),
+    education: Optional[List[str]] = Query(None),
+    country: Optional[List[str]] = Query(None),
+    position_level: Optional[List[str]] = Query(None, alias="positionLevel"),
+    sponsorship: Optional[bool] = Query(None)
+) -> schemas.SearchFilters:
+    """SearchFilters from query parameters. List filters can be repeated or comma-separated."""
+    return schemas.SearchFilters(
+        keywords=_split_values(keywords),
+        minYearsExperience=min_years_experience,
+        maxYearsExperience=max_years_experience,
+        education=_split_values(education),
+        country=_split_values(country),
+        positionLevel=_split_values(position_level),
+        sponsorship=sponsorship
+    )
+
+def _split_values(values: Optional[List[str]]) -> Optional[List[str]]:
+    if not values:
+        return None
+    return [value.strip() for item in values for value in item.split(",") if value.strip()]
+
 @app.get("/search/jobs-for-applicant/{applicant_id}", response_model=List[schemas.MatchResult])
-def search_jobs_for_applicant(
+async def search_jobs_for_applicant(
     applicant_id: str,
+    response: Response,
     limit: int = 5,
-    db: Session = Depends(get_db)
+    mode: str = Query("vector", pattern="^(vector|hybrid)$"),
+    filters: schemas.SearchFilters = Depends(search_filters),
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Verify applicant exists
-    db_applicant = crud.get_applicant(db, applicant_id=applicant_id)
+    db_applicant = await crud.aget_applicant(db, applicant_id=applicant_id)
     if db_applicant is None:
         raise HTTPException(status_code=404, detail="Applicant not found")
     
-    # Search for matching jobs
-    matches = pipelines.search_jobs_for_applicant(applicant_id, top_k=limit)
-    return matches
+    # Plain vector searches are answered from the stored top matches when they're fresh
+    if mode == "vector" and pipelines.build_job_filter(filters) is None:
+        stored = await matches.aget_stored_matches(db, "applicant", db_applicant, limit)
+        if stored is not None:
+            return _stored_matches_response(response, *stored)
+    
+    # Search for matching jobs on the vector DB pool, not the shared threadpool
+    results = await limits.vector_db.run(
+        pipelines.search_jobs_for_applicant, applicant_id, top_k=limit, filters=filters, mode=mode
+    )
+    response.headers["X-Matches-Source"] = "live"
+    return results
 
 @app.get("/search/applicants-for-job/{job_id}", response_model=List[schemas.MatchResult])
-def search_applicants_for_job(
+async def search_applicants_for_job(
     job_id: str,
+    response: Response,
     limit: int = 5,
-    db: Session = Depends(get_db)
+    mode: str = Query("vector", pattern="^(vector|hybrid)$"),
+    filters: schemas.SearchFilters = Depends(search_filters),
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Verify job exists
-    db_job = crud.get_job(db, job_id=job_id)
+    db_job = await crud.aget_job(db, job_id=job_id)
     if db_job is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    # Search for matching applicants
-    matches = pipelines.search_applicants_for_job(job_id, top_k=limit)
-    return matches
+    # Plain vector searches are answered from the stored top matches when they're fresh
+    if mode == "vector" and pipelines.build_applicant_filter(filters) is None:
+        stored = await matches.aget_stored_matches(db, "job", db_job, limit)
+        if stored is not None:
+            return _stored_matches_response(response, *stored)
+    
+    # Search for matching applicants on the vector DB pool, not the shared threadpool
+    results = await limits.vector_db.run(
+        pipelines.search_applicants_for_job, job_id, top_k=limit, filters=filters, mode=mode
+    )
+    response.headers["X-Matches-Source"] = "live"
+    return results
+
+@app.get("/search/text", response_model=List[schemas.TextSearchResult])
+async def search_text(
+    q: str = Query(..., min_length=1),
+    entity_type: str = Query("job", alias="type", pattern="^(job|applicant)$"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Keyword search in SQLite, without embedding the query or calling the vector DB
+    if db.get_bind().dialect.name != "sqlite":
+        raise HTTPException(status_code=501, detail="Text search needs SQLite FTS5")
+    rows = await crud.atext_search(db, entity_type, q, skip=skip, limit=limit)
+    return [
+        {
+            "id": row.id,
+            "type": entity_type,
+            "title": row.title or "",
+            "subtitle": row.subtitle,
+            "snippet": crud.highlight_snippet(row.snippet),
+            "score": -row.score  # bm25() is lower for better matches
+        }
+        for row in rows
+    ]
+
+def _stored_matches_response(response: Response, results: List[dict], updated_at: datetime) -> List[dict]:
+    response.headers["X-Matches-Source"] = "materialized"
+    response.headers["X-Matches-Updated-At"] = updated_at.isoformat()
+    return results
+
+@app.post("/search/batch/jobs-for-applicants")
+async def batch_match_jobs_for_applicants(
+    request: schemas.BatchMatchRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Resolve "all" now; the session is closed before the response streams
+    applicant_ids = request.applicant_ids
+    if applicant_ids == "all":
+        applicant_ids = await crud.aget_applicant_ids(db)
+    job_ids = request.job_ids
+    if job_ids == "all":
+        job_ids = await crud.aget_job_ids(db)
+    
+    # One JSON line per applicant: {"applicantId": ..., "matches": [MatchResult, ...]}
+    results = pipelines.match_jobs_for_applicants(
+        applicant_ids, job_ids, top_k=request.limit, filters=request.filters
+    )
+    return StreamingResponse(
+        (json.dumps(result) + "\n" for result in results),
+        media_type="application/x-ndjson"
+    )
 
 # Comparison endpoints
+# Declared before /compare/{applicant_id_a}/{applicant_id_b}, which would otherwise match it
+@app.get("/compare/heatmap/{applicant_id}", response_model=List[schemas.HeatmapData])
+def get_comparison_heatmap(
+    applicant_id: str,
+    peer_ids: List[str] = Query(...),
+    db: Session = Depends(get_db)
+):
+    # Verify applicant exists
+    db_applicant = crud.get_applicant(db, applicant_id=applicant_id)
+    if db_applicant is None:
+        raise HTTPException(status_code=404, detail="Applicant not found")
+    
+    # Generate heatmap data
+    heatmap_data = pipelines.generate_comparison_heatmap(applicant_id, _split_values(peer_ids) or [])
+    return heatmap_data
+
 @app.get("/compare/{applicant_id_a}/{applicant_id_b}", response_model=schemas.ComparisonResult)
 def compare_applicants(
     applicant_id_a: str,
@@ -188,32 +532,51 @@ def compare_applicants(
     if db_applicant_b is None:
         raise HTTPException(status_code=404, detail="Second applicant not found")
     
+    # Serve a stored comparison unless either applicant changed after it was made
+    valid_after = max(db_applicant_a.updated_at, db_applicant_b.updated_at)
+    db_comparison = crud.get_latest_comparison(
+        db, applicant_id_a, applicant_id_b, created_after=valid_after
+    )
+    if db_comparison is not None:
+        return _comparison_response(db_comparison)
+    
+    # Concurrent identical requests share one computation
+    comparison = comparison_flight.do(
+        (applicant_id_a, applicant_id_b),
+        _compute_comparison, db, applicant_id_a, applicant_id_b
+    )
+    
+    if "error" in comparison:
+        raise HTTPException(status_code=404, detail=comparison["error"])
+    
+    return comparison
+
+comparison_flight = SingleFlight()
+
+def _compute_comparison(db: Session, applicant_id_a: str, applicant_id_b: str):
     # Compare applicants
     comparison = pipelines.compare_applicants(applicant_id_a, applicant_id_b)
     
     # Save comparison to database
     if "error" not in comparison:
-        db_comparison = crud.create_comparison(
+        crud.create_comparison(
             db, 
-            schemas.ComparisonResultCreate(**comparison)
+            schemas.ComparisonResultCreate(**comparison),
+            comparison_id=comparison["id"]
         )
     
     return comparison
 
-@app.get("/compare/heatmap/{applicant_id}", response_model=List[schemas.HeatmapData])
-def get_comparison_heatmap(
-    applicant_id: str,
-    peer_ids: List[str],
-    db: Session = Depends(get_db)
-):
-    # Verify applicant exists
-    db_applicant = crud.get_applicant(db, applicant_id=applicant_id)
-    if db_applicant is None:
-        raise HTTPException(status_code=404, detail="Applicant not found")
-    
-    # Generate heatmap data
-    heatmap_data = pipelines.generate_comparison_heatmap(applicant_id, peer_ids)
-    return heatmap_data
+def _comparison_response(db_comparison: models.ComparisonResult):
+    return {
+        "id": db_comparison.id,
+        "userId": db_comparison.user_id,
+        "peerId": db_comparison.peer_id,
+        "similarityScore": db_comparison.similarity_score,
+        "skillGaps": db_comparison.skill_gaps or [],
+        "recommendations": db_comparison.recommendations or [],
+        "createdAt": db_comparison.created_at.isoformat()
+    }
 
 # RAG endpoints
 @app.get("/rag/job/{job_id}", response_model=schemas.RAGSummary)
@@ -226,8 +589,8 @@ def get_job_rag_summary(
     if db_job is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    # Generate RAG summary
-    summary = pipelines.generate_job_rag_summary(job_id)
+    # Serve the stored summary, generating it if missing or stale
+    summary = summaries.get_job_summary(db, pipelines.job_data_from_model(db_job))
     return summary
 
 @app.get("/rag/applicant/{applicant_id}", response_model=schemas.RAGSummary)
@@ -240,10 +603,15 @@ def get_applicant_rag_summary(
     if db_applicant is None:
         raise HTTPException(status_code=404, detail="Applicant not found")
     
-    # Generate RAG summary
-    summary = pipelines.generate_applicant_rag_summary(applicant_id)
+    # Serve the stored summary, generating it if missing or stale
+    summary = summaries.get_applicant_summary(db, pipelines.applicant_data_from_model(db_applicant))
     return summary
 
+# Monitoring endpoints
+@app.get("/metrics/cache")
+def get_cache_metrics():
+    return cache_stats()
+
 # Run the server with: uvicorn main:app --reload
 if __name__ == "__main__":
     import uvicorn
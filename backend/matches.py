@@ -0,0 +1,176 @@
+import os
+import heapq
+import numpy as np
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import crud, pipelines
+from .clients import fetch_many
+from .matching import MATCH_CANDIDATE_TILE, normalize_rows
+
+# Materialized matches: the top MATCHES_TOP_K applicants per job and jobs per
+# applicant are kept in the matches table. When an entity is (re-)embedded its
+# own list is rebuilt with one vector query, and it is merged into every list
+# on the other side whose lowest score it beats. Top-K isn't symmetric (a job
+# can belong in an applicant's list without the applicant being anywhere near
+# the top of the job's), so that takes scoring it against all of those lists'
+# owners, not just its own nearest neighbours.
+MATCHES_TOP_K = int(os.getenv("MATCHES_TOP_K", "50"))
+
+SIDES = {
+    "job": {
+        "index": pipelines.JOBS_INDEX,
+        "namespace": "jobs",
+        "other": "applicant",
+        "get_many": crud.get_jobs_by_ids,
+        "aget_many": crud.aget_jobs_by_ids,
+        "result": lambda row, score: pipelines.job_match_result(
+            row.id, score, pipelines.build_job_metadata(pipelines.job_data_from_model(row))
+        ),
+    },
+    "applicant": {
+        "index": pipelines.APPS_INDEX,
+        "namespace": "applicants",
+        "other": "job",
+        "get_many": crud.get_applicants_by_ids,
+        "aget_many": crud.aget_applicants_by_ids,
+        "result": lambda row, score: pipelines.applicant_match_result(
+            row.id, score, pipelines.build_applicant_metadata(pipelines.applicant_data_from_model(row))
+        ),
+    },
+}
+
+def _query_other_side(entity_type: str, vector: Any, top_k: int):
+    other = SIDES[SIDES[entity_type]["other"]]
+    return pipelines.vector_store.query(other["index"], vector=vector, top_k=top_k, namespace=other["namespace"])
+
+def update_matches(db: Session, entity_type: str, ids: List[str]):
+    """Refresh materialized matches after the given entities were upserted to the vector store.
+
+    Each entity's own list is rebuilt, and the entity is merged into the
+    existing lists on the other side that it now belongs in. Lists that
+    already ranked one of these entities hold a score from its old vector,
+    so those are rebuilt in full. The affected lists are read in one query,
+    merged in memory and written back with one statement per kind of change,
+    all committed together.
+    """
+    side = SIDES[entity_type]
+    other_type = side["other"]
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        return
+
+    try:
+        records = fetch_many(side["index"], ids, side["namespace"])
+        stale_owners = crud.get_match_list_owners(db, other_type, list(records))
+
+        crud.replace_match_lists(db, entity_type, {
+            id: [(match.id, match.score) for match in _query_other_side(entity_type, record.values, MATCHES_TOP_K)]
+            for id, record in records.items()
+        }, commit=False)
+
+        # Rebuild lists that held old scores for these entities
+        if stale_owners:
+            other = SIDES[other_type]
+            owner_records = fetch_many(other["index"], sorted(stale_owners), other["namespace"])
+            crud.replace_match_lists(db, other_type, {
+                owner_id: [(match.id, match.score) for match in _query_other_side(other_type, record.values, MATCHES_TOP_K)]
+                for owner_id, record in owner_records.items()
+            }, commit=False)
+
+        # Merge into the remaining lists and trim them back to MATCHES_TOP_K
+        floors = crud.get_match_list_floors(db, other_type)
+        for owner_id in stale_owners:
+            floors.pop(owner_id, None)
+        candidates = _list_candidates(other_type, floors, records)
+        added, removed = _merge_entries(crud.get_match_list_entries(db, other_type, list(candidates)), candidates)
+        crud.merge_match_lists(db, other_type, added, removed, commit=False)
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+def _list_candidates(
+    owner_type: str,
+    floors: Dict[str, Tuple[int, Optional[float]]],
+    records: Dict[str, Any]
+) -> Dict[str, Dict[str, float]]:
+    """Owner id -> {entity id: score} for the entities that score above the
+    lowest entry of each owner's list, or anything for lists not yet full.
+
+    Owners are fetched and scored against all the entities MATCH_CANDIDATE_TILE
+    at a time, so memory stays at one tile of vectors and scores.
+    """
+    owner = SIDES[owner_type]
+    entity_ids = list(records)
+    entities = normalize_rows([records[id].values for id in entity_ids])
+    owner_ids = list(floors)
+    candidates: Dict[str, Dict[str, float]] = {}
+    for start in range(0, len(owner_ids), MATCH_CANDIDATE_TILE):
+        tile = fetch_many(owner["index"], owner_ids[start:start + MATCH_CANDIDATE_TILE], owner["namespace"])
+        tile_ids = list(tile)
+        if not tile_ids:
+            continue
+        scores = normalize_rows([tile[id].values for id in tile_ids]) @ entities.T
+        lowest = np.array([
+            floors[id][1] if floors[id][0] >= MATCHES_TOP_K else -np.inf for id in tile_ids
+        ], dtype=np.float32)
+        for row, col in zip(*np.nonzero(scores > lowest[:, None])):
+            candidates.setdefault(tile_ids[row], {})[entity_ids[col]] = float(scores[row, col])
+    return candidates
+
+def _merge_entries(
+    lists: Dict[str, Dict[str, float]],
+    candidates: Dict[str, Dict[str, float]]
+) -> Tuple[List[Tuple[str, str, float]], List[Tuple[str, str]]]:
+    """Merge candidate scores into existing lists, keeping the top MATCHES_TOP_K of each.
+
+    Returns the (owner, match, score) entries that made the cut and the
+    (owner, match) entries pushed out.
+    """
+    added, removed = [], []
+    for owner_id, entries in lists.items():
+        new_entries = candidates.get(owner_id, {})
+        kept = dict(heapq.nlargest(MATCHES_TOP_K, {**entries, **new_entries}.items(), key=lambda entry: entry[1]))
+        added.extend((owner_id, id, score) for id, score in new_entries.items() if id in kept)
+        removed.extend((owner_id, match_id) for match_id in entries if match_id not in kept)
+    return added, removed
+
+def get_stored_matches(db: Session, entity_type: str, db_entity: Any, limit: int) -> Optional[Tuple[List[Dict[str, Any]], datetime]]:
+    """Top stored matches for an entity and when its list last changed.
+
+    Returns None when the stored list can't answer: it doesn't exist, was
+    computed before the entity's last update, or limit exceeds MATCHES_TOP_K.
+    """
+    if limit > MATCHES_TOP_K:
+        return None
+    match_list = crud.get_match_list(db, entity_type, db_entity.id)
+    if not _is_current(match_list, db_entity):
+        return None
+
+    rows = crud.get_matches(db, entity_type, db_entity.id, limit)
+    side = SIDES[SIDES[entity_type]["other"]]
+    others = side["get_many"](db, [row.match_id for row in rows])
+    return _stored_results(side, rows, others), match_list.updated_at
+
+async def aget_stored_matches(db: AsyncSession, entity_type: str, db_entity: Any, limit: int) -> Optional[Tuple[List[Dict[str, Any]], datetime]]:
+    """Async version of get_stored_matches."""
+    if limit > MATCHES_TOP_K:
+        return None
+    match_list = await crud.aget_match_list(db, entity_type, db_entity.id)
+    if not _is_current(match_list, db_entity):
+        return None
+
+    rows = await crud.aget_matches(db, entity_type, db_entity.id, limit)
+    side = SIDES[SIDES[entity_type]["other"]]
+    others = await side["aget_many"](db, [row.match_id for row in rows])
+    return _stored_results(side, rows, others), match_list.updated_at
+
+def _is_current(match_list: Any, db_entity: Any) -> bool:
+    return match_list is not None and not (db_entity.updated_at and db_entity.updated_at > match_list.computed_at)
+
+def _stored_results(side: Dict[str, Any], rows: List[Any], others: List[Any]) -> List[Dict[str, Any]]:
+    others_by_id = {row.id: row for row in others}
+    return [side["result"](others_by_id[row.match_id], row.score) for row in rows if row.match_id in others_by_id]
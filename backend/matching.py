@@ -0,0 +1,52 @@
+import os
+import numpy as np
+from typing import Any, List, Tuple
+from .vector_store import EMBEDDING_DIMENSION
+
+# Tile sizes for batch matching. Each step scores MATCH_QUERY_TILE queries
+# against MATCH_CANDIDATE_TILE candidates, i.e. a float32 score block of
+# 1024 x 8192 (32MB) with the defaults.
+MATCH_QUERY_TILE = int(os.getenv("MATCH_QUERY_TILE", "1024"))
+MATCH_CANDIDATE_TILE = int(os.getenv("MATCH_CANDIDATE_TILE", "8192"))
+
+def normalize_rows(vectors: List[Any]) -> np.ndarray:
+    """Stack vectors into a float32 matrix with unit-length rows."""
+    if len(vectors) == 0:
+        return np.zeros((0, EMBEDDING_DIMENSION), dtype=np.float32)
+    matrix = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+def tiled_top_k(
+    queries: np.ndarray,
+    candidates: np.ndarray,
+    k: int,
+    tile_rows: int = MATCH_CANDIDATE_TILE
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Top-k candidates by dot product for each query row.
+
+    Candidates are scored tile_rows at a time; each tile's top-k is merged
+    into a running top-k, so memory stays at queries x tile_rows scores.
+    Returns (indices, scores), both shaped (queries, k) and sorted best first.
+    """
+    k = min(k, len(candidates))
+    if k <= 0 or len(queries) == 0:
+        return np.zeros((len(queries), 0), dtype=np.intp), np.zeros((len(queries), 0), dtype=np.float32)
+
+    best_indices = np.zeros((len(queries), 0), dtype=np.intp)
+    best_scores = np.zeros((len(queries), 0), dtype=np.float32)
+    for start in range(0, len(candidates), tile_rows):
+        scores = queries @ candidates[start:start + tile_rows].T
+        tile_k = min(k, scores.shape[1])
+        top = np.argpartition(-scores, tile_k - 1, axis=1)[:, :tile_k]
+        best_indices = np.concatenate([best_indices, top + start], axis=1)
+        best_scores = np.concatenate([best_scores, np.take_along_axis(scores, top, axis=1)], axis=1)
+
+        if best_indices.shape[1] > k:
+            keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+            best_indices = np.take_along_axis(best_indices, keep, axis=1)
+            best_scores = np.take_along_axis(best_scores, keep, axis=1)
+
+    order = np.argsort(-best_scores, axis=1)
+    return np.take_along_axis(best_indices, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
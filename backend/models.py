@@ -1,7 +1,8 @@
 
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Text, JSON, Float, DateTime
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Text, JSON, Float, DateTime, Index, inspect, text
 from sqlalchemy.orm import relationship
 import datetime
+from typing import Dict, List
 from .database import Base
 
 class Job(Base):
@@ -26,6 +27,9 @@ class Job(Base):
     
     # Vector embeddings are stored in Pinecone, not in SQLite
 
+    # Listing order and keyset pagination
+    __table_args__ = (Index("ix_jobs_created_at_id", "created_at", "id"),)
+
 class Applicant(Base):
     __tablename__ = "applicants"
 
@@ -47,6 +51,9 @@ class Applicant(Base):
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
 
+    # Listing order and keyset pagination
+    __table_args__ = (Index("ix_applicants_created_at_id", "created_at", "id"),)
+
 class ComparisonResult(Base):
     __tablename__ = "comparison_results"
 
@@ -57,3 +64,188 @@ class ComparisonResult(Base):
     skill_gaps = Column(JSON)  # Store as JSON array
     recommendations = Column(JSON)  # Store as JSON array
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_comparison_results_user_peer", "user_id", "peer_id"),
+    )
+
+class RAGSummary(Base):
+    __tablename__ = "rag_summaries"
+
+    entity_id = Column(String, primary_key=True, index=True)
+    entity_type = Column(String)  # "job" or "applicant"
+    metadata_hash = Column(String)  # Hash of the metadata the summary was generated from
+    summary = Column(Text)
+    insights = Column(JSON)  # Store as JSON array
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class IngestBatch(Base):
+    __tablename__ = "ingest_batches"
+
+    id = Column(String, primary_key=True, index=True)
+    kind = Column(String)  # "job" or "applicant"
+    status = Column(String, default="running")  # running, completed or failed
+    total = Column(Integer, default=0)
+    succeeded = Column(Integer, default=0)
+    failed = Column(Integer, default=0)
+    errors = Column(JSON)  # Store as JSON array of {"file", "error"}
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+class MatchList(Base):
+    __tablename__ = "match_lists"
+
+    # One row per materialized top-K list. computed_at is when the list was last
+    # rebuilt from the entity's own vector; updated_at also moves when other
+    # entities are merged into it.
+    entity_type = Column(String, primary_key=True)  # "job" or "applicant"
+    entity_id = Column(String, primary_key=True)
+    computed_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class Match(Base):
+    __tablename__ = "matches"
+
+    # A row is one entry in the top-K list of (entity_type, entity_id);
+    # match_id is on the other side (an applicant for a job list, and vice versa)
+    entity_type = Column(String, primary_key=True)
+    entity_id = Column(String, primary_key=True)
+    match_id = Column(String, primary_key=True)
+    score = Column(Float)
+
+    __table_args__ = (
+        Index("ix_matches_entity_score", "entity_type", "entity_id", "score"),
+        Index("ix_matches_match", "entity_type", "match_id"),
+    )
+
+class Migration(Base):
+    __tablename__ = "migrations"
+
+    # Data migrations that have completed, so startup doesn't run them again
+    name = Column(String, primary_key=True)
+    completed_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class Skill(Base):
+    __tablename__ = "skills"
+
+    # Canonical skill dictionary: name is lower-cased with whitespace collapsed,
+    # display_name is the first spelling seen
+    id = Column(Integer, primary_key=True)
+    name = Column(String, unique=True, nullable=False)
+    display_name = Column(String)
+
+class JobKeyword(Base):
+    __tablename__ = "job_keywords"
+
+    # Normalized Job.keywords, one row per (job, skill)
+    job_id = Column(String, primary_key=True)
+    skill_id = Column(Integer, ForeignKey("skills.id"), primary_key=True)
+
+    __table_args__ = (Index("ix_job_keywords_skill", "skill_id", "job_id"),)
+
+class ApplicantSkill(Base):
+    __tablename__ = "applicant_skills"
+
+    # Normalized skills from Applicant.work_experience, one row per (applicant, skill)
+    applicant_id = Column(String, primary_key=True)
+    skill_id = Column(Integer, ForeignKey("skills.id"), primary_key=True)
+
+    __table_args__ = (Index("ix_applicant_skills_skill", "skill_id", "applicant_id"),)
+
+def create_missing_indexes(bind):
+    """Create declared indexes that are missing from tables created by an older version.
+
+    create_all() skips tables that already exist, including any index added to them since.
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+
+# Full-text search. jobs_fts and applicants_fts are FTS5 tables kept in step
+# with jobs and applicants by triggers on every insert, update and delete,
+# including bulk and upsert writes. Applicants are searchable by their work
+# experience titles and descriptions, which are pulled out of the JSON column
+# by the triggers.
+#
+# FTS rows are keyed on the source row's id. The implicit rowid of a table with
+# a string primary key can be renumbered by VACUUM, so each id gets a fixed
+# FTS rowid from a <table>_fts_keys table, whose INTEGER PRIMARY KEY can't be.
+TEXT_SEARCH_TOKENIZER = "porter unicode61 remove_diacritics 2"
+
+_APPLICANT_EXPERIENCE = """(
+    SELECT group_concat(json_extract(experience.value, '$.title') || ' ' || json_extract(experience.value, '$.description'), ' ')
+    FROM json_each({row}.work_experience) AS experience
+)"""
+
+def _text_search_ddl(source: str, columns: Dict[str, str], watched: List[str]) -> List[str]:
+    """DDL for the FTS table over source, then statements indexing its existing rows.
+
+    columns maps each FTS column to the SQL for its value, with {row} standing
+    for the source row; updates to the watched source columns reindex a row.
+    Every statement can be run again safely.
+    """
+    table, keys = f"{source}_fts", f"{source}_fts_keys"
+    names = ", ".join(["id", *columns])
+
+    def values(row):
+        return ", ".join([f"{row}.id", *(value.format(row=row) for value in columns.values())])
+
+    def key_of(row):
+        return f"(SELECT key FROM {keys} WHERE id = {row}.id)"
+
+    return [
+        f"CREATE TABLE IF NOT EXISTS {keys} (key INTEGER PRIMARY KEY, id VARCHAR NOT NULL UNIQUE)",
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5(
+            id UNINDEXED, {", ".join(columns)}, tokenize = '{TEXT_SEARCH_TOKENIZER}'
+        )""",
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_insert AFTER INSERT ON {source} BEGIN
+            INSERT OR IGNORE INTO {keys} (id) VALUES (new.id);
+            INSERT INTO {table} (rowid, {names}) VALUES ({key_of("new")}, {values("new")});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_update AFTER UPDATE OF {", ".join(["id", *watched])} ON {source} BEGIN
+            DELETE FROM {table} WHERE rowid = {key_of("old")};
+            UPDATE {keys} SET id = new.id WHERE id = old.id;
+            INSERT INTO {table} (rowid, {names}) VALUES ({key_of("new")}, {values("new")});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_delete AFTER DELETE ON {source} BEGIN
+            DELETE FROM {table} WHERE rowid = {key_of("old")};
+            DELETE FROM {keys} WHERE id = old.id;
+        END""",
+        # Index rows that have no FTS row yet
+        f"INSERT OR IGNORE INTO {keys} (id) SELECT id FROM {source}",
+        f"""INSERT INTO {table} (rowid, {names})
+            SELECT {keys}.key, {values(source)}
+            FROM {source} JOIN {keys} ON {keys}.id = {source}.id
+            WHERE {keys}.key NOT IN (SELECT rowid FROM {table})""",
+    ]
+TEXT_SEARCH_DDL = {
+    "jobs_fts": _text_search_ddl(
+        "jobs",
+        {"title": "{row}.title", "company": "{row}.company", "description": "{row}.description"},
+        ["title", "company", "description"]
+    ),
+    "applicants_fts": _text_search_ddl(
+        "applicants",
+        {
+            "name": "{row}.name",
+            "last_position": "{row}.last_position",
+            "personal_statement": "{row}.personal_statement",
+            "experience": _APPLICANT_EXPERIENCE
+        },
+        ["name", "last_position", "personal_statement", "work_experience"]
+    ),
+}
+
+def create_text_search_tables(bind):
+    """Create the FTS5 tables and their triggers, indexing existing rows, if they don't exist yet.
+
+    Only SQLite has FTS5; other databases are left alone.
+    """
+    if bind.dialect.name != "sqlite":
+        return
+    existing = set(inspect(bind).get_table_names())
+    with bind.begin() as connection:
+        for table, statements in TEXT_SEARCH_DDL.items():
+            if table not in existing or f"{table}_keys" not in existing:
+                for statement in statements:
+                    connection.execute(text(statement))
@@ -1,52 +1,93 @@
 import os
 import json
-import fitz  # PyMuPDF for PDF processing
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterator, List, Any, Optional, Tuple, Union
 from datetime import datetime
-from pinecone import Pinecone, ServerlessSpec
-from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
-from langchain_community.vectorstores import Pinecone as LangchainPinecone
-from langchain.docstore.document import Document
+import copy
+import heapq
 import uuid
 import numpy as np
+from fastapi.concurrency import run_in_threadpool
+from .vector_store import get_vector_store, matches_filter, QueryMatch
+from .clients import get_llm, get_embeddings, fetch_many, upsert_many, EMBEDDING_MODEL
+from .matching import MATCH_CANDIDATE_TILE, MATCH_QUERY_TILE, normalize_rows, tiled_top_k
+from .lexical_index import get_lexical_index
+from .cache import TieredCache, content_hash
+from . import concurrency as limits
+from .extraction import pdf_extractor
+from .skill_matrix import build_skill_matrix, heatmap_cells, parse_skills, rank_skills
+from .schemas import SearchFilters
 
-# Setup API keys from environment
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
-PINECONE_ENVIRONMENT = os.getenv("PINECONE_ENVIRONMENT", "us-west4-gcp")
+# Vector index names
+JOBS_INDEX = "jobs-index"
+APPS_INDEX = "apps-index"
 
-# Initialize Pinecone
-pc = Pinecone(api_key=PINECONE_API_KEY)
+# Initialize vector store (Pinecone or local, see VECTOR_STORE_BACKEND)
+vector_store = get_vector_store()
 
-# Initialize LLM and embeddings
-llm = ChatGoogleGenerativeAI(model="gemini-1.5-flash", google_api_key=GOOGLE_API_KEY, temperature=0)
-embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001", google_api_key=GOOGLE_API_KEY)
+# Local BM25 indexes for keyword search, kept in step with the vector upserts
+job_lexical_index = get_lexical_index("jobs")
+applicant_lexical_index = get_lexical_index("applicants")
+
+# Embedding cache sizes
+EMBEDDING_CACHE_ENTRIES = int(os.getenv("EMBEDDING_CACHE_ENTRIES", "10000"))
+EMBEDDING_CACHE_MAX_MB = int(os.getenv("EMBEDDING_CACHE_MAX_MB", "512"))
+
+# Parse cache configuration. Bump a prompt version whenever its prompt changes
+# so results produced by the old prompt are no longer served.
+JOB_PROMPT_VERSION = "1"
+RESUME_PROMPT_VERSION = "1"
+RESUME_TEXT_LIMIT = 4000
+PARSE_CACHE_TTL_SECONDS = int(os.getenv("PARSE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+PARSE_CACHE_ENTRIES = int(os.getenv("PARSE_CACHE_ENTRIES", "1000"))
+PARSE_CACHE_MAX_MB = int(os.getenv("PARSE_CACHE_MAX_MB", "64"))
+
+# Embeddings keyed by (model, canonical text), so unchanged entities are never re-embedded
+embedding_cache = TieredCache(
+    "embeddings",
+    max_entries=EMBEDDING_CACHE_ENTRIES,
+    max_bytes=EMBEDDING_CACHE_MAX_MB * 1024 * 1024,
+    serialize=lambda vector: np.asarray(vector, dtype=np.float32).tobytes(),
+    deserialize=lambda raw: np.frombuffer(raw, dtype=np.float32)
+)
+
+# Parsed documents keyed by (prompt version, input text), without their generated id
+parse_cache = TieredCache(
+    "parses",
+    max_entries=PARSE_CACHE_ENTRIES,
+    max_bytes=PARSE_CACHE_MAX_MB * 1024 * 1024,
+    serialize=lambda result: json.dumps(result).encode("utf-8"),
+    deserialize=lambda raw: json.loads(raw),
+    ttl=PARSE_CACHE_TTL_SECONDS
+)
+
+def _response_text(response: Any) -> str:
+    """Extract the JSON text from a chat model response."""
+    text = getattr(response, "content", response).strip()
+    # Gemini tends to wrap JSON in a markdown code fence
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text.rsplit("```", 1)[0]
+    return text
 
 # Ensure indexes exist
-def ensure_pinecone_indexes():
-    """Create Pinecone indexes if they don't exist."""
-    current_indexes = [index.name for index in pc.list_indexes()]
-    
-    if "jobs-index" not in current_indexes:
-        pc.create_index(
-            name="jobs-index",
-            dimension=768,  # Dimension of the embedding model
-            metric="cosine",
-            spec=ServerlessSpec(cloud="aws", region="us-east-1")
-        )
-    
-    if "apps-index" not in current_indexes:
-        pc.create_index(
-            name="apps-index",
-            dimension=768,  # Dimension of the embedding model
-            metric="cosine",
-            spec=ServerlessSpec(cloud="aws", region="us-east-1")
-        )
+def ensure_vector_indexes():
+    """Create vector indexes if they don't exist."""
+    vector_store.ensure_index(JOBS_INDEX, dimension=768)  # Dimension of the embedding model
+    vector_store.ensure_index(APPS_INDEX, dimension=768)
+
+def index_jobs_lexical(jobs: List[Dict[str, Any]]):
+    """Add jobs to the keyword index, replacing earlier versions."""
+    job_lexical_index.upsert([(job_data["id"], build_job_lexical_text(job_data)) for job_data in jobs])
+
+def index_applicants_lexical(applicants: List[Dict[str, Any]]):
+    """Add applicants to the keyword index, replacing earlier versions."""
+    applicant_lexical_index.upsert(
+        [(applicant_data["id"], build_applicant_lexical_text(applicant_data)) for applicant_data in applicants]
+    )
 
 # Document parsing
-def parse_job_description(text: str) -> Dict[str, Any]:
-    """Parse job description text using LLM."""
-    prompt = f"""
+def _job_prompt(text: str) -> str:
+    return f"""
     Extract the following information from this job description in JSON format:
     
     - title (string): The job title
@@ -67,13 +108,14 @@ def parse_job_description(text: str) -> Dict[str, Any]:
     
     Respond with ONLY the JSON object with no additional text.
     """
-    
-    response = llm.invoke(prompt)
+
+def _parse_job_response(text: str, response: Any, cache_key: str) -> Dict[str, Any]:
+    """Turn the LLM response into a job dict, caching it if it parsed."""
     try:
-        result = json.loads(response)
+        result = json.loads(_response_text(response))
+        parse_cache.set(cache_key, result)
         # Add default ID
-        result["id"] = f"job-{uuid.uuid4()}"
-        return result
+        return {**copy.deepcopy(result), "id": f"job-{uuid.uuid4()}"}
     except json.JSONDecodeError:
         # Fallback with minimal info if parsing fails
         return {
@@ -92,19 +134,50 @@ def parse_job_description(text: str) -> Dict[str, Any]:
             "recruiterName": "Recruitment Team"
         }
 
-def parse_resume(pdf_path: str) -> Dict[str, Any]:
-    """Extract text from PDF and parse resume using LLM."""
-    # Extract text from PDF
-    text = ""
-    try:
-        doc = fitz.open(pdf_path)
-        for page in doc:
-            text += page.get_text()
-    except Exception as e:
-        return {"error": f"Failed to extract text from PDF: {str(e)}"}
+def _cached_parse(cache_key: str, id_prefix: str) -> Optional[Dict[str, Any]]:
+    """Copy of a cached parse with a fresh id, or None."""
+    cached = parse_cache.get(cache_key)
+    if cached is None:
+        return None
+    return {**copy.deepcopy(cached), "id": f"{id_prefix}-{uuid.uuid4()}"}
+
+def parse_job_description(text: str) -> Dict[str, Any]:
+    """Parse job description text using LLM."""
+    return parse_job_description_cached(text)[0]
+
+def parse_job_description_cached(text: str) -> Tuple[Dict[str, Any], bool]:
+    """Parse job description text, reusing an earlier parse of the same text.
+
+    Returns the parsed job and whether it was served from the parse cache.
+    """
+    cache_key = content_hash("job", JOB_PROMPT_VERSION, text)
+    cached = _cached_parse(cache_key, "job")
+    if cached is not None:
+        return cached, True
     
-    # Parse resume with LLM
-    prompt = f"""
+    response = get_llm().invoke(_job_prompt(text))
+    return _parse_job_response(text, response, cache_key), False
+
+async def aparse_job_description_cached(text: str) -> Tuple[Dict[str, Any], bool]:
+    """Async parse_job_description_cached, bounded by the LLM concurrency limit.
+
+    The parse cache's disk tier is SQLite, so it's read and written off the event loop.
+    """
+    cache_key = content_hash("job", JOB_PROMPT_VERSION, text)
+    cached = await run_in_threadpool(_cached_parse, cache_key, "job")
+    if cached is not None:
+        return cached, True
+    
+    async with limits.llm:
+        response = await get_llm().ainvoke(_job_prompt(text))
+    return await run_in_threadpool(_parse_job_response, text, response, cache_key), False
+
+def extract_pdf_text(pdf: Union[str, bytes]) -> str:
+    """Extract the text a resume prompt uses from a PDF path or in-memory bytes."""
+    return pdf_extractor.extract(pdf, max_chars=RESUME_TEXT_LIMIT)
+
+def _resume_prompt(text: str) -> str:
+    return f"""
     Extract the following information from this resume in JSON format:
     
     - name (string): Full name of the applicant
@@ -138,17 +211,18 @@ def parse_resume(pdf_path: str) -> Dict[str, Any]:
         - technologies (array of strings): Technologies used
     
     Resume text:
-    {text[:4000]}  # Limit text length to avoid token limits
+    {text[:RESUME_TEXT_LIMIT]}  # Limit text length to avoid token limits
     
     Respond with ONLY the JSON object with no additional text.
     """
-    
-    response = llm.invoke(prompt)
+
+def _parse_resume_response(text: str, response: Any, cache_key: str) -> Dict[str, Any]:
+    """Turn the LLM response into an applicant dict, caching it if it parsed."""
     try:
-        result = json.loads(response)
+        result = json.loads(_response_text(response))
+        parse_cache.set(cache_key, result)
         # Add default ID
-        result["id"] = f"applicant-{uuid.uuid4()}"
-        return result
+        return {**copy.deepcopy(result), "id": f"applicant-{uuid.uuid4()}"}
     except json.JSONDecodeError:
         # Fallback with minimal info if parsing fails
         return {
@@ -165,11 +239,96 @@ def parse_resume(pdf_path: str) -> Dict[str, Any]:
             "lastPositionLevel": "Not Specified",
         }
 
+def parse_resume(pdf_path: Union[str, bytes]) -> Dict[str, Any]:
+    """Extract text from PDF and parse resume using LLM."""
+    return parse_resume_cached(pdf_path)[0]
+
+def parse_resume_cached(pdf: Union[str, bytes]) -> Tuple[Dict[str, Any], bool]:
+    """Extract text from a PDF path or bytes and parse it, reusing an earlier parse of the same text.
+
+    Returns the parsed applicant and whether it was served from the parse cache.
+    """
+    # Extract text from PDF
+    try:
+        text = extract_pdf_text(pdf)
+    except Exception as e:
+        return {"error": f"Failed to extract text from PDF: {str(e)}"}, False
+    
+    cache_key = content_hash("resume", RESUME_PROMPT_VERSION, text[:RESUME_TEXT_LIMIT])
+    cached = _cached_parse(cache_key, "applicant")
+    if cached is not None:
+        return cached, True
+    
+    # Parse resume with LLM
+    response = get_llm().invoke(_resume_prompt(text))
+    return _parse_resume_response(text, response, cache_key), False
+
+async def aparse_resume_cached(pdf: Union[str, bytes]) -> Tuple[Dict[str, Any], bool]:
+    """Async parse_resume_cached; extraction runs in the PDF worker processes."""
+    # Extract text from PDF
+    try:
+        text = await pdf_extractor.aextract(pdf, max_chars=RESUME_TEXT_LIMIT)
+    except Exception as e:
+        return {"error": f"Failed to extract text from PDF: {str(e)}"}, False
+    
+    cache_key = content_hash("resume", RESUME_PROMPT_VERSION, text[:RESUME_TEXT_LIMIT])
+    cached = await run_in_threadpool(_cached_parse, cache_key, "applicant")
+    if cached is not None:
+        return cached, True
+    
+    # Parse resume with LLM
+    async with limits.llm:
+        response = await get_llm().ainvoke(_resume_prompt(text))
+    return await run_in_threadpool(_parse_resume_response, text, response, cache_key), False
+
 # Vector operations
-def upsert_job_embedding(job_data: Dict[str, Any]):
-    """Generate embedding for job and store in Pinecone."""
-    # Create document from job data
-    job_text = f"""
+def canonical_text(text: str) -> str:
+    """Strip template indentation and blank lines so equal content hashes equally."""
+    return "\n".join(line.strip() for line in text.strip().splitlines() if line.strip())
+
+def _cached_embeddings(texts: List[str]) -> Tuple[List[str], List[Any], Dict[str, str]]:
+    """Cache keys for texts, their cached vectors (None where missing), and
+    each distinct missing canonical text by key."""
+    texts = [canonical_text(text) for text in texts]
+    keys = [content_hash(EMBEDDING_MODEL, text) for text in texts]
+    vectors = [embedding_cache.get(key) for key in keys]
+    
+    missing = {}
+    for key, text, vector in zip(keys, texts, vectors):
+        if vector is None:
+            missing.setdefault(key, text)
+    return keys, vectors, missing
+
+def _merge_embeddings(keys: List[str], vectors: List[Any], new_vectors: Dict[str, Any]) -> List[Any]:
+    """Cache newly embedded vectors and fill them in where vectors has None."""
+    for key, vector in new_vectors.items():
+        embedding_cache.set(key, vector)
+    return [new_vectors[key] if vector is None else vector for key, vector in zip(keys, vectors)]
+
+def embed_texts(texts: List[str]) -> List[Any]:
+    """Embed texts, calling the embedding API only for texts not in the cache."""
+    keys, vectors, missing = _cached_embeddings(texts)
+    if not missing:
+        return vectors
+    
+    # Embed each distinct missing text once
+    new_embeds = get_embeddings().embed_documents(list(missing.values()))
+    return _merge_embeddings(keys, vectors, dict(zip(missing, new_embeds)))
+
+async def aembed_texts(texts: List[str]) -> List[Any]:
+    """Async embed_texts, bounded by the embedding concurrency limit. The cache
+    is read and written off the event loop."""
+    keys, vectors, missing = await run_in_threadpool(_cached_embeddings, texts)
+    if not missing:
+        return vectors
+    
+    async with limits.embeddings:
+        new_embeds = await get_embeddings().aembed_documents(list(missing.values()))
+    return await run_in_threadpool(_merge_embeddings, keys, vectors, dict(zip(missing, new_embeds)))
+
+def build_job_text(job_data: Dict[str, Any]) -> str:
+    """Build the text that is embedded for a job."""
+    return f"""
     Job Title: {job_data.get('title', '')}
     Company: {job_data.get('company', '')}
     Country: {job_data.get('country', '')}
@@ -179,43 +338,37 @@ def upsert_job_embedding(job_data: Dict[str, Any]):
     Keywords: {', '.join(job_data.get('keywords', []))}
     Description: {job_data.get('description', '')}
     """
-    
-    # Get embeddings for job
-    job_embed = embeddings.embed_query(job_text)
-    
-    # Connect to Pinecone index
-    index = pc.Index("jobs-index")
-    
-    # Create metadata
-    metadata = {
+
+def build_job_lexical_text(job_data: Dict[str, Any]) -> str:
+    """Build the text indexed for keyword search over jobs; keywords count twice."""
+    keywords = " ".join(job_data.get("keywords") or [])
+    return f"{job_data.get('title', '')} {keywords} {keywords} {job_data.get('description', '')}"
+
+def build_job_metadata(job_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the vector store metadata for a job."""
+    return {
         "id": job_data["id"],
         "title": job_data.get("title", ""),
         "company": job_data.get("company", ""),
-        "country": job_data.get("country", ""),
-        "min_years_experience": job_data.get("minYearsExperience", 0),
-        "min_education": job_data.get("minEducation", ""),
-        "position_level": job_data.get("positionLevel", ""),
-        "keywords": ",".join(job_data.get("keywords", [])),
+        "country": job_data.get("country") or "",
+        "min_years_experience": _as_number(job_data.get("minYearsExperience")),
+        "min_education": job_data.get("minEducation") or "",
+        "position_level": job_data.get("positionLevel") or "",
+        "sponsorship": bool(job_data.get("sponsorship")),
+        "keywords": list(job_data.get("keywords") or []),
         "type": "job"
     }
-    
-    # Upsert to Pinecone
-    index.upsert(
-        vectors=[(job_data["id"], job_embed, metadata)],
-        namespace="jobs"
-    )
-    
-    return job_data["id"]
 
-def upsert_applicant_embedding(applicant_data: Dict[str, Any]):
-    """Generate embedding for applicant and store in Pinecone."""
-    # Extract skills from work experience
+def _applicant_skills(applicant_data: Dict[str, Any]) -> List[str]:
+    """Collect the distinct skills from an applicant's work experience."""
     all_skills = []
     for exp in applicant_data.get("workExperience", []):
         all_skills.extend(exp.get("skills", []))
-    
-    # Create text representation
-    applicant_text = f"""
+    return sorted(set(all_skills))
+
+def build_applicant_text(applicant_data: Dict[str, Any]) -> str:
+    """Build the text that is embedded for an applicant."""
+    return f"""
     Name: {applicant_data.get('name', '')}
     Years of Experience: {applicant_data.get('yearsOfExperience', '')}
     Last Position: {applicant_data.get('lastPosition', '')}
@@ -224,143 +377,485 @@ def upsert_applicant_embedding(applicant_data: Dict[str, Any]):
     Country of Origin: {applicant_data.get('countryOfOrigin', '')}
     Education: {', '.join([f"{edu.get('degree', '')} in {edu.get('field', '')} from {edu.get('institution', '')}" 
                            for edu in applicant_data.get('education', [])])}
-    Skills: {', '.join(set(all_skills))}
+    Skills: {', '.join(_applicant_skills(applicant_data))}
     Statement: {applicant_data.get('personalStatement', '')}
     """
-    
-    # Get embeddings for applicant
-    applicant_embed = embeddings.embed_query(applicant_text)
-    
-    # Connect to Pinecone index
-    index = pc.Index("apps-index")
-    
-    # Create metadata
-    metadata = {
+
+def build_applicant_lexical_text(applicant_data: Dict[str, Any]) -> str:
+    """Build the text indexed for keyword search over applicants; skills count twice."""
+    skills = " ".join(_applicant_skills(applicant_data))
+    titles = " ".join(exp.get("title", "") for exp in applicant_data.get("workExperience") or [])
+    return f"{applicant_data.get('lastPosition', '')} {titles} {skills} {skills} {applicant_data.get('personalStatement', '')}"
+
+def build_applicant_metadata(applicant_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the vector store metadata for an applicant."""
+    return {
         "id": applicant_data["id"],
         "name": applicant_data.get("name", ""),
-        "years_experience": applicant_data.get("yearsOfExperience", 0),
-        "last_position": applicant_data.get("lastPosition", ""),
-        "last_position_level": applicant_data.get("lastPositionLevel", ""),
-        "work_authorization": applicant_data.get("workAuthorization", ""),
-        "skills": ",".join(set(all_skills)),
+        "years_experience": _as_number(applicant_data.get("yearsOfExperience")),
+        "last_position": applicant_data.get("lastPosition") or "",
+        "last_position_level": applicant_data.get("lastPositionLevel") or "",
+        "work_authorization": applicant_data.get("workAuthorization") or "",
+        "country_of_origin": applicant_data.get("countryOfOrigin") or "",
+        "education": sorted({edu.get("degree") for edu in applicant_data.get("education") or [] if edu.get("degree")}),
+        "skills": _applicant_skills(applicant_data),
         "type": "applicant"
     }
+
+def _as_number(value: Any) -> Union[int, float]:
+    """Numeric metadata value; the vector store can't filter ranges on strings or nulls."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0
+
+def job_data_from_model(db_job: Any) -> Dict[str, Any]:
+    """Convert a stored Job row to the dict format used by the pipelines."""
+    return {
+        "id": db_job.id,
+        "url": db_job.url,
+        "title": db_job.title,
+        "company": db_job.company,
+        "description": db_job.description,
+        "country": db_job.country,
+        "date": db_job.date,
+        "sponsorship": db_job.sponsorship,
+        "minYearsExperience": db_job.min_years_experience,
+        "minEducation": db_job.min_education,
+        "positionLevel": db_job.position_level,
+        "keywords": db_job.keywords or [],
+        "recruiterId": db_job.recruiter_id,
+        "recruiterName": db_job.recruiter_name
+    }
+
+def applicant_data_from_model(db_applicant: Any) -> Dict[str, Any]:
+    """Convert a stored Applicant row to the dict format used by the pipelines."""
+    return {
+        "id": db_applicant.id,
+        "name": db_applicant.name,
+        "workAuthorization": db_applicant.work_authorization,
+        "yearsOfExperience": db_applicant.years_of_experience,
+        "countryOfOrigin": db_applicant.country_of_origin,
+        "dateOfBirth": db_applicant.date_of_birth,
+        "address": db_applicant.address,
+        "personalStatement": db_applicant.personal_statement,
+        "resumeFileType": db_applicant.resume_file_type,
+        "workExperience": db_applicant.work_experience or [],
+        "education": db_applicant.education or [],
+        "lastPosition": db_applicant.last_position,
+        "lastPositionLevel": db_applicant.last_position_level,
+        "urls": db_applicant.urls,
+        "projects": db_applicant.projects
+    }
+
+def upsert_job_embeddings(jobs: List[Dict[str, Any]]) -> List[str]:
+    """Generate embeddings for a batch of jobs and store them with one upsert."""
+    if not jobs:
+        return []
+    
+    # Get embeddings for all jobs, with one call for the uncached ones
+    job_embeds = embed_texts([build_job_text(job_data) for job_data in jobs])
     
-    # Upsert to Pinecone
-    index.upsert(
-        vectors=[(applicant_data["id"], applicant_embed, metadata)],
+    # Upsert to vector store
+    upsert_many(
+        JOBS_INDEX,
+        vectors=[
+            (job_data["id"], job_embed, build_job_metadata(job_data))
+            for job_data, job_embed in zip(jobs, job_embeds)
+        ],
+        namespace="jobs"
+    )
+    
+    # Keep the keyword index in step
+    index_jobs_lexical(jobs)
+    
+    return [job_data["id"] for job_data in jobs]
+
+def upsert_applicant_embeddings(applicants: List[Dict[str, Any]]) -> List[str]:
+    """Generate embeddings for a batch of applicants and store them with one upsert."""
+    if not applicants:
+        return []
+    
+    # Get embeddings for all applicants, with one call for the uncached ones
+    applicant_embeds = embed_texts(
+        [build_applicant_text(applicant_data) for applicant_data in applicants]
+    )
+    
+    # Upsert to vector store
+    upsert_many(
+        APPS_INDEX,
+        vectors=[
+            (applicant_data["id"], applicant_embed, build_applicant_metadata(applicant_data))
+            for applicant_data, applicant_embed in zip(applicants, applicant_embeds)
+        ],
         namespace="applicants"
     )
     
-    return applicant_data["id"]
+    # Keep the keyword index in step
+    index_applicants_lexical(applicants)
+    
+    return [applicant_data["id"] for applicant_data in applicants]
+
+async def aupsert_job_embeddings(jobs: List[Dict[str, Any]]) -> List[str]:
+    """Async upsert_job_embeddings, bounded by the embedding and vector DB limits."""
+    if not jobs:
+        return []
+    
+    job_embeds = await aembed_texts([build_job_text(job_data) for job_data in jobs])
+    await limits.vector_db.run(
+        upsert_many,
+        JOBS_INDEX,
+        vectors=[
+            (job_data["id"], job_embed, build_job_metadata(job_data))
+            for job_data, job_embed in zip(jobs, job_embeds)
+        ],
+        namespace="jobs"
+    )
+    await limits.vector_db.run(index_jobs_lexical, jobs)
+    
+    return [job_data["id"] for job_data in jobs]
+
+async def aupsert_applicant_embeddings(applicants: List[Dict[str, Any]]) -> List[str]:
+    """Async upsert_applicant_embeddings, bounded by the embedding and vector DB limits."""
+    if not applicants:
+        return []
+    
+    applicant_embeds = await aembed_texts(
+        [build_applicant_text(applicant_data) for applicant_data in applicants]
+    )
+    await limits.vector_db.run(
+        upsert_many,
+        APPS_INDEX,
+        vectors=[
+            (applicant_data["id"], applicant_embed, build_applicant_metadata(applicant_data))
+            for applicant_data, applicant_embed in zip(applicants, applicant_embeds)
+        ],
+        namespace="applicants"
+    )
+    
+    await limits.vector_db.run(index_applicants_lexical, applicants)
+    
+    return [applicant_data["id"] for applicant_data in applicants]
+
+def upsert_job_embedding(job_data: Dict[str, Any]):
+    """Generate embedding for job and store in the vector store."""
+    return upsert_job_embeddings([job_data])[0]
+
+def upsert_applicant_embedding(applicant_data: Dict[str, Any]):
+    """Generate embedding for applicant and store in the vector store."""
+    return upsert_applicant_embeddings([applicant_data])[0]
 
 # Search operations
-def search_jobs_for_applicant(applicant_id: str, top_k: int = 5) -> List[Dict[str, Any]]:
-    """Find top matching jobs for an applicant."""
+def build_job_filter(filters: Optional[SearchFilters]) -> Optional[Dict[str, Any]]:
+    """Translate SearchFilters to a metadata filter over job vectors."""
+    if filters is None:
+        return None
+    
+    conditions = []
+    if filters.keywords:
+        conditions.append({"keywords": {"$in": filters.keywords}})
+    if filters.min_years_experience is not None:
+        conditions.append({"min_years_experience": {"$gte": filters.min_years_experience}})
+    if filters.max_years_experience is not None:
+        conditions.append({"min_years_experience": {"$lte": filters.max_years_experience}})
+    if filters.education:
+        conditions.append({"min_education": {"$in": filters.education}})
+    if filters.country:
+        conditions.append({"country": {"$in": filters.country}})
+    if filters.position_level:
+        conditions.append({"position_level": {"$in": filters.position_level}})
+    if filters.sponsorship is not None:
+        conditions.append({"sponsorship": {"$eq": filters.sponsorship}})
+    
+    return _all_of(conditions)
+
+def build_applicant_filter(filters: Optional[SearchFilters]) -> Optional[Dict[str, Any]]:
+    """Translate SearchFilters to a metadata filter over applicant vectors.
+
+    Keywords match skills. Sponsorship describes jobs and is ignored here.
+    """
+    if filters is None:
+        return None
+    
+    conditions = []
+    if filters.keywords:
+        conditions.append({"skills": {"$in": filters.keywords}})
+    if filters.min_years_experience is not None:
+        conditions.append({"years_experience": {"$gte": filters.min_years_experience}})
+    if filters.max_years_experience is not None:
+        conditions.append({"years_experience": {"$lte": filters.max_years_experience}})
+    if filters.education:
+        conditions.append({"education": {"$in": filters.education}})
+    if filters.country:
+        conditions.append({"country_of_origin": {"$in": filters.country}})
+    if filters.position_level:
+        conditions.append({"last_position_level": {"$in": filters.position_level}})
+    
+    return _all_of(conditions)
+
+def _all_of(conditions: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if not conditions:
+        return None
+    if len(conditions) == 1:
+        return conditions[0]
+    return {"$and": conditions}
+
+# Hybrid search: vector and BM25 rankings of HYBRID_CANDIDATES each, fused with RRF
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "50"))
+RRF_K = 60
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = RRF_K) -> List[Tuple[str, float]]:
+    """Fuse ranked id lists: each id scores the sum of 1 / (k + rank) over the lists."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, id in enumerate(ranking, 1):
+            scores[id] = scores.get(id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: -item[1])
+
+def _hybrid_query(
+    index: str,
+    namespace: str,
+    lexical_index: Any,
+    vector: Any,
+    query_text: str,
+    top_k: int,
+    filter: Optional[Dict[str, Any]]
+) -> List[Tuple[QueryMatch, float]]:
+    """Vector query fused with a BM25 query, in fused order.
+
+    Returns (match, fusion score) pairs. The match score stays the cosine
+    similarity, so it means the same as in vector mode; fusion scores are
+    only comparable within one response (at most 2 / (RRF_K + 1)).
+    """
+    candidates = max(top_k, HYBRID_CANDIDATES)
+    vector_matches = vector_store.query(index, vector=vector, top_k=candidates, namespace=namespace, filter=filter)
+    lexical_matches = lexical_index.search(query_text, candidates)
+    
+    # Keyword hits not returned by the vector query still need metadata,
+    # both for the response and to apply the filter, and a similarity score
+    found = {match.id: match for match in vector_matches}
+    missing = [id for id, _ in lexical_matches if id not in found]
+    if missing:
+        records = [
+            record for record in fetch_many(index, missing, namespace).values()
+            if not filter or matches_filter(record.metadata, filter)
+        ]
+        if records:
+            similarities = normalize_rows([record.values for record in records]) @ normalize_rows([vector])[0]
+            for record, similarity in zip(records, similarities.tolist()):
+                found[record.id] = QueryMatch(record.id, similarity, record.metadata)
+    
+    fused = reciprocal_rank_fusion([
+        [match.id for match in vector_matches],
+        [id for id, _ in lexical_matches if id in found]
+    ])
+    return [(found[id], fusion_score) for id, fusion_score in fused[:top_k]]
+
+def search_jobs_for_applicant(
+    applicant_id: str,
+    top_k: int = 5,
+    filters: Optional[SearchFilters] = None,
+    mode: str = "vector"
+) -> List[Dict[str, Any]]:
+    """Find top matching jobs for an applicant, among the jobs matching filters.
+
+    mode "hybrid" fuses the vector ranking with a keyword (BM25) ranking.
+    """
     # Get applicant data first
-    applicant_index = pc.Index("apps-index")
-    applicant_vectors = applicant_index.fetch(ids=[applicant_id], namespace="applicants")
+    applicant_vectors = fetch_many(APPS_INDEX, [applicant_id], "applicants")
     
-    if not applicant_vectors.vectors:
+    if not applicant_vectors:
         return []
     
     # Get the applicant vector
-    applicant_vector = applicant_vectors.vectors[applicant_id].values
+    applicant_vector = applicant_vectors[applicant_id].values
+    applicant_metadata = applicant_vectors[applicant_id].metadata
     
     # Search in jobs index
-    job_index = pc.Index("jobs-index")
-    search_results = job_index.query(
+    if mode == "hybrid":
+        query_text = " ".join(
+            [applicant_metadata.get("last_position", "")] + parse_skills(applicant_metadata.get("skills"))
+        )
+        fused = _hybrid_query(
+            JOBS_INDEX, "jobs", job_lexical_index,
+            applicant_vector, query_text, top_k, build_job_filter(filters)
+        )
+        return [job_match_result(match.id, match.score, match.metadata, fusion_score) for match, fusion_score in fused]
+    
+    search_results = vector_store.query(
+        JOBS_INDEX,
         vector=applicant_vector,
         top_k=top_k,
         namespace="jobs",
-        include_metadata=True
+        filter=build_job_filter(filters)
     )
     
     # Format results
-    matches = []
-    for match in search_results.matches:
-        matches.append({
-            "item": {
-                "id": match.id,
-                **{k: v for k, v in match.metadata.items() if k != "id"}
-            },
-            "score": match.score,
-            "highlights": [
-                {
-                    "field": "keywords",
-                    "matches": match.metadata.get("keywords", "").split(",")[:3]
-                }
-            ]
-        })
-    
-    return matches
+    return [job_match_result(match.id, match.score, match.metadata) for match in search_results]
+
+def job_match_result(
+    id: str,
+    score: float,
+    metadata: Dict[str, Any],
+    fusion_score: Optional[float] = None
+) -> Dict[str, Any]:
+    result = {
+        "item": {
+            "id": id,
+            **{k: v for k, v in metadata.items() if k != "id"}
+        },
+        "score": score,
+        "highlights": [
+            {
+                "field": "keywords",
+                "matches": parse_skills(metadata.get("keywords"))[:3]
+            }
+        ]
+    }
+    if fusion_score is not None:
+        result["fusionScore"] = fusion_score
+    return result
 
-def search_applicants_for_job(job_id: str, top_k: int = 5) -> List[Dict[str, Any]]:
-    """Find top matching applicants for a job."""
+def search_applicants_for_job(
+    job_id: str,
+    top_k: int = 5,
+    filters: Optional[SearchFilters] = None,
+    mode: str = "vector"
+) -> List[Dict[str, Any]]:
+    """Find top matching applicants for a job, among the applicants matching filters.
+
+    mode "hybrid" fuses the vector ranking with a keyword (BM25) ranking.
+    """
     # Get job data first
-    job_index = pc.Index("jobs-index")
-    job_vectors = job_index.fetch(ids=[job_id], namespace="jobs")
+    job_vectors = fetch_many(JOBS_INDEX, [job_id], "jobs")
     
-    if not job_vectors.vectors:
+    if not job_vectors:
         return []
     
     # Get the job vector
-    job_vector = job_vectors.vectors[job_id].values
+    job_vector = job_vectors[job_id].values
+    job_metadata = job_vectors[job_id].metadata
     
     # Search in applicants index
-    applicant_index = pc.Index("apps-index")
-    search_results = applicant_index.query(
+    if mode == "hybrid":
+        query_text = " ".join([job_metadata.get("title", "")] + parse_skills(job_metadata.get("keywords")))
+        fused = _hybrid_query(
+            APPS_INDEX, "applicants", applicant_lexical_index,
+            job_vector, query_text, top_k, build_applicant_filter(filters)
+        )
+        return [applicant_match_result(match.id, match.score, match.metadata, fusion_score) for match, fusion_score in fused]
+    
+    search_results = vector_store.query(
+        APPS_INDEX,
         vector=job_vector,
         top_k=top_k,
         namespace="applicants",
-        include_metadata=True
+        filter=build_applicant_filter(filters)
     )
     
     # Format results
-    matches = []
-    for match in search_results.matches:
-        matches.append({
-            "item": {
-                "id": match.id,
-                **{k: v for k, v in match.metadata.items() if k != "id"}
-            },
-            "score": match.score,
-            "highlights": [
-                {
-                    "field": "skills",
-                    "matches": match.metadata.get("skills", "").split(",")[:3]
-                }
-            ]
-        })
+    return [applicant_match_result(match.id, match.score, match.metadata) for match in search_results]
+
+def applicant_match_result(
+    id: str,
+    score: float,
+    metadata: Dict[str, Any],
+    fusion_score: Optional[float] = None
+) -> Dict[str, Any]:
+    result = {
+        "item": {
+            "id": id,
+            **{k: v for k, v in metadata.items() if k != "id"}
+        },
+        "score": score,
+        "highlights": [
+            {
+                "field": "skills",
+                "matches": parse_skills(metadata.get("skills"))[:3]
+            }
+        ]
+    }
+    if fusion_score is not None:
+        result["fusionScore"] = fusion_score
+    return result
+
+# Batch matching
+def match_jobs_for_applicants(
+    applicant_ids: List[str],
+    job_ids: List[str],
+    top_k: int = 5,
+    filters: Optional[SearchFilters] = None
+) -> Iterator[Dict[str, Any]]:
+    """Yield the top matching jobs for each applicant, in applicant_ids order.
+
+    Applicants are fetched and scored MATCH_QUERY_TILE at a time, so results
+    stream out as each tile finishes. Jobs are fetched MATCH_CANDIDATE_TILE at
+    a time and merged into each applicant's running top-k, so memory doesn't
+    grow with the number of jobs. If the jobs fit in one tile it is fetched
+    once and kept; otherwise every applicant tile fetches the job tiles again.
+    Applicants without a vector get no matches.
+    """
+    job_filter = build_job_filter(filters)
+    job_ids = list(dict.fromkeys(job_ids))
+    job_tiles = [job_ids[i:i + MATCH_CANDIDATE_TILE] for i in range(0, len(job_ids), MATCH_CANDIDATE_TILE)]
+    kept_jobs = _fetch_job_tile(job_tiles[0], job_filter) if len(job_tiles) == 1 else None
     
-    return matches
+    for start in range(0, len(applicant_ids), MATCH_QUERY_TILE):
+        tile_ids = applicant_ids[start:start + MATCH_QUERY_TILE]
+        applicant_records = fetch_many(APPS_INDEX, list(dict.fromkeys(tile_ids)), "applicants")
+        found = list(applicant_records)
+        queries = normalize_rows([applicant_records[id].values for id in found])
+        
+        # (score, job record) pairs per applicant row, best first
+        best: List[List[Tuple[float, Any]]] = [[] for _ in found]
+        for job_tile_ids in job_tiles:
+            jobs, job_matrix = kept_jobs or _fetch_job_tile(job_tile_ids, job_filter)
+            indices, scores = tiled_top_k(queries, job_matrix, top_k)
+            for row, (row_indices, row_scores) in enumerate(zip(indices.tolist(), scores.tolist())):
+                candidates = best[row] + [(score, jobs[index]) for index, score in zip(row_indices, row_scores)]
+                best[row] = heapq.nlargest(top_k, candidates, key=lambda candidate: candidate[0])
+        rows = {id: row for row, id in enumerate(found)}
+        
+        for applicant_id in tile_ids:
+            row = rows.get(applicant_id)
+            matches = [] if row is None else [
+                job_match_result(job.id, score, job.metadata) for score, job in best[row]
+            ]
+            yield {"applicantId": applicant_id, "matches": matches}
+
+def _fetch_job_tile(job_ids: List[str], job_filter: Optional[Dict[str, Any]]) -> Tuple[List[Any], np.ndarray]:
+    """Job records passing job_filter, in job_ids order, and their normalized vectors."""
+    job_records = fetch_many(JOBS_INDEX, job_ids, "jobs")
+    jobs = [
+        job_records[id] for id in job_ids
+        if id in job_records and (not job_filter or matches_filter(job_records[id].metadata, job_filter))
+    ]
+    return jobs, normalize_rows([job.values for job in jobs])
 
 def compare_applicants(applicant_id_a: str, applicant_id_b: str) -> Dict[str, Any]:
     """Compare two applicants and provide analysis."""
     # Get both applicant data
-    applicant_index = pc.Index("apps-index")
-    applicant_vectors = applicant_index.fetch(
-        ids=[applicant_id_a, applicant_id_b], 
-        namespace="applicants"
-    )
+    applicant_vectors = fetch_many(APPS_INDEX, [applicant_id_a, applicant_id_b], "applicants")
     
-    if len(applicant_vectors.vectors) < 2:
+    if len(applicant_vectors) < 2:
         return {
             "error": "One or both applicant IDs not found"
         }
     
     # Get the applicant vectors
-    vector_a = applicant_vectors.vectors[applicant_id_a].values
-    vector_b = applicant_vectors.vectors[applicant_id_b].values
-    metadata_a = applicant_vectors.vectors[applicant_id_a].metadata
-    metadata_b = applicant_vectors.vectors[applicant_id_b].metadata
+    vector_a = applicant_vectors[applicant_id_a].values
+    vector_b = applicant_vectors[applicant_id_b].values
+    metadata_a = applicant_vectors[applicant_id_a].metadata
+    metadata_b = applicant_vectors[applicant_id_b].metadata
     
     # Calculate cosine similarity
     similarity_score = np.dot(vector_a, vector_b) / (np.linalg.norm(vector_a) * np.linalg.norm(vector_b))
     
     # Generate comparison analysis with LLM
-    skills_a = metadata_a.get("skills", "").split(",")
-    skills_b = metadata_b.get("skills", "").split(",")
+    skills_a = parse_skills(metadata_a.get("skills"))
+    skills_b = parse_skills(metadata_b.get("skills"))
     
     prompt = f"""
     Compare these two applicant profiles and provide:
@@ -388,9 +883,9 @@ def compare_applicants(applicant_id_a: str, applicant_id_b: str) -> Dict[str, An
     }}
     """
     
-    response = llm.invoke(prompt)
+    response = get_llm().invoke(prompt)
     try:
-        analysis = json.loads(response)
+        analysis = json.loads(_response_text(response))
     except json.JSONDecodeError:
         # Fallback if parsing fails
         analysis = {
@@ -409,22 +904,22 @@ def compare_applicants(applicant_id_a: str, applicant_id_b: str) -> Dict[str, An
     }
 
 # Generate RAG summary
-def generate_job_rag_summary(job_id: str) -> Dict[str, Any]:
-    """Generate a RAG summary for a job."""
-    # Get job data
-    job_index = pc.Index("jobs-index")
-    job_vectors = job_index.fetch(ids=[job_id], namespace="jobs")
-    
-    if not job_vectors.vectors:
-        return {
-            "id": f"summary-{job_id}",
-            "summary": "Job not found",
-            "insights": [],
-            "createdAt": datetime.now().isoformat()
-        }
-    
-    metadata = job_vectors.vectors[job_id].metadata
-    
+RAG_PROMPT_VERSION = "1"
+
+# Metadata fields that feed the summary prompts
+JOB_SUMMARY_FIELDS = ["title", "company", "country", "min_years_experience", "min_education", "position_level", "keywords"]
+APPLICANT_SUMMARY_FIELDS = ["name", "years_experience", "last_position", "last_position_level", "work_authorization", "skills"]
+
+def summary_hash(metadata: Dict[str, Any], fields: List[str]) -> str:
+    """Hash of the metadata a summary is generated from."""
+    relevant = {field: metadata.get(field) for field in fields}
+    return content_hash(RAG_PROMPT_VERSION, json.dumps(relevant, sort_keys=True, default=str))
+
+def summarize_job(job_id: str, metadata: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+    """Generate a RAG summary from job metadata.
+
+    Returns the summary and whether it came from the LLM (False for the fallback).
+    """
     prompt = f"""
     Generate a comprehensive summary and key insights for this job:
     
@@ -434,7 +929,7 @@ def generate_job_rag_summary(job_id: str) -> Dict[str, Any]:
     Experience Required: {metadata.get("min_years_experience", "")} years
     Education Required: {metadata.get("min_education", "")}
     Position Level: {metadata.get("position_level", "")}
-    Keywords: {metadata.get("keywords", "")}
+    Keywords: {", ".join(parse_skills(metadata.get("keywords")))}
     
     Respond with JSON containing:
     {{
@@ -443,11 +938,13 @@ def generate_job_rag_summary(job_id: str) -> Dict[str, Any]:
     }}
     """
     
-    response = llm.invoke(prompt)
+    response = get_llm().invoke(prompt)
+    generated = True
     try:
-        analysis = json.loads(response)
+        analysis = json.loads(_response_text(response))
     except json.JSONDecodeError:
         # Fallback if parsing fails
+        generated = False
         analysis = {
             "summary": f"This is a {metadata.get('position_level', '')} {metadata.get('title', '')} position at {metadata.get('company', '')}.",
             "insights": []
@@ -458,24 +955,13 @@ def generate_job_rag_summary(job_id: str) -> Dict[str, Any]:
         "summary": analysis.get("summary", ""),
         "insights": analysis.get("insights", []),
         "createdAt": datetime.now().isoformat()
-    }
+    }, generated
 
-def generate_applicant_rag_summary(applicant_id: str) -> Dict[str, Any]:
-    """Generate a RAG summary for an applicant."""
-    # Get applicant data
-    applicant_index = pc.Index("apps-index")
-    applicant_vectors = applicant_index.fetch(ids=[applicant_id], namespace="applicants")
-    
-    if not applicant_vectors.vectors:
-        return {
-            "id": f"summary-{applicant_id}",
-            "summary": "Applicant not found",
-            "insights": [],
-            "createdAt": datetime.now().isoformat()
-        }
-    
-    metadata = applicant_vectors.vectors[applicant_id].metadata
-    
+def summarize_applicant(applicant_id: str, metadata: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+    """Generate a RAG summary from applicant metadata.
+
+    Returns the summary and whether it came from the LLM (False for the fallback).
+    """
     prompt = f"""
     Generate a comprehensive summary and key insights for this applicant:
     
@@ -484,7 +970,7 @@ def generate_applicant_rag_summary(applicant_id: str) -> Dict[str, Any]:
     Last Position: {metadata.get("last_position", "")}
     Last Position Level: {metadata.get("last_position_level", "")}
     Work Authorization: {metadata.get("work_authorization", "")}
-    Skills: {metadata.get("skills", "")}
+    Skills: {", ".join(parse_skills(metadata.get("skills")))}
     
     Respond with JSON containing:
     {{
@@ -493,11 +979,13 @@ def generate_applicant_rag_summary(applicant_id: str) -> Dict[str, Any]:
     }}
     """
     
-    response = llm.invoke(prompt)
+    response = get_llm().invoke(prompt)
+    generated = True
     try:
-        analysis = json.loads(response)
+        analysis = json.loads(_response_text(response))
     except json.JSONDecodeError:
         # Fallback if parsing fails
+        generated = False
         analysis = {
             "summary": f"{metadata.get('name', 'This candidate')} has {metadata.get('years_experience', '0')} years of experience, most recently as a {metadata.get('last_position', 'professional')}.",
             "insights": []
@@ -508,44 +996,61 @@ def generate_applicant_rag_summary(applicant_id: str) -> Dict[str, Any]:
         "summary": analysis.get("summary", ""),
         "insights": analysis.get("insights", []),
         "createdAt": datetime.now().isoformat()
-    }
+    }, generated
+
+def generate_job_rag_summary(job_id: str) -> Dict[str, Any]:
+    """Generate a RAG summary for a job."""
+    # Get job data
+    job_vectors = fetch_many(JOBS_INDEX, [job_id], "jobs")
+    
+    if not job_vectors:
+        return {
+            "id": f"summary-{job_id}",
+            "summary": "Job not found",
+            "insights": [],
+            "createdAt": datetime.now().isoformat()
+        }
+    
+    return summarize_job(job_id, job_vectors[job_id].metadata)[0]
+
+def generate_applicant_rag_summary(applicant_id: str) -> Dict[str, Any]:
+    """Generate a RAG summary for an applicant."""
+    # Get applicant data
+    applicant_vectors = fetch_many(APPS_INDEX, [applicant_id], "applicants")
+    
+    if not applicant_vectors:
+        return {
+            "id": f"summary-{applicant_id}",
+            "summary": "Applicant not found",
+            "insights": [],
+            "createdAt": datetime.now().isoformat()
+        }
+    
+    return summarize_applicant(applicant_id, applicant_vectors[applicant_id].metadata)[0]
 
 # Generate heatmap data
+# Number of skills (columns) shown in a comparison heatmap
+HEATMAP_TOP_SKILLS = int(os.getenv("HEATMAP_TOP_SKILLS", "10"))
+
 def generate_comparison_heatmap(applicant_id: str, peer_ids: List[str]) -> List[Dict[str, Any]]:
     """Generate heatmap data for comparison."""
     # Get all applicants' data
-    all_ids = [applicant_id] + peer_ids
-    applicant_index = pc.Index("apps-index")
-    all_vectors = applicant_index.fetch(ids=all_ids, namespace="applicants")
+    all_ids = list(dict.fromkeys([applicant_id] + peer_ids))
+    all_vectors = fetch_many(APPS_INDEX, all_ids, "applicants")
     
-    if not all_vectors.vectors:
+    if not all_vectors:
         return []
     
-    # Get skills from all applicants
-    all_skills = set()
-    for id, vector_data in all_vectors.vectors.items():
-        skills = vector_data.metadata.get("skills", "").split(",")
-        all_skills.update([s for s in skills if s])
-    
-    # Limit to top 10 skills
-    top_skills = list(all_skills)[:10]
-    
-    # Generate heatmap data
-    heatmap_data = []
-    for skill in top_skills:
-        for idx, id in enumerate(all_ids):
-            # Skip if applicant not found
-            if id not in all_vectors.vectors:
-                continue
-                
-            applicant_skills = all_vectors.vectors[id].metadata.get("skills", "").split(",")
-            # Calculate skill strength (simple presence/absence for now)
-            value = 0.8 if skill in applicant_skills else 0.3
-            
-            heatmap_data.append({
-                "x": skill,
-                "y": "You" if id == applicant_id else f"Peer {peer_ids.index(id) + 1}",
-                "value": value
-            })
-    
-    return heatmap_data
+    # One row per applicant found, labelled by their position in the request
+    peer_numbers = {id: number for number, id in reversed(list(enumerate(peer_ids, 1)))}
+    row_ids = [id for id in all_ids if id in all_vectors]
+    labels = ["You" if id == applicant_id else f"Peer {peer_numbers[id]}" for id in row_ids]
+    
+    # Build the skill presence matrix and take the most common skills
+    skill_matrix = build_skill_matrix(
+        [parse_skills(all_vectors[id].metadata.get("skills")) for id in row_ids]
+    )
+    focus_row = 0 if row_ids[0] == applicant_id else None
+    top_skills = rank_skills(skill_matrix, HEATMAP_TOP_SKILLS, focus_row=focus_row)
+    
+    return heatmap_cells(skill_matrix, labels, top_skills)
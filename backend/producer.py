@@ -0,0 +1,116 @@
+import os
+import json
+import time
+import threading
+from concurrent.futures import Future
+from confluent_kafka import Producer, KafkaException
+from typing import Any, Dict, Optional
+
+# Kafka configuration
+KAFKA_BOOTSTRAP_SERVERS = os.getenv("KAFKA_BOOTSTRAP_SERVERS", "localhost:9092")
+
+# Batching: messages wait up to KAFKA_LINGER_MS to share a compressed request
+KAFKA_LINGER_MS = int(os.getenv("KAFKA_LINGER_MS", "20"))
+KAFKA_BATCH_BYTES = int(os.getenv("KAFKA_BATCH_BYTES", str(256 * 1024)))
+KAFKA_COMPRESSION = os.getenv("KAFKA_COMPRESSION", "lz4")
+
+# Outbound buffer. When it is full, produce() waits up to
+# KAFKA_BUFFER_TIMEOUT_SECONDS for space before failing the message.
+KAFKA_BUFFER_MESSAGES = int(os.getenv("KAFKA_BUFFER_MESSAGES", "10000"))
+KAFKA_BUFFER_TIMEOUT_SECONDS = float(os.getenv("KAFKA_BUFFER_TIMEOUT_SECONDS", "10"))
+KAFKA_FLUSH_TIMEOUT_SECONDS = float(os.getenv("KAFKA_FLUSH_TIMEOUT_SECONDS", "10"))
+
+producer_conf = {
+    'bootstrap.servers': KAFKA_BOOTSTRAP_SERVERS,
+    'client.id': 'recruitment-producer',
+    'linger.ms': KAFKA_LINGER_MS,
+    'batch.size': KAFKA_BATCH_BYTES,
+    'compression.type': KAFKA_COMPRESSION,
+    'queue.buffering.max.messages': KAFKA_BUFFER_MESSAGES,
+    'enable.idempotence': True
+}
+
+class MessageProducer:
+    """Long-lived Kafka producer that never waits on the broker in the caller.
+
+    ``produce`` only enqueues the message and returns a Future for its delivery;
+    a background thread serves delivery reports. The underlying producer is
+    created on first use, so importing this module doesn't connect to Kafka.
+    """
+
+    def __init__(self, conf: Dict[str, Any] = producer_conf):
+        self.conf = conf
+        self._producer: Optional[Producer] = None
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._poller: Optional[threading.Thread] = None
+
+    def _get_producer(self) -> Producer:
+        with self._lock:
+            if self._producer is None:
+                self._producer = Producer(self.conf)
+                self._closed.clear()
+                self._poller = threading.Thread(target=self._poll_loop, name="kafka-producer-poll", daemon=True)
+                self._poller.start()
+            return self._producer
+
+    def _poll_loop(self):
+        """Serve delivery callbacks until closed."""
+        while not self._closed.is_set():
+            self._producer.poll(0.1)
+
+    def produce(self, topic: str, data: Dict[str, Any], key: Optional[str] = None) -> Future:
+        """Queue a JSON message. The Future resolves to the delivered message or the delivery error."""
+        future = Future()
+        future.set_running_or_notify_cancel()
+
+        def on_delivery(err, msg):
+            if err is not None:
+                print(f'Message delivery failed: {err}')
+                future.set_exception(KafkaException(err))
+            else:
+                future.set_result(msg)
+
+        try:
+            producer = self._get_producer()
+            value = json.dumps(data).encode('utf-8')
+            deadline = time.monotonic() + KAFKA_BUFFER_TIMEOUT_SECONDS
+            while True:
+                try:
+                    producer.produce(topic, value, key=key, on_delivery=on_delivery)
+                    break
+                except BufferError:
+                    # Buffer full: wait for deliveries to make room (backpressure)
+                    if time.monotonic() >= deadline:
+                        raise
+                    producer.poll(0.05)
+        except Exception as e:
+            print(f"Failed to produce message: {str(e)}")
+            future.set_exception(e)
+
+        return future
+
+    def flush(self, timeout: float = KAFKA_FLUSH_TIMEOUT_SECONDS) -> int:
+        """Wait for queued messages to be delivered. Returns how many are still queued."""
+        if self._producer is None:
+            return 0
+        return self._producer.flush(timeout)
+
+    def close(self, timeout: float = KAFKA_FLUSH_TIMEOUT_SECONDS):
+        """Flush and stop the poll thread; a later produce() starts a fresh producer."""
+        with self._lock:
+            if self._producer is None:
+                return
+            remaining = self._producer.flush(timeout)
+            if remaining:
+                print(f"{remaining} Kafka messages were not delivered before shutdown")
+            self._closed.set()
+            self._poller.join()
+            self._producer = None
+            self._poller = None
+
+producer = MessageProducer()
+
+def produce_message(topic: str, data: Dict[str, Any], key: Optional[str] = None) -> Future:
+    """Produce a message to Kafka topic without waiting for delivery."""
+    return producer.produce(topic, data, key=key)
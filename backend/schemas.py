@@ -1,6 +1,6 @@
 
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Literal, Union
 import datetime
 
 # Job schemas
@@ -28,7 +28,24 @@ class Job(JobBase):
     updated_at: datetime.datetime
 
     class Config:
-        orm_mode = True
+        from_attributes = True
+        populate_by_name = True
+
+# Row shown in job lists, loaded without the description
+class JobSummary(BaseModel):
+    id: str
+    title: str
+    company: str
+    country: str
+    date: str
+    sponsorship: bool
+    position_level: str = Field(..., alias="positionLevel")
+    keywords: List[str]
+    created_at: datetime.datetime
+
+    class Config:
+        from_attributes = True
+        populate_by_name = True
 
 # Work Experience schema
 class WorkExperience(BaseModel):
@@ -80,7 +97,23 @@ class Applicant(ApplicantBase):
     updated_at: datetime.datetime
 
     class Config:
-        orm_mode = True
+        from_attributes = True
+        populate_by_name = True
+
+# Row shown in applicant lists, loaded without work history, education or projects
+class ApplicantSummary(BaseModel):
+    id: str
+    name: str
+    work_authorization: str = Field(..., alias="workAuthorization")
+    years_of_experience: int = Field(..., alias="yearsOfExperience")
+    country_of_origin: str = Field(..., alias="countryOfOrigin")
+    last_position: str = Field(..., alias="lastPosition")
+    last_position_level: str = Field(..., alias="lastPositionLevel")
+    created_at: datetime.datetime
+
+    class Config:
+        from_attributes = True
+        populate_by_name = True
 
 # Match result schema
 class MatchHighlight(BaseModel):
@@ -89,7 +122,8 @@ class MatchHighlight(BaseModel):
 
 class MatchResult(BaseModel):
     item: Any  # Can be Job or Applicant
-    score: float
+    score: float  # Cosine similarity
+    fusion_score: Optional[float] = Field(None, alias="fusionScore")  # Hybrid mode only
     highlights: Optional[List[MatchHighlight]] = None
 
 # RAG summary schema
@@ -97,7 +131,7 @@ class RAGSummary(BaseModel):
     id: str
     summary: str
     insights: List[str]
-    created_at: datetime.datetime
+    created_at: datetime.datetime = Field(..., alias="createdAt")
 
 # Comparison result schema
 class ComparisonResultBase(BaseModel):
@@ -112,10 +146,11 @@ class ComparisonResultCreate(ComparisonResultBase):
 
 class ComparisonResult(ComparisonResultBase):
     id: str
-    created_at: datetime.datetime
+    created_at: datetime.datetime = Field(..., alias="createdAt")
 
     class Config:
-        orm_mode = True
+        from_attributes = True
+        populate_by_name = True
 
 # Heatmap data schema
 class HeatmapData(BaseModel):
@@ -126,9 +161,49 @@ class HeatmapData(BaseModel):
 # File upload schemas
 class JobUploadResponse(BaseModel):
     job_data: Dict[str, Any] = Field(..., alias="jobData")
+    from_cache: bool = Field(False, alias="fromCache")
 
 class ApplicantUploadResponse(BaseModel):
     applicant_data: Dict[str, Any] = Field(..., alias="applicantData")
+    from_cache: bool = Field(False, alias="fromCache")
+
+# Bulk ingestion schemas
+class IngestError(BaseModel):
+    file: str
+    error: str
+
+class IngestBatch(BaseModel):
+    id: str
+    kind: str
+    status: str
+    total: int
+    processed: int
+    succeeded: int
+    failed: int
+    errors: List[IngestError]
+    created_at: datetime.datetime = Field(..., alias="createdAt")
+    updated_at: datetime.datetime = Field(..., alias="updatedAt")
+
+# Skill schemas
+class SkillCount(BaseModel):
+    name: str
+    display_name: str = Field(..., alias="displayName")
+    applicant_count: int = Field(..., alias="applicantCount")
+    job_count: int = Field(..., alias="jobCount")
+
+class SkillOverlap(BaseModel):
+    id: str
+    overlap: int  # Number of shared skills
+    skills: List[str]  # The shared skills, by canonical name
+
+# Full-text search schema
+class TextSearchResult(BaseModel):
+    id: str
+    type: str  # "job" or "applicant"
+    title: str  # Job title or applicant name
+    subtitle: Optional[str] = None  # Company or last position
+    snippet: str  # Best matching passage, with matched terms in <mark> tags
+    score: float  # Higher is better
 
 # Search filter schema
 class SearchFilters(BaseModel):
@@ -139,3 +214,10 @@ class SearchFilters(BaseModel):
     country: Optional[List[str]] = None
     position_level: Optional[List[str]] = Field(None, alias="positionLevel")
     sponsorship: Optional[bool] = None
+
+# Batch matching schema
+class BatchMatchRequest(BaseModel):
+    applicant_ids: Union[List[str], Literal["all"]] = Field(..., alias="applicantIds")
+    job_ids: Union[List[str], Literal["all"]] = Field("all", alias="jobIds")
+    limit: int = Field(5, ge=1, le=100)
+    filters: Optional[SearchFilters] = None
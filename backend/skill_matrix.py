@@ -0,0 +1,70 @@
+import numpy as np
+from typing import Any, Dict, List, NamedTuple, Optional
+
+# Heatmap cell values for a skill an applicant has / doesn't have
+SKILL_PRESENT_VALUE = 0.8
+SKILL_ABSENT_VALUE = 0.3
+
+class SkillMatrix(NamedTuple):
+    """Presence matrix with one row per applicant and one column per interned skill."""
+    skills: List[str]  # Column -> display name (first spelling seen)
+    matrix: np.ndarray  # (applicants, skills) bool
+
+def parse_skills(value: Any) -> List[str]:
+    """Skills (or keywords) from vector metadata, stored either as a list or a
+    comma-joined string."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    return [skill.strip() for skill in value if skill and skill.strip()]
+
+def build_skill_matrix(skill_lists: List[List[str]]) -> SkillMatrix:
+    """Intern skills to column ids (case-insensitively) and mark presence in one pass."""
+    columns: Dict[str, int] = {}
+    skills: List[str] = []
+    rows: List[int] = []
+    cols: List[int] = []
+    for row, applicant_skills in enumerate(skill_lists):
+        for skill in applicant_skills:
+            key = skill.lower()
+            col = columns.get(key)
+            if col is None:
+                col = columns[key] = len(skills)
+                skills.append(skill)
+            rows.append(row)
+            cols.append(col)
+
+    matrix = np.zeros((len(skill_lists), len(skills)), dtype=bool)
+    if rows:
+        matrix[rows, cols] = True
+    return SkillMatrix(skills, matrix)
+
+def rank_skills(skill_matrix: SkillMatrix, limit: int, focus_row: Optional[int] = 0) -> np.ndarray:
+    """Column ids of the most common skills in the group.
+
+    Ties go to skills the focus applicant has, then alphabetically, so the
+    order is stable across calls.
+    """
+    skills, matrix = skill_matrix
+    if not skills:
+        return np.zeros(0, dtype=np.intp)
+
+    frequency = matrix.sum(axis=0)
+    has_skill = matrix[focus_row] if focus_row is not None else np.zeros(len(skills), dtype=bool)
+    names = np.array([skill.lower() for skill in skills])
+    # lexsort sorts by the last key first
+    order = np.lexsort((names, ~has_skill, -frequency))
+    return order[:limit]
+
+def heatmap_cells(skill_matrix: SkillMatrix, labels: List[str], columns: np.ndarray) -> List[Dict[str, Any]]:
+    """Heatmap cells for the given columns, skill by skill, one per applicant row."""
+    values = np.where(skill_matrix.matrix[:, columns], SKILL_PRESENT_VALUE, SKILL_ABSENT_VALUE)
+    cells = []
+    for col, column_values in zip(columns.tolist(), values.T.tolist()):
+        skill = skill_matrix.skills[col]
+        cells.extend(
+            {"x": skill, "y": label, "value": value}
+            for label, value in zip(labels, column_values)
+        )
+    return cells
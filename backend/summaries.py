@@ -0,0 +1,52 @@
+from sqlalchemy.orm import Session
+from typing import Dict, Any
+from . import crud, pipelines
+
+# Stored RAG summaries are keyed by entity id and a hash of the metadata they
+# were generated from, so a summary is only regenerated once that metadata changes.
+
+def _stored_summary(db_summary: Any) -> Dict[str, Any]:
+    return {
+        "id": f"summary-{db_summary.entity_id}",
+        "summary": db_summary.summary,
+        "insights": db_summary.insights or [],
+        "createdAt": db_summary.created_at.isoformat()
+    }
+
+def get_job_summary(db: Session, job_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the stored summary for a job, generating and storing it if missing or stale."""
+    metadata = pipelines.build_job_metadata(job_data)
+    metadata_hash = pipelines.summary_hash(metadata, pipelines.JOB_SUMMARY_FIELDS)
+    
+    db_summary = crud.get_rag_summary(db, job_data["id"], metadata_hash)
+    if db_summary is not None:
+        return _stored_summary(db_summary)
+    
+    summary, generated = pipelines.summarize_job(job_data["id"], metadata)
+    if generated:
+        crud.save_rag_summary(db, job_data["id"], "job", metadata_hash, summary)
+    return summary
+
+def get_applicant_summary(db: Session, applicant_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the stored summary for an applicant, generating and storing it if missing or stale."""
+    metadata = pipelines.build_applicant_metadata(applicant_data)
+    metadata_hash = pipelines.summary_hash(metadata, pipelines.APPLICANT_SUMMARY_FIELDS)
+    
+    db_summary = crud.get_rag_summary(db, applicant_data["id"], metadata_hash)
+    if db_summary is not None:
+        return _stored_summary(db_summary)
+    
+    summary, generated = pipelines.summarize_applicant(applicant_data["id"], metadata)
+    if generated:
+        crud.save_rag_summary(db, applicant_data["id"], "applicant", metadata_hash, summary)
+    return summary
+
+def precompute_summary(db: Session, entity_type: str, item_data: Dict[str, Any]):
+    """Generate and store a summary ahead of the first request. Failures are
+    logged rather than raised, so they don't fail the write that triggered them."""
+    get_summary = get_job_summary if entity_type == "job" else get_applicant_summary
+    try:
+        get_summary(db, item_data)
+    except Exception as e:
+        db.rollback()
+        print(f"Error generating summary for {item_data.get('id')}: {str(e)}")
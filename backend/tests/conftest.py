@@ -0,0 +1,76 @@
+import os
+import sys
+import tempfile
+import pytest
+
+# The backend reads its settings at import time, so point the database,
+# vector store, caches and keyword index at a scratch directory before any
+# test imports it. Run with: python -m pytest backend/tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.benchmarks import fakes
+
+fakes.configure_environment(tempfile.mkdtemp(prefix="backend-tests-"))
+
+@pytest.fixture(scope="session")
+def tables():
+    from backend import models
+    from backend.database import engine
+    models.Base.metadata.create_all(bind=engine)
+    models.create_missing_indexes(engine)
+    models.create_text_search_tables(engine)
+
+@pytest.fixture
+def db(tables):
+    from backend.database import SessionLocal
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+@pytest.fixture
+def rng():
+    import random
+    return random.Random(0)
+
+@pytest.fixture
+def add_jobs(db, rng):
+    """Save generated jobs (with overrides) under the given ids and return their payloads."""
+    from backend import crud, schemas
+
+    def add(ids, **overrides):
+        records = {job_id: {**fakes.job_record(rng), **overrides, "id": job_id} for job_id in ids}
+        crud.upsert_jobs(db, [(job_id, schemas.JobCreate(**data)) for job_id, data in records.items()])
+        return records
+    return add
+
+@pytest.fixture
+def add_applicants(db, rng):
+    """Save generated applicants (with overrides) under the given ids and return their payloads."""
+    from backend import crud, schemas
+
+    def add(ids, **overrides):
+        records = {applicant_id: {**fakes.applicant_record(rng), **overrides, "id": applicant_id} for applicant_id in ids}
+        crud.upsert_applicants(db, [(applicant_id, schemas.ApplicantCreate(**data)) for applicant_id, data in records.items()])
+        return records
+    return add
+
+@pytest.fixture
+def llm(monkeypatch):
+    """Fake LLM in place of Gemini, with an empty in-memory parse cache."""
+    from backend import pipelines
+    fake = fakes.FakeLLM()
+    monkeypatch.setattr(pipelines, "get_llm", lambda: fake)
+    pipelines.parse_cache.memory.clear()
+    return fake
+
+@pytest.fixture
+def embeddings(monkeypatch):
+    """Fake embedding model in place of Gemini, with an empty in-memory embedding cache."""
+    from backend import pipelines
+    from backend.vector_store import EMBEDDING_DIMENSION
+    fake = fakes.FakeEmbeddings(EMBEDDING_DIMENSION)
+    monkeypatch.setattr(pipelines, "get_embeddings", lambda: fake)
+    pipelines.embedding_cache.memory.clear()
+    return fake
@@ -0,0 +1,106 @@
+import time
+import pytest
+from backend.cache import DiskCache, LRUCache, TieredCache, content_hash
+
+def test_content_hash_separates_parts():
+    assert content_hash("ab", "c") != content_hash("a", "bc")
+    assert content_hash("a", "b") == content_hash("a", "b")
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+def test_lru_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    cache = LRUCache(max_entries=10, ttl=60)
+    cache.set("a", 1)
+
+    now[0] += 59
+    assert cache.get("a") == 1
+    now[0] += 2
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+def test_disk_cache_persists_and_expires(tmp_path, monkeypatch):
+    path = str(tmp_path / "cache.sqlite")
+    DiskCache(path, max_bytes=1024).set("a", b"value")
+    assert DiskCache(path, max_bytes=1024).get("a") == b"value"
+
+    now = [time.time()]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    expiring = DiskCache(path, max_bytes=1024, ttl=60)
+    expiring.set("b", b"value")
+    now[0] += 61
+    assert expiring.get("b") is None
+
+def test_disk_cache_evicts_least_recently_accessed_above_max_bytes(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    cache = DiskCache(str(tmp_path / "cache.sqlite"), max_bytes=250)
+    cache.EVICTION_INTERVAL = 1  # Check the size on every write
+    for key in ["a", "b"]:
+        now[0] += 1
+        cache.set(key, b"x" * 100)
+    now[0] += 1
+    cache.get("a")
+    now[0] += 1
+    cache.set("c", b"x" * 100)
+
+    # Only as much as needed to get back under max_bytes is evicted
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+def test_tiered_cache_falls_back_to_disk(tmp_path):
+    def make():
+        return TieredCache(
+            "test", max_entries=10, max_bytes=1024,
+            serialize=str.encode, deserialize=bytes.decode, directory=str(tmp_path)
+        )
+    make().set("a", "value")
+
+    cache = make()  # Fresh memory tier, same disk tier
+    assert cache.get("a") == "value"
+    assert cache.get("a") == "value"
+    assert cache.get("b") is None
+    assert cache.stats() == {
+        "memory_hits": 1, "disk_hits": 1, "misses": 1, "hit_rate": pytest.approx(2 / 3), "memory_entries": 1
+    }
+
+    cache.delete("a")
+    assert make().get("a") is None
+
+def test_lru_tracks_bytes_and_evicts_to_stay_under_max_bytes():
+    cache = LRUCache(max_entries=10, max_bytes=10, sizeof=len)
+    cache.set("a", "xxxx")
+    cache.set("b", "xxxx")
+    assert cache.bytes == 8
+
+    cache.set("a", "xx")  # Replacing an entry releases its old size
+    assert cache.bytes == 6
+    cache.set("c", "xxxxxx")  # b is now the least recently used
+    assert cache.get("b") is None
+    assert cache.bytes == 8
+
+    cache.pop("a")
+    assert cache.bytes == 6
+    cache.clear()
+    assert cache.bytes == 0 and len(cache) == 0
+
+def test_lru_expiry_releases_bytes(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    cache = LRUCache(max_entries=10, ttl=60, max_bytes=100, sizeof=len)
+    cache.set("a", "xxxx")
+
+    now[0] += 61
+    assert cache.get("a") is None
+    assert cache.bytes == 0
@@ -0,0 +1,73 @@
+import time
+import numpy as np
+import pytest
+from backend.vector_store import CachedVectorStore, LocalVectorStore
+
+class CountingStore(LocalVectorStore):
+    def __init__(self, path):
+        super().__init__(path)
+        self.fetched = []
+
+    def fetch(self, index, ids, namespace):
+        self.fetched.append(list(ids))
+        return super().fetch(index, ids, namespace)
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = CountingStore(str(tmp_path / "vectors"))
+    backend.ensure_index("jobs", dimension=4)
+    return backend
+
+@pytest.fixture
+def make_cache(backend, tmp_path):
+    def make(**kwargs):
+        return CachedVectorStore(backend, changes_path=str(tmp_path / "changes.sqlite"), **kwargs)
+    return make
+
+def test_upserts_and_fetches_are_served_from_memory(make_cache, backend):
+    cache = make_cache()
+    cache.upsert("jobs", [("a", [1, 0, 0, 0], {"years": 3})], namespace="jobs")
+    backend.upsert("jobs", [("b", [0, 1, 0, 0], {})], namespace="jobs")
+
+    records = cache.fetch("jobs", ["a", "b", "missing"], namespace="jobs")
+    assert set(records) == {"a", "b"}
+    assert records["a"].metadata == {"years": 3.0}  # As Pinecone would return it
+    assert backend.fetched == [["b", "missing"]]
+
+    cache.fetch("jobs", ["a", "b"], namespace="jobs")
+    assert backend.fetched == [["b", "missing"]]
+    assert cache.stats()["memory_hits"] == 3
+
+def test_cache_is_bounded_by_bytes(make_cache):
+    record_bytes = 4 * 4 + len("{}")
+    cache = make_cache(max_bytes=2 * record_bytes)
+    cache.upsert("jobs", [(id, [1, 0, 0, 0], {}) for id in "abc"], namespace="jobs")
+
+    assert len(cache.records) == 2
+    assert cache.records.bytes == 2 * record_bytes
+
+def test_cached_records_expire(make_cache, backend, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    cache = make_cache(ttl=60)
+    cache.upsert("jobs", [("a", [1, 0, 0, 0], {})], namespace="jobs")
+
+    now[0] += 61
+    cache.fetch("jobs", ["a"], namespace="jobs")
+    assert backend.fetched == [["a"]]
+
+def test_upserts_from_another_process_evict_cached_records(make_cache, backend):
+    api = make_cache()
+    worker = make_cache()  # Shares the change log, as another process on the host would
+    worker.upsert("jobs", [("a", [1, 0, 0, 0], {"v": 1})], namespace="jobs")
+    assert api.fetch("jobs", ["a"], namespace="jobs")["a"].metadata == {"v": 1}
+
+    worker.upsert("jobs", [("a", [0, 1, 0, 0], {"v": 2})], namespace="jobs")
+    record = api.fetch("jobs", ["a"], namespace="jobs")["a"]
+
+    assert record.metadata == {"v": 2}
+    np.testing.assert_allclose(record.values, [0, 1, 0, 0])
+    assert api.stats()["invalidations"] == 1
+    # The worker's own upsert doesn't invalidate its cache
+    worker.fetch("jobs", ["a"], namespace="jobs")
+    assert worker.stats()["invalidations"] == 0
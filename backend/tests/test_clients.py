@@ -0,0 +1,72 @@
+import pytest
+import pinecone
+from backend import clients
+from backend.vector_store import LocalVectorStore, PineconeVectorStore
+
+class FlakyStore(LocalVectorStore):
+    def __init__(self, path, failures):
+        super().__init__(path)
+        self.failures = failures
+        self.calls = 0
+
+    def fetch(self, index, ids, namespace):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("reset by peer")
+        return super().fetch(index, ids, namespace)
+
+@pytest.fixture
+def flaky_store(tmp_path, monkeypatch):
+    store = FlakyStore(str(tmp_path), failures=1)
+    monkeypatch.setattr(clients, "get_vector_store", lambda: store)
+    monkeypatch.setattr(clients, "VECTOR_RETRY_BACKOFF_SECONDS", 0)
+    return store
+
+def test_local_store_calls_are_not_retried(flaky_store):
+    with pytest.raises(ConnectionError):
+        clients.fetch_many("jobs", ["a"], "jobs")
+    assert flaky_store.calls == 1
+
+def test_remote_store_calls_are_retried(flaky_store, monkeypatch):
+    monkeypatch.setattr(flaky_store, "remote", True)
+
+    assert clients.fetch_many("jobs", ["a"], "jobs") == {}
+    assert flaky_store.calls == 2
+
+def test_fetch_many_splits_ids_into_batches(flaky_store, monkeypatch):
+    monkeypatch.setattr(flaky_store, "failures", 0)
+    monkeypatch.setattr(clients, "VECTOR_FETCH_BATCH_SIZE", 2)
+    flaky_store.upsert("jobs", [(str(i), [1.0] * 768, {}) for i in range(5)], namespace="jobs")
+
+    assert sorted(clients.fetch_many("jobs", [str(i) for i in range(5)] + ["0"], "jobs")) == ["0", "1", "2", "3", "4"]
+    assert flaky_store.calls == 3
+
+def test_pinecone_is_a_remote_store():
+    assert PineconeVectorStore.remote and not LocalVectorStore.remote
+
+class FakePinecone:
+    def describe_index(self, name):
+        return type("Description", (), {"host": f"{name}.example.invalid"})()
+
+    def Index(self, host):
+        return ("default handle", host)
+
+def test_unknown_pinecone_versions_get_the_default_index_handle(monkeypatch):
+    monkeypatch.setattr(clients, "get_pinecone", FakePinecone)
+    monkeypatch.setattr(pinecone, "__version__", "5.0.0")
+
+    assert clients.get_pinecone_index("future-index") == ("default handle", "future-index.example.invalid")
+
+def test_pinecone_3_index_handles_get_a_sized_connection_pool(monkeypatch):
+    monkeypatch.setattr(clients, "get_pinecone", FakePinecone)
+    monkeypatch.setattr(clients, "PINECONE_API_KEY", "test-key")
+
+    index = clients.get_pinecone_index("pooled-index")
+
+    assert isinstance(index, pinecone.Index)
+
+def test_set_client_replaces_the_shared_client():
+    handle = object()
+    clients.set_client("pinecone-index:preset-index", handle)
+
+    assert clients.get_pinecone_index("preset-index") is handle
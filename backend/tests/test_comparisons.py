@@ -0,0 +1,67 @@
+import time
+import threading
+from datetime import datetime, timedelta
+import pytest
+from backend import crud, schemas
+from backend.cache import SingleFlight
+
+def _comparison(user_id, peer_id):
+    return schemas.ComparisonResultCreate(
+        userId=user_id, peerId=peer_id, similarityScore=0.5, skillGaps=[], recommendations=[]
+    )
+
+def test_single_flight_runs_concurrent_calls_once():
+    flight = SingleFlight()
+    calls = []
+    started = threading.Event()
+
+    def compute():
+        calls.append(1)
+        started.set()
+        time.sleep(0.05)
+        return "result"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("key", compute))) for _ in range(5)]
+    threads[0].start()
+    started.wait()
+    for thread in threads[1:]:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == ["result"] * 5
+    assert flight.do("key", lambda: "again") == "again"  # Finished calls aren't reused
+
+def test_single_flight_raises_errors_and_forgets_the_call():
+    def fail():
+        raise ValueError("failed")
+
+    flight = SingleFlight()
+    with pytest.raises(ValueError):
+        flight.do("key", fail)
+    assert flight.do("key", lambda: "recovered") == "recovered"
+
+def test_latest_comparison_is_only_served_if_newer_than_created_after(db):
+    crud.create_comparison(db, _comparison("cmp-a", "cmp-b"), comparison_id="cmp-old")
+    newest = crud.create_comparison(db, _comparison("cmp-a", "cmp-b"), comparison_id="cmp-new")
+
+    assert crud.get_latest_comparison(db, "cmp-a", "cmp-b").id == "cmp-new"
+    assert crud.get_latest_comparison(db, "cmp-b", "cmp-a") is None
+    assert crud.get_latest_comparison(db, "cmp-a", "cmp-b", created_after=newest.created_at).id == "cmp-new"
+    assert crud.get_latest_comparison(db, "cmp-a", "cmp-b", created_after=datetime.utcnow() + timedelta(seconds=1)) is None
+
+def test_upserting_an_unchanged_record_keeps_updated_at(db, add_jobs):
+    [record] = add_jobs(["unchanged-job"]).values()
+    updated_at = crud.get_job(db, "unchanged-job").updated_at
+
+    crud.upsert_jobs(db, [("unchanged-job", schemas.JobCreate(**record))])
+    db.expire_all()
+    assert crud.get_job(db, "unchanged-job").updated_at == updated_at
+
+    crud.upsert_jobs(db, [("unchanged-job", schemas.JobCreate(**{**record, "keywords": ["Changed"]}))])
+    db.expire_all()
+    job = crud.get_job(db, "unchanged-job")
+    assert job.updated_at > updated_at
+    assert job.keywords == ["Changed"]
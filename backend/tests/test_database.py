@@ -0,0 +1,34 @@
+import pytest
+from types import SimpleNamespace
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+from backend import crud, database, models
+
+@pytest.mark.parametrize("url, expected", [
+    ("sqlite:///./recruitment.db", "sqlite+aiosqlite:///./recruitment.db"),
+    ("sqlite+pysqlite:////tmp/app.db", "sqlite+aiosqlite:////tmp/app.db"),
+    ("postgresql://app:secret@db:5432/recruitment", "postgresql+asyncpg://app:secret@db:5432/recruitment"),
+    ("postgresql+psycopg2://app@db/recruitment", "postgresql+asyncpg://app@db/recruitment"),
+])
+def test_async_url_uses_the_async_driver_for_the_same_database(url, expected):
+    assert database.async_database_url(url) == expected
+
+def test_async_url_fails_clearly_for_unknown_databases():
+    with pytest.raises(ValueError, match="ASYNC_DATABASE_URL"):
+        database.async_database_url("mysql+pymysql://app@db/recruitment")
+
+def test_sqlite_pragmas_are_registered_on_sqlite_engines():
+    assert database.engine.dialect.name == "sqlite"
+    assert event.contains(database.engine, "connect", database._set_sqlite_pragmas)
+    assert event.contains(database.async_engine.sync_engine, "connect", database._set_sqlite_pragmas)
+    with database.engine.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+
+@pytest.mark.parametrize("name", ["sqlite", "postgresql"])
+def test_upserts_use_the_insert_construct_of_the_session_database(name):
+    dialect = {"sqlite": sqlite.dialect(), "postgresql": postgresql.dialect()}[name]
+    db = SimpleNamespace(get_bind=lambda: SimpleNamespace(dialect=dialect))
+
+    statement = crud._upsert_insert(db, models.Skill).on_conflict_do_nothing(index_elements=[models.Skill.name])
+
+    assert "ON CONFLICT (name) DO NOTHING" in str(statement.compile(dialect=dialect))
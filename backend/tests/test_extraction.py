@@ -0,0 +1,113 @@
+import os
+import time
+import signal
+import asyncio
+import threading
+import fitz
+import pytest
+from backend.extraction import ExtractionError, PDFExtractor, _extract
+
+def _pdf(pages):
+    document = fitz.open()
+    for text in pages:
+        document.new_page().insert_text((72, 72), text)
+    data = document.tobytes()
+    document.close()
+    return data
+
+def slow_extract(pdf, max_chars, max_pages):
+    """Extraction that hangs on documents starting with b"slow"."""
+    if pdf.startswith(b"slow"):
+        time.sleep(60)
+    return pdf.decode()[:max_chars]
+
+def crash_once_extract(pdf, max_chars, max_pages):
+    """Extraction whose worker dies on documents starting with b"crash"."""
+    if pdf.startswith(b"crash"):
+        os.kill(os.getpid(), signal.SIGKILL)
+    return pdf.decode()[:max_chars]
+
+@pytest.fixture
+def extractor():
+    extractors = []
+
+    def make(**kwargs):
+        extractors.append(PDFExtractor(**kwargs))
+        return extractors[-1]
+    yield make
+    for extractor in extractors:
+        extractor.shutdown()
+
+def test_extraction_stops_at_the_character_budget():
+    pdf = _pdf(["first page " * 5, "second page " * 5, "third page"])
+
+    text = _extract(pdf, max_chars=70, max_pages=10)
+
+    assert len(text) == 70
+    assert text.startswith("first page")
+    assert "third" not in text
+
+def test_documents_over_the_page_limit_are_rejected(extractor):
+    with pytest.raises(ExtractionError, match="3 pages"):
+        extractor(workers=1).extract(_pdf(["a", "b", "c"]), max_chars=100, max_pages=2)
+
+def test_invalid_documents_raise_extraction_error_and_keep_the_worker(extractor):
+    pdf_extractor = extractor(workers=1)
+    with pytest.raises(ExtractionError):
+        pdf_extractor.extract(b"not a pdf", max_chars=100)
+    worker = pdf_extractor._idle[0]
+
+    assert "hello" in pdf_extractor.extract(_pdf(["hello"]), max_chars=100)
+    assert pdf_extractor._idle == [worker]
+
+def test_a_timeout_only_kills_its_own_worker(extractor):
+    pdf_extractor = extractor(workers=2, timeout=0.5, extract=slow_extract)
+    pdf_extractor.extract(b"warm up", max_chars=100)
+    pdf_extractor.extract(b"warm up", max_chars=100)
+
+    errors = []
+    slow = threading.Thread(target=lambda: errors.append(_raises(pdf_extractor.extract, b"slow", 100)))
+    slow.start()
+    time.sleep(0.1)
+    # Runs on the other worker while the slow document is in flight
+    assert pdf_extractor.extract(b"fast", max_chars=100) == "fast"
+    slow.join()
+
+    assert isinstance(errors[0], ExtractionError) and "timed out" in str(errors[0])
+    assert len(pdf_extractor._idle) == 1
+    assert all(worker.process.is_alive() for worker in pdf_extractor._idle)
+    assert pdf_extractor.extract(b"after", max_chars=3) == "aft"
+
+def test_a_crashed_worker_is_replaced_and_the_document_retried_once(extractor):
+    pdf_extractor = extractor(workers=1, extract=crash_once_extract)
+
+    with pytest.raises(ExtractionError, match="crashed"):
+        pdf_extractor.extract(b"crash", max_chars=100)
+    assert pdf_extractor.extract(b"fine", max_chars=100) == "fine"
+
+def test_an_interrupted_worker_is_killed_not_reused(extractor, monkeypatch):
+    pdf_extractor = extractor(workers=1, extract=slow_extract)
+    pdf_extractor.extract(b"warm up", max_chars=100)
+    [worker] = pdf_extractor._idle
+
+    def interrupted(timeout):
+        raise KeyboardInterrupt
+    monkeypatch.setattr(worker._conn, "poll", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        pdf_extractor.extract(b"first", max_chars=100)
+
+    assert pdf_extractor._idle == []
+    assert not worker.process.is_alive()
+    # A fresh worker, so the unread reply to "first" can't be taken for this one
+    assert pdf_extractor.extract(b"second", max_chars=100) == "second"
+
+def test_aextract(extractor):
+    pdf_extractor = extractor(workers=1)
+
+    assert "async" in asyncio.run(pdf_extractor.aextract(_pdf(["async"]), max_chars=100))
+
+def _raises(fn, *args):
+    try:
+        fn(*args)
+    except Exception as e:
+        return e
@@ -0,0 +1,58 @@
+import io
+import asyncio
+import zipfile
+from backend import crud, ingest, models
+from backend.uploads import UploadedDocument
+
+def _zip(entries):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in entries.items():
+            archive.writestr(name, data)
+    return UploadedDocument("documents.zip", data=buffer.getvalue())
+
+def test_list_items_skips_directories_and_os_metadata():
+    document = _zip({"a.txt": "a", "docs/b.txt": "b", "docs/.DS_Store": "", "__MACOSX/a.txt": ""})
+
+    assert [item.name for item in ingest.list_items([document])] == ["a.txt", "docs/b.txt"]
+
+def test_each_archive_is_opened_once_per_batch(monkeypatch):
+    opened = []
+
+    class CountingZipFile(zipfile.ZipFile):
+        def __init__(self, *args, **kwargs):
+            opened.append(1)
+            super().__init__(*args, **kwargs)
+
+    document = _zip({f"{i}.txt": f"job {i}" for i in range(20)})
+    items = ingest.list_items([document])
+    monkeypatch.setattr(zipfile, "ZipFile", CountingZipFile)
+
+    archives = {}
+    assert [ingest._read_item(item, archives) for item in items] == [f"job {i}".encode() for i in range(20)]
+    assert len(opened) == 1
+
+def test_run_batch_saves_embeds_and_summarizes(db, llm, embeddings):
+    document = _zip({f"posting-{i}.txt": f"Batch posting {i}" for i in range(3)})
+    items = ingest.list_items([document])
+    batch = crud.create_ingest_batch(db, "job", len(items))
+
+    asyncio.run(ingest.run_batch(batch.id, "job", [document], items))
+
+    db.expire_all()
+    batch = crud.get_ingest_batch(db, batch.id)
+    assert (batch.status, batch.succeeded, batch.failed) == ("completed", 3, 0)
+    new_jobs = db.query(models.Job).filter(models.Job.created_at >= batch.created_at).all()
+    assert len(new_jobs) == 3
+    assert all(db.get(models.RAGSummary, job.id) is not None for job in new_jobs)
+
+def test_running_batches_are_failed_at_startup(db):
+    running = crud.create_ingest_batch(db, "job", 1)
+    finished = crud.create_ingest_batch(db, "job", 1)
+    crud.update_ingest_batch(db, finished.id, status="completed")
+
+    assert crud.fail_running_ingest_batches(db) >= 1
+
+    db.expire_all()
+    assert crud.get_ingest_batch(db, running.id).status == "failed"
+    assert crud.get_ingest_batch(db, finished.id).status == "completed"
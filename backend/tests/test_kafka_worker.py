@@ -0,0 +1,184 @@
+import threading
+import pytest
+from backend import kafka_worker
+
+def test_embedding_items_are_grouped_by_type_and_deduplicated():
+    jobs, applicants = kafka_worker._group_embedding_items([
+        {"type": "job", "data": {"id": "j1", "title": "old"}},
+        {"type": "applicant", "data": {"id": "a1"}},
+        {"type": "job", "data": {"id": "j1", "title": "new"}},
+        {"type": "job", "data": {"id": "j2"}}
+    ])
+
+    assert jobs == {"j1": {"id": "j1", "title": "new"}, "j2": {"id": "j2"}}
+    assert applicants == {"a1": {"id": "a1"}}
+
+def test_malformed_embedding_items_are_skipped():
+    jobs, applicants = kafka_worker._group_embedding_items([
+        {"type": "job", "data": {"title": "no id"}},
+        {"data": {"id": "no-type"}},
+        {"type": "recruiter", "data": {"id": "r1"}},
+        {"type": "applicant"},
+        {"type": "applicant", "data": "not a dict"},
+        "not a dict",
+        {"type": "applicant", "data": {"id": "a1"}}
+    ])
+
+    assert jobs == {}
+    assert applicants == {"a1": {"id": "a1"}}
+
+class FakeMessage:
+    def __init__(self, offset, partition=0, topic="parse-job", key=None, value=b'{"text": "job"}'):
+        self._offset = offset
+        self._partition = partition
+        self._topic = topic
+        self._key = key
+        self._value = value
+
+    def offset(self):
+        return self._offset
+
+    def partition(self):
+        return self._partition
+
+    def topic(self):
+        return self._topic
+
+    def key(self):
+        return self._key
+
+    def value(self):
+        return self._value
+
+def committed(tracker):
+    return {(tp.topic, tp.partition): tp.offset for tp in tracker.commit_offsets()}
+
+def test_offsets_commit_up_to_the_oldest_in_flight_message():
+    tracker = kafka_worker.OffsetTracker()
+    messages = [FakeMessage(offset) for offset in range(3)]
+    for msg in messages:
+        tracker.add(msg)
+
+    tracker.done(messages[1])
+    tracker.done(messages[2])
+    assert committed(tracker) == {("parse-job", 0): 0}
+    assert tracker.in_flight() == 1
+
+    tracker.done(messages[0])
+    assert committed(tracker) == {("parse-job", 0): 3}
+    assert committed(tracker) == {}  # Only offsets that moved are returned
+
+def test_offsets_are_tracked_per_partition_and_forgotten_on_revoke():
+    tracker = kafka_worker.OffsetTracker()
+    tracker.add(FakeMessage(5, partition=0))
+    tracker.add(FakeMessage(7, partition=1))
+    tracker.done(FakeMessage(7, partition=1))
+
+    assert committed(tracker) == {("parse-job", 0): 5, ("parse-job", 1): 8}
+
+    tracker.forget([kafka_worker.TopicPartition("parse-job", 0)])
+    assert tracker.in_flight() == 0
+    assert committed(tracker) == {}
+
+@pytest.fixture
+def worker(monkeypatch):
+    monkeypatch.setattr(kafka_worker, "WORKER_MAX_RETRIES", 1)
+    monkeypatch.setattr(kafka_worker, "RETRY_BACKOFF_SECONDS", 0)
+    worker = kafka_worker.ConsumerWorker(consumer=None, concurrency=2)
+    yield worker
+    worker.shutdown()
+
+def fail(*args):
+    raise RuntimeError("boom")
+
+def test_failed_messages_are_dead_lettered_and_committed(worker, monkeypatch):
+    dead_letters = []
+    monkeypatch.setattr(kafka_worker, "process_message", fail)
+    monkeypatch.setattr(kafka_worker, "send_to_dead_letter", lambda msg, error: dead_letters.append((msg.offset(), str(error))))
+
+    worker.dispatch([FakeMessage(0), FakeMessage(1, value=b"not json")])
+    worker.drain()
+
+    assert sorted(offset for offset, _ in dead_letters) == [0, 1]
+    assert worker.tracker.in_flight() == 0
+    assert committed(worker.tracker) == {("parse-job", 0): 2}
+    assert not worker.failed.is_set()
+
+def test_a_failed_dead_letter_publish_keeps_the_offset_and_stops_the_worker(worker, monkeypatch):
+    attempts = []
+    monkeypatch.setattr(kafka_worker, "process_message", lambda topic, data: None)
+
+    def send_to_dead_letter(msg, error):
+        attempts.append(msg.offset())
+        raise RuntimeError("broker unavailable")
+    monkeypatch.setattr(kafka_worker, "send_to_dead_letter", send_to_dead_letter)
+
+    worker.dispatch([FakeMessage(0), FakeMessage(1, value=b"not json"), FakeMessage(2)])
+    worker.drain()
+
+    assert attempts == [1, 1]  # Retried before giving up
+    assert worker.failed.is_set()
+    assert worker.tracker.in_flight() == 1
+    assert committed(worker.tracker) == {("parse-job", 0): 1}
+
+def embedding_messages(job_ids):
+    return [
+        FakeMessage(offset, topic="generate-embedding", value=f'{{"type": "job", "data": {{"id": "{job_id}"}}}}'.encode())
+        for offset, job_id in enumerate(job_ids)
+    ]
+
+def test_embedding_batches_dead_letter_only_the_failing_messages(worker, monkeypatch):
+    dead_letters = []
+    monkeypatch.setattr(kafka_worker, "send_to_dead_letter", lambda msg, error: dead_letters.append(msg.offset()))
+
+    def process_embedding_batch(items):
+        if any(item["data"]["id"] == "bad" for item in items):
+            raise RuntimeError("boom")
+        return kafka_worker._group_embedding_items(items)
+    monkeypatch.setattr(kafka_worker, "process_embedding_batch", process_embedding_batch)
+    monkeypatch.setattr(kafka_worker, "precompute_summary", lambda db, entity_type, item_data: None)
+
+    worker.dispatch(embedding_messages(["j1", "bad", "j2"]))
+    worker.drain()
+
+    assert dead_letters == [1]
+    assert committed(worker.tracker) == {("generate-embedding", 0): 3}
+
+def test_summaries_run_off_the_embedding_lane(worker, monkeypatch):
+    release = threading.Event()
+    summarized = []
+
+    def precompute_summary(db, entity_type, item_data):
+        release.wait(5)
+        summarized.append(item_data["id"])
+    monkeypatch.setattr(kafka_worker, "process_embedding_batch", kafka_worker._group_embedding_items)
+    monkeypatch.setattr(kafka_worker, "precompute_summary", precompute_summary)
+
+    worker.dispatch(embedding_messages(["s1", "s2"]))
+    worker.drain()
+
+    # The batch is done and committed while its summaries are still running
+    assert committed(worker.tracker) == {("generate-embedding", 0): 2}
+    assert summarized == []
+    release.set()
+    worker.summary_pool.shutdown(wait=True)
+    assert sorted(summarized) == ["s1", "s2"]
+
+def test_summaries_past_the_pending_limit_are_skipped(monkeypatch):
+    monkeypatch.setattr(kafka_worker, "SUMMARY_MAX_PENDING", 1)
+    release = threading.Event()
+    summarized = []
+
+    def precompute_summary(db, entity_type, item_data):
+        release.wait(5)
+        summarized.append(item_data["id"])
+    monkeypatch.setattr(kafka_worker, "process_embedding_batch", kafka_worker._group_embedding_items)
+    monkeypatch.setattr(kafka_worker, "precompute_summary", precompute_summary)
+    worker = kafka_worker.ConsumerWorker(consumer=None, concurrency=1)
+
+    worker.dispatch(embedding_messages(["p1", "p2"]))
+    worker.drain()
+    release.set()
+    worker.shutdown()
+
+    assert summarized == ["p1"]
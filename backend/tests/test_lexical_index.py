@@ -0,0 +1,62 @@
+import os
+from backend import lexical_index
+from backend.lexical_index import BM25Index, tokenize
+
+def test_tokens_keep_technical_terms_whole_and_drop_stopwords():
+    assert tokenize("Senior C++ and Node.js developer for CI/CD, C# a plus") == [
+        "senior", "c++", "node.js", "developer", "ci/cd", "c#", "plus"
+    ]
+
+def test_search_ranks_rarer_and_repeated_terms_higher(tmp_path):
+    index = BM25Index("jobs", str(tmp_path))
+    index.upsert([
+        ("kubernetes", "Platform engineer, Kubernetes and Kubernetes operators"),
+        ("python", "Python engineer"),
+        ("both", "Python engineer with some Kubernetes"),
+        ("other", "Accountant")
+    ])
+
+    results = index.search("kubernetes engineer", top_k=3)
+
+    assert [doc_id for doc_id, _ in results] == ["kubernetes", "both", "python"]
+    assert results[0][1] > results[1][1] > results[2][1] > 0
+    assert index.search("nothing matches", top_k=3) == []
+
+def test_upserts_replace_and_deletes_remove_documents(tmp_path):
+    index = BM25Index("jobs", str(tmp_path))
+    index.upsert([("a", "python developer"), ("b", "go developer")])
+    index.upsert([("a", "rust developer")])
+    index.delete(["b"])
+
+    assert len(index) == 1
+    assert index.search("python", top_k=5) == []
+    assert [doc_id for doc_id, _ in index.search("rust go", top_k=5)] == ["a"]
+
+def test_other_instances_see_new_writes_and_compaction(tmp_path):
+    writer = BM25Index("jobs", str(tmp_path))
+    reader = BM25Index("jobs", str(tmp_path))
+    writer.upsert([(f"doc-{i}", f"python developer {i}") for i in range(600)])
+    writer.upsert([(f"doc-{i}", f"rust developer {i}") for i in range(600)])
+    assert len(reader) == 600
+
+    writer.upsert([("doc-0", "kotlin developer")])
+    assert writer._log_lines <= 600  # Rewritten once superseded lines outnumbered live documents
+
+    assert [doc_id for doc_id, _ in reader.search("kotlin", top_k=5)] == ["doc-0"]
+    assert len(reader.search("python", top_k=5)) == 0
+    assert len(reader) == 600
+
+def test_a_reader_checks_the_log_it_opened_not_the_one_it_stat_ed(tmp_path, monkeypatch):
+    writer = BM25Index("jobs", str(tmp_path))
+    reader = BM25Index("jobs", str(tmp_path))
+    writer.upsert([("a", "python developer"), ("b", "go developer")])
+    assert len(reader) == 2
+
+    # Compaction replaces the log between the reader's stat and its open
+    writer.upsert([("a", "rust developer")])
+    stale = os.stat(writer.log_path)
+    writer._compact()
+    monkeypatch.setattr(lexical_index.os, "stat", lambda path, **kwargs: stale)
+
+    assert [doc_id for doc_id, _ in reader.search("rust", top_k=5)] == ["a"]
+    assert reader.search("python", top_k=5) == []
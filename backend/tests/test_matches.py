@@ -0,0 +1,95 @@
+import pytest
+from backend import crud, kafka_worker, matches, pipelines
+from backend.vector_store import LocalVectorStore
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """A scratch vector store with 2-d vectors, and match lists of two entries."""
+    store = LocalVectorStore(str(tmp_path))
+    for index in (pipelines.JOBS_INDEX, pipelines.APPS_INDEX):
+        store.ensure_index(index, dimension=2)
+    monkeypatch.setattr(pipelines, "vector_store", store)
+    monkeypatch.setattr(matches, "fetch_many", store.fetch)
+    monkeypatch.setattr(matches, "MATCHES_TOP_K", 2)
+    return store
+
+def upsert(store, entity_type, vectors):
+    side = matches.SIDES[entity_type]
+    store.upsert(side["index"], [(id, vector, {}) for id, vector in vectors.items()], namespace=side["namespace"])
+
+def stored(db, entity_type, entity_id):
+    return [row.match_id for row in crud.get_matches(db, entity_type, entity_id, 10)]
+
+def test_new_entities_are_merged_into_existing_lists_and_trimmed(db, store):
+    upsert(store, "job", {"mj-1": [1, 0], "mj-2": [0, 1]})
+    matches.update_matches(db, "job", ["mj-1", "mj-2"])
+    assert stored(db, "job", "mj-1") == []
+
+    upsert(store, "applicant", {"ma-1": [1, 0.1], "ma-2": [1, 0.5], "ma-3": [0.2, 1]})
+    matches.update_matches(db, "applicant", ["ma-1", "ma-2", "ma-3"])
+    assert stored(db, "applicant", "ma-1") == ["mj-1", "mj-2"]
+    assert stored(db, "job", "mj-1") == ["ma-1", "ma-2"]
+    assert stored(db, "job", "mj-2") == ["ma-3", "ma-2"]
+    computed_at = crud.get_match_list(db, "job", "mj-1").computed_at
+
+    # A closer applicant pushes the lowest entry out; the list is merged, not rebuilt
+    upsert(store, "applicant", {"ma-4": [1, 0]})
+    matches.update_matches(db, "applicant", ["ma-4"])
+    assert stored(db, "job", "mj-1") == ["ma-4", "ma-1"]
+    assert stored(db, "job", "mj-2") == ["ma-3", "ma-2"]
+    match_list = crud.get_match_list(db, "job", "mj-1")
+    assert match_list.computed_at == computed_at
+    assert match_list.updated_at > computed_at
+
+def test_lists_holding_an_old_score_are_rebuilt(db, store):
+    upsert(store, "job", {"sj-1": [1, 0], "sj-2": [0, 1]})
+    upsert(store, "applicant", {"sa-1": [1, 0.1], "sa-2": [1, 0.5], "sa-3": [0.2, 1]})
+    matches.update_matches(db, "job", ["sj-1", "sj-2"])
+    matches.update_matches(db, "applicant", ["sa-1", "sa-2", "sa-3"])
+    computed_at = crud.get_match_list(db, "job", "sj-1").computed_at
+
+    # sa-1 moves away from sj-1, whose list still holds its old score
+    upsert(store, "applicant", {"sa-1": [0, 1]})
+    matches.update_matches(db, "applicant", ["sa-1"])
+
+    assert stored(db, "job", "sj-1") == ["sa-2", "sa-3"]
+    assert crud.get_match_list(db, "job", "sj-1").computed_at > computed_at
+    assert stored(db, "job", "sj-2") == ["sa-1", "sa-3"]
+
+def test_entities_join_lists_of_owners_outside_their_own_top_k(db, store):
+    upsert(store, "job", {"aj-near": [1, 0.05], "aj-nearer": [1, 0.02], "aj-far": [1, 0.8]})
+    upsert(store, "applicant", {"aa-1": [0, 1], "aa-2": [0.1, 1]})
+    matches.update_matches(db, "job", ["aj-near", "aj-nearer", "aj-far"])
+    assert stored(db, "job", "aj-far") == ["aa-2", "aa-1"]
+
+    # aj-far isn't in the new applicant's top 2, but the applicant is in aj-far's
+    upsert(store, "applicant", {"aa-new": [1, 0]})
+    matches.update_matches(db, "applicant", ["aa-new"])
+
+    assert stored(db, "applicant", "aa-new") == ["aj-nearer", "aj-near"]
+    assert stored(db, "job", "aj-far") == ["aa-new", "aa-2"]
+
+def test_merge_entries_keeps_the_top_k(monkeypatch):
+    monkeypatch.setattr(matches, "MATCHES_TOP_K", 3)
+
+    added, removed = matches._merge_entries(
+        {"full": {"a": 0.9, "b": 0.5, "c": 0.4}, "short": {"a": 0.9}},
+        {"full": {"x": 0.6, "y": 0.1}, "short": {"x": 0.2}}
+    )
+
+    assert sorted(added) == [("full", "x", 0.6), ("short", "x", 0.2)]
+    assert removed == [("full", "c")]
+
+def test_a_match_update_failure_does_not_fail_the_embedding_batch(db, monkeypatch):
+    calls = []
+    monkeypatch.setattr(kafka_worker, "upsert_job_embeddings", lambda jobs: calls.append("embed"))
+    monkeypatch.setattr(kafka_worker, "upsert_applicant_embeddings", lambda applicants: None)
+
+    def update_matches(db, entity_type, ids):
+        raise RuntimeError("database is locked")
+    monkeypatch.setattr(kafka_worker, "update_matches", update_matches)
+
+    jobs, applicants = kafka_worker.process_embedding_batch([{"type": "job", "data": {"id": "mf-1"}}])
+
+    assert calls == ["embed"]
+    assert list(jobs) == ["mf-1"]
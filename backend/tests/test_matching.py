@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+from backend.matching import normalize_rows, tiled_top_k
+
+def brute_force_top_k(queries, candidates, k):
+    scores = queries @ candidates.T
+    order = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+    return order, np.take_along_axis(scores, order, axis=1)
+
+@pytest.mark.parametrize("candidates, k, tile_rows", [
+    (100, 5, 7),
+    (100, 5, 100),
+    (100, 30, 8),  # k larger than a tile
+    (3, 5, 2),  # Fewer candidates than k
+])
+def test_tiled_top_k_matches_brute_force(candidates, k, tile_rows):
+    rng = np.random.default_rng(candidates + k + tile_rows)
+    queries = normalize_rows(rng.standard_normal((13, 16)))
+    matrix = normalize_rows(rng.standard_normal((candidates, 16)))
+
+    indices, scores = tiled_top_k(queries, matrix, k, tile_rows=tile_rows)
+    expected_indices, expected_scores = brute_force_top_k(queries, matrix, k)
+
+    assert indices.shape == (13, min(k, candidates))
+    np.testing.assert_array_equal(indices, expected_indices)
+    np.testing.assert_allclose(scores, expected_scores, rtol=1e-6)
+
+def test_tiled_top_k_handles_empty_inputs():
+    queries = normalize_rows(np.ones((2, 4)))
+
+    indices, scores = tiled_top_k(queries, np.zeros((0, 4), dtype=np.float32), 5)
+
+    assert indices.shape == scores.shape == (2, 0)
+
+def test_normalize_rows_leaves_zero_vectors_alone():
+    matrix = normalize_rows([[3, 4], [0, 0]])
+
+    np.testing.assert_allclose(matrix, [[0.6, 0.8], [0, 0]])
@@ -0,0 +1,59 @@
+import pytest
+from fastapi import HTTPException
+from backend import crud, main
+
+def walk(db, limit, **kwargs):
+    """Every job, page by page, following the keyset cursor."""
+    rows, after = [], None
+    while True:
+        page = crud.get_jobs(db, limit=limit, after=after, **kwargs)
+        rows.extend(page)
+        if len(page) < limit:
+            return rows
+        after = (page[-1].created_at, page[-1].id)
+
+def test_keyset_pages_cover_every_row_once_in_order(db, add_jobs):
+    # One bulk insert, so these share created_at and are ordered by id
+    add_jobs([f"page-{i:02d}" for i in range(10)])
+    everything = [job.id for job in crud.get_jobs(db, limit=None)]
+
+    assert [job.id for job in walk(db, limit=3)] == everything
+    ids = [job_id for job_id in everything if job_id.startswith("page-")]
+    assert ids == sorted(ids)
+
+def test_rows_added_while_paging_are_neither_skipped_nor_repeated(db, add_jobs):
+    add_jobs([f"grow-{i}" for i in range(4)])
+    first_page = crud.get_jobs(db, limit=2)
+
+    add_jobs(["grow-late"])
+    rest = []
+    after = (first_page[-1].created_at, first_page[-1].id)
+    while True:
+        page = crud.get_jobs(db, limit=2, after=after)
+        rest.extend(page)
+        if len(page) < 2:
+            break
+        after = (page[-1].created_at, page[-1].id)
+
+    ids = [job.id for job in first_page + rest]
+    assert len(ids) == len(set(ids))
+    assert "grow-late" in ids
+
+def test_summary_pages_load_only_the_list_columns(db, add_jobs):
+    add_jobs(["summary-1"])
+
+    job = next(job for job in walk(db, limit=50, columns=crud.JOB_LIST_COLUMNS) if job.id == "summary-1")
+
+    assert "title" in job.__dict__
+    assert "description" not in job.__dict__
+
+def test_cursors_round_trip_and_reject_garbage(db, add_jobs):
+    add_jobs(["cursor-1"])
+    job = crud.get_job(db, "cursor-1")
+
+    assert main._decode_cursor(main._encode_cursor(job)) == (job.created_at, "cursor-1")
+    assert main._decode_cursor(None) is None
+    for cursor in ["not base64!", "bm8gc2VwYXJhdG9y", "eHx5"]:  # No separator; "x|y" has no date
+        with pytest.raises(HTTPException) as error:
+            main._decode_cursor(cursor)
+        assert error.value.status_code == 400
@@ -0,0 +1,134 @@
+import asyncio
+import threading
+import numpy as np
+import pytest
+from backend import pipelines
+
+def test_canonical_text_ignores_indentation_and_blank_lines():
+    assert pipelines.canonical_text("\n    Title: A\n\n      Skills: B  \n") == "Title: A\nSkills: B"
+
+def test_embed_texts_embeds_each_distinct_text_once(embeddings):
+    vectors = pipelines.embed_texts(["embed one", "  embed one", "embed two"])
+
+    assert embeddings.calls == 1
+    np.testing.assert_allclose(vectors[0], vectors[1])
+    assert not np.allclose(vectors[0], vectors[2])
+
+    again = pipelines.embed_texts(["embed two", "embed one"])
+    assert embeddings.calls == 1
+    np.testing.assert_allclose(again[0], vectors[2], rtol=1e-6)
+
+def test_embed_texts_reads_vectors_back_from_disk(embeddings):
+    first = pipelines.embed_texts(["embed from disk"])[0]
+    pipelines.embedding_cache.memory.clear()
+
+    second = pipelines.embed_texts(["embed from disk"])[0]
+
+    assert embeddings.calls == 1
+    np.testing.assert_allclose(second, first, rtol=1e-6)
+
+def test_parse_job_description_reuses_an_earlier_parse(llm):
+    first, first_cached = pipelines.parse_job_description_cached("Parse cache posting")
+    second, second_cached = pipelines.parse_job_description_cached("Parse cache posting")
+
+    assert llm.calls == 1
+    assert (first_cached, second_cached) == (False, True)
+    assert first["id"] != second["id"]
+    assert {**first, "id": None} == {**second, "id": None}
+
+def test_parse_cache_is_keyed_by_prompt_version(llm, monkeypatch):
+    pipelines.parse_job_description_cached("Prompt version posting")
+    monkeypatch.setattr(pipelines, "JOB_PROMPT_VERSION", "test")
+
+    _, cached = pipelines.parse_job_description_cached("Prompt version posting")
+
+    assert not cached
+    assert llm.calls == 2
+
+def test_unparseable_responses_are_not_cached(llm, monkeypatch):
+    monkeypatch.setattr(llm, "_answer", lambda prompt: "not json")
+    monkeypatch.setattr(pipelines, "_response_text", lambda response: "{not json")
+
+    job, _ = pipelines.parse_job_description_cached("Unparseable posting")
+    _, cached = pipelines.parse_job_description_cached("Unparseable posting")
+
+    assert job["title"] == "Unknown Position"
+    assert not cached
+    assert llm.calls == 2
+
+def _record_cache_threads(monkeypatch, cache):
+    threads = []
+    original_get, original_set = cache.get, cache.set
+    monkeypatch.setattr(cache, "get", lambda *args: threads.append(threading.current_thread()) or original_get(*args))
+    monkeypatch.setattr(cache, "set", lambda *args: threads.append(threading.current_thread()) or original_set(*args))
+    return threads
+
+def test_aembed_texts_matches_embed_texts_and_uses_the_cache_off_the_event_loop(embeddings, monkeypatch):
+    threads = _record_cache_threads(monkeypatch, pipelines.embedding_cache)
+
+    vectors = asyncio.run(pipelines.aembed_texts(["async one", "async one", "async two"]))
+
+    assert embeddings.calls == 1
+    assert threads and threading.main_thread() not in threads
+    np.testing.assert_allclose(pipelines.embed_texts(["async two"])[0], vectors[2], rtol=1e-6)
+    assert embeddings.calls == 1
+
+def test_aparse_job_description_uses_the_cache_off_the_event_loop(llm, monkeypatch):
+    threads = _record_cache_threads(monkeypatch, pipelines.parse_cache)
+
+    _, first_cached = asyncio.run(pipelines.aparse_job_description_cached("Async posting"))
+    _, second_cached = asyncio.run(pipelines.aparse_job_description_cached("Async posting"))
+
+    assert (first_cached, second_cached) == (False, True)
+    assert len(threads) == 3  # Miss, store, hit
+    assert threading.main_thread() not in threads
+
+def test_hybrid_results_keep_cosine_scores_and_add_fusion_scores(tmp_path, monkeypatch):
+    from backend.lexical_index import BM25Index
+    from backend.vector_store import LocalVectorStore
+    store = LocalVectorStore(str(tmp_path / "vectors"))
+    store.ensure_index("jobs", dimension=2)
+    store.upsert("jobs", [("x", [1, 0], {}), ("xy", [1, 1], {}), ("y", [0, 1], {})], namespace="jobs")
+    lexical = BM25Index("jobs", str(tmp_path / "lexical"))
+    lexical.upsert([("y", "Kubernetes engineer")])
+    monkeypatch.setattr(pipelines, "vector_store", store)
+    monkeypatch.setattr(pipelines, "fetch_many", store.fetch)
+    monkeypatch.setattr(pipelines, "HYBRID_CANDIDATES", 1)
+
+    fused = pipelines._hybrid_query("jobs", "jobs", lexical, [1, 0], "kubernetes", 2, None)
+
+    # y is only a keyword hit; its score is still its cosine similarity
+    assert [(match.id, round(match.score, 6)) for match, _ in fused] == [("x", 1.0), ("y", 0.0)]
+    assert [fusion_score for _, fusion_score in fused] == [pytest.approx(1 / 61)] * 2
+    result = pipelines.job_match_result("y", 0.0, {}, fused[1][1])
+    assert result["score"] == 0.0 and result["fusionScore"] == pytest.approx(1 / 61)
+
+def test_batch_matching_merges_job_tiles_into_the_same_top_k(tmp_path, monkeypatch):
+    from backend.vector_store import LocalVectorStore
+    rng = np.random.default_rng(0)
+    store = LocalVectorStore(str(tmp_path))
+    for index in (pipelines.JOBS_INDEX, pipelines.APPS_INDEX):
+        store.ensure_index(index, dimension=16)
+    store.upsert(pipelines.JOBS_INDEX, [
+        (f"job-{i}", rng.standard_normal(16), {"keywords": ["Python"] if i % 2 else ["Go"]}) for i in range(50)
+    ], namespace="jobs")
+    store.upsert(pipelines.APPS_INDEX, [(f"app-{i}", rng.standard_normal(16), {}) for i in range(7)], namespace="applicants")
+    monkeypatch.setattr(pipelines, "fetch_many", store.fetch)
+    monkeypatch.setattr(pipelines, "MATCH_QUERY_TILE", 3)
+    applicant_ids = [f"app-{i}" for i in range(7)] + ["missing"]
+    job_ids = [f"job-{i}" for i in range(50)]
+    filters = pipelines.SearchFilters(keywords=["Python"])
+
+    def ranked(candidate_tile):
+        monkeypatch.setattr(pipelines, "MATCH_CANDIDATE_TILE", candidate_tile)
+        return [
+            (result["applicantId"], [(match["item"]["id"], round(match["score"], 5)) for match in result["matches"]])
+            for result in pipelines.match_jobs_for_applicants(applicant_ids, job_ids, top_k=4, filters=filters)
+        ]
+
+    single_tile = ranked(100)
+    assert [applicant_id for applicant_id, _ in single_tile] == applicant_ids
+    assert single_tile[-1] == ("missing", [])
+    assert all(len(matches) == 4 for _, matches in single_tile[:-1])
+    assert all(int(job_id.split("-")[1]) % 2 for _, matches in single_tile for job_id, _ in matches)
+    assert ranked(6) == single_tile
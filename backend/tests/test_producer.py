@@ -0,0 +1,49 @@
+import time
+import pytest
+from confluent_kafka import KafkaException
+from backend import producer as producer_module
+from backend.producer import MessageProducer
+
+# Nothing listens here, so messages stay queued until they time out
+UNREACHABLE = {"bootstrap.servers": "127.0.0.1:1", "message.timeout.ms": 300}
+
+@pytest.fixture
+def make_producer():
+    producers = []
+
+    def make(**conf):
+        producers.append(MessageProducer({**UNREACHABLE, **conf}))
+        return producers[-1]
+    yield make
+    for producer in producers:
+        producer.close(timeout=0)
+
+def test_produce_returns_without_waiting_for_the_broker(make_producer):
+    producer = make_producer()
+
+    start = time.monotonic()
+    future = producer.produce("topic", {"id": 1}, key="1")
+
+    assert time.monotonic() - start < 0.2
+    assert not future.done()
+    with pytest.raises(KafkaException):
+        future.result(timeout=10)  # Delivery reports are served by the poll thread
+
+def test_a_full_buffer_fails_the_message_after_the_buffer_timeout(make_producer, monkeypatch):
+    monkeypatch.setattr(producer_module, "KAFKA_BUFFER_TIMEOUT_SECONDS", 0.1)
+    producer = make_producer(**{"queue.buffering.max.messages": 1, "message.timeout.ms": 5000})
+
+    producer.produce("topic", {"id": 1})
+    future = producer.produce("topic", {"id": 2})
+
+    with pytest.raises(BufferError):
+        future.result(timeout=1)
+
+def test_a_closed_producer_starts_again_on_produce(make_producer):
+    producer = make_producer()
+    producer.produce("topic", {"id": 1})
+    producer.close(timeout=0)
+
+    assert producer._producer is None
+    producer.produce("topic", {"id": 2})
+    assert producer._producer is not None
@@ -0,0 +1,35 @@
+from backend.skill_matrix import (
+    SKILL_ABSENT_VALUE, SKILL_PRESENT_VALUE, build_skill_matrix, heatmap_cells, parse_skills, rank_skills
+)
+
+def test_skills_are_parsed_from_lists_and_legacy_comma_joined_strings():
+    assert parse_skills(["Python", " SQL ", ""]) == ["Python", "SQL"]
+    assert parse_skills("Python, SQL,,") == ["Python", "SQL"]
+    assert parse_skills(None) == []
+
+def test_skills_are_interned_case_insensitively():
+    skill_matrix = build_skill_matrix([["Python", "SQL"], ["python", "Go"], []])
+
+    assert skill_matrix.skills == ["Python", "SQL", "Go"]
+    assert skill_matrix.matrix.tolist() == [
+        [True, True, False],
+        [True, False, True],
+        [False, False, False]
+    ]
+
+def test_skills_rank_by_frequency_then_focus_applicant_then_name():
+    skill_matrix = build_skill_matrix([["SQL", "Rust"], ["Python", "Go"], ["Python", "Rust", "Go"]])
+
+    ranked = [skill_matrix.skills[col] for col in rank_skills(skill_matrix, limit=4)]
+
+    assert ranked == ["Rust", "Go", "Python", "SQL"]
+
+def test_heatmap_cells_cover_every_applicant_for_each_column():
+    skill_matrix = build_skill_matrix([["SQL"], ["Go"]])
+
+    cells = heatmap_cells(skill_matrix, ["a1", "a2"], rank_skills(skill_matrix, limit=1))
+
+    assert cells == [
+        {"x": "SQL", "y": "a1", "value": SKILL_PRESENT_VALUE},
+        {"x": "SQL", "y": "a2", "value": SKILL_ABSENT_VALUE}
+    ]
@@ -0,0 +1,68 @@
+import asyncio
+from sqlalchemy import insert, select
+from backend import crud, models
+from backend.database import AsyncSessionLocal, async_engine
+
+def keywords_of(db, job_id):
+    return sorted(db.scalars(
+        select(models.Skill.name)
+        .join(models.JobKeyword, models.JobKeyword.skill_id == models.Skill.id)
+        .where(models.JobKeyword.job_id == job_id)
+    ))
+
+def ids(rows):
+    return [row.id for row in rows]
+
+async def skill_lookups():
+    try:
+        async with AsyncSessionLocal() as db:
+            return (
+                ids(await crud.aget_jobs_with_keywords(db, ["haskell", "ocaml"])),
+                ids(await crud.aget_jobs_with_keywords(db, ["Haskell", "OCaml"], match_all=True)),
+                ids(await crud.aget_applicants_with_skills(db, ["OCaml", "haskell"], match_all=True))
+            )
+    finally:
+        # Pooled aiosqlite connections belong to this event loop (and keep its worker threads alive)
+        await async_engine.dispose()
+
+def test_skill_names_are_lower_cased_with_whitespace_collapsed():
+    assert crud.canonical_skill("  Machine \t Learning ") == "machine learning"
+    assert crud.canonical_skill("C++") == "c++"
+
+def test_keywords_are_stored_once_per_canonical_skill(db, add_jobs):
+    add_jobs(["skills-1"], keywords=["Kotlin", " kotlin ", "Jetpack  Compose", ""])
+
+    assert keywords_of(db, "skills-1") == ["jetpack compose", "kotlin"]
+    skill = db.scalars(select(models.Skill).where(models.Skill.name == "jetpack compose")).one()
+    assert skill.display_name == "Jetpack  Compose"  # First spelling seen
+
+def test_saving_again_replaces_the_skill_rows(db, add_jobs):
+    add_jobs(["skills-2"], keywords=["Elixir", "Phoenix"])
+    add_jobs(["skills-2"], keywords=["Elixir", "Ecto"])
+
+    assert keywords_of(db, "skills-2") == ["ecto", "elixir"]
+
+def test_skill_lookups_match_any_or_all_skills(add_jobs, add_applicants):
+    add_jobs(["skills-any"], keywords=["Haskell"])
+    add_jobs(["skills-all"], keywords=["Haskell", "OCaml"])
+    add_applicants(["skills-applicant"], workExperience=[{"company": "Acme", "title": "Dev", "start_date": "2020-01", "description": "", "skills": ["ocaml", "HASKELL"]}])
+
+    any_skill, all_skills, applicants = asyncio.run(skill_lookups())
+
+    assert {"skills-any", "skills-all"} <= set(any_skill)
+    assert all_skills == ["skills-all"]
+    assert applicants == ["skills-applicant"]
+
+def test_backfill_rebuilds_skill_rows_and_is_recorded(db):
+    # A row written before the skill tables existed
+    db.execute(insert(models.Job), [{"id": "skills-legacy", "title": "Legacy", "keywords": ["Fortran"]}])
+    db.commit()
+    assert keywords_of(db, "skills-legacy") == []
+
+    crud.backfill_skills(db, batch_size=2)
+    assert keywords_of(db, "skills-legacy") == ["fortran"]
+
+    crud.record_migration(db, "test-migration")
+    crud.record_migration(db, "test-migration")  # Recording twice is harmless
+    assert crud.has_migrated(db, "test-migration")
+    assert not crud.has_migrated(db, "never-run")
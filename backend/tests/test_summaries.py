@@ -0,0 +1,33 @@
+from backend import crud, pipelines, summaries
+
+def test_summary_hash_changes_with_list_values():
+    metadata = {"title": "Engineer", "keywords": ["Python", "SQL"]}
+
+    assert pipelines.summary_hash(metadata, pipelines.JOB_SUMMARY_FIELDS) != \
+        pipelines.summary_hash({**metadata, "keywords": ["Python", "Go"]}, pipelines.JOB_SUMMARY_FIELDS)
+
+def test_summary_hash_ignores_fields_outside_the_prompt():
+    metadata = {"title": "Engineer", "keywords": ["Python"]}
+
+    assert pipelines.summary_hash({**metadata, "id": "other"}, pipelines.JOB_SUMMARY_FIELDS) == \
+        pipelines.summary_hash(metadata, pipelines.JOB_SUMMARY_FIELDS)
+
+def test_job_summary_is_stored_and_regenerated_when_its_metadata_changes(db, add_jobs, llm):
+    job = add_jobs(["summary-job"])["summary-job"]
+
+    first = summaries.get_job_summary(db, job)
+    assert summaries.get_job_summary(db, job)["summary"] == first["summary"]
+    assert llm.calls == 1
+
+    summaries.get_job_summary(db, {**job, "title": "Another title"})
+    assert llm.calls == 2
+
+def test_updating_a_summary_column_deletes_the_stored_summary(db, add_jobs, llm):
+    job = add_jobs(["summary-update-job"])["summary-update-job"]
+    summaries.get_job_summary(db, job)
+
+    crud.update_job(db, job["id"], {"description": "Only the description changed"})
+    assert db.get(crud.models.RAGSummary, job["id"]) is not None
+
+    crud.update_job(db, job["id"], {"title": "A new title"})
+    assert db.get(crud.models.RAGSummary, job["id"]) is None
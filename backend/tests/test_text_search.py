@@ -0,0 +1,71 @@
+import asyncio
+import pytest
+from sqlalchemy import create_engine, delete, text, update
+from backend import crud, models
+from backend.database import AsyncSessionLocal, async_engine, engine
+
+def search(entity_type, query):
+    async def run():
+        try:
+            async with AsyncSessionLocal() as db:
+                return await crud.atext_search(db, entity_type, query)
+        finally:
+            # Pooled aiosqlite connections belong to this event loop (and keep its worker threads alive)
+            await async_engine.dispose()
+    return asyncio.run(run())
+
+@pytest.mark.parametrize("query, expected", [
+    ("react developer", '"react" "developer"'),
+    ("c++ node.js", '"c++" "node.js"'),
+    ('say "hi" OR NOT', '"say" """hi""" "OR" "NOT"'),
+    ("kube* *", '"kube"*'),
+    ("   ", ""),
+])
+def test_query_terms_are_quoted(query, expected):
+    assert crud.text_search_query(query) == expected
+
+def test_snippets_are_escaped_before_highlighting():
+    start, end = crud.TEXT_SEARCH_MARKS
+    snippet = f"<img src=x onerror=alert(1)> {start}kubernetes{end} & more"
+
+    assert crud.highlight_snippet(snippet) == "&lt;img src=x onerror=alert(1)&gt; <mark>kubernetes</mark> &amp; more"
+    assert crud.highlight_snippet(None) == ""
+
+def test_search_returns_escaped_snippets(add_jobs):
+    add_jobs(["fts-xss"], title="Platform engineer", description="<script>alert(1)</script> zanzibar")
+
+    [row] = search("job", "zanzibar")
+
+    assert row.id == "fts-xss"
+    assert "<script>" not in crud.highlight_snippet(row.snippet)
+    assert "<mark>zanzibar</mark>" in crud.highlight_snippet(row.snippet)
+
+def test_rows_stay_matched_to_their_ids_after_vacuum(db, add_jobs):
+    add_jobs([f"fts-vacuum-{i}" for i in range(5)], title="Quetzal analyst")
+    db.execute(delete(models.Job).where(models.Job.id.in_(["fts-vacuum-0", "fts-vacuum-2"])))
+    db.commit()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text("VACUUM"))
+
+    db.execute(update(models.Job).where(models.Job.id == "fts-vacuum-4").values(title="Ocelot analyst"))
+    db.commit()
+
+    assert sorted(row.id for row in search("job", "quetzal")) == ["fts-vacuum-1", "fts-vacuum-3"]
+    assert [row.id for row in search("job", "ocelot")] == ["fts-vacuum-4"]
+
+def test_tables_are_created_once_and_index_existing_rows(tmp_path):
+    fresh = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    models.Base.metadata.create_all(bind=fresh)
+    with fresh.begin() as connection:
+        connection.execute(text("INSERT INTO jobs (id, title, company, description) VALUES ('old', 'Narwhal keeper', 'Zoo', '')"))
+
+    models.create_text_search_tables(fresh)
+    models.create_text_search_tables(fresh)  # Running again changes nothing
+    with fresh.begin() as connection:
+        connection.execute(text("INSERT INTO jobs (id, title, company, description) VALUES ('new', 'Narwhal trainer', 'Zoo', '')"))
+        ids = connection.execute(text("SELECT id FROM jobs_fts WHERE jobs_fts MATCH 'narwhal' ORDER BY id")).scalars().all()
+        keys = connection.execute(text("SELECT count(*) FROM jobs_fts_keys")).scalar()
+    fresh.dispose()
+
+    assert ids == ["new", "old"]
+    assert keys == 2
@@ -0,0 +1,34 @@
+import io
+import os
+import asyncio
+import pytest
+from fastapi import UploadFile
+from backend import uploads
+
+def _read(data: bytes, **limits) -> uploads.UploadedDocument:
+    return asyncio.run(uploads.read_upload(UploadFile(io.BytesIO(data), filename="upload.bin"), **limits))
+
+def test_small_uploads_stay_in_memory():
+    document = _read(b"x" * 100, max_bytes=1000, spool_bytes=200)
+
+    assert document.path is None
+    assert document.source == b"x" * 100
+    assert document.size == 100
+
+def test_large_uploads_are_spooled_and_removed_on_close(monkeypatch):
+    monkeypatch.setattr(uploads, "UPLOAD_CHUNK_BYTES", 64)
+    data = bytes(range(256)) * 4
+
+    with _read(data, max_bytes=10000, spool_bytes=200) as document:
+        assert document.source == document.path
+        assert asyncio.run(document.read()) == data
+        path = document.path
+    assert not os.path.exists(path)
+
+def test_uploads_over_the_limit_are_rejected_without_leaving_a_spool_file(monkeypatch, tmp_path):
+    monkeypatch.setattr(uploads, "UPLOAD_CHUNK_BYTES", 64)
+    monkeypatch.setattr(uploads, "UPLOAD_SPOOL_DIR", str(tmp_path))
+
+    with pytest.raises(uploads.UploadTooLarge):
+        _read(b"x" * 1000, max_bytes=500, spool_bytes=100)
+    assert os.listdir(tmp_path) == []
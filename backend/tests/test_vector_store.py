@@ -0,0 +1,118 @@
+import numpy as np
+import pytest
+from backend.vector_store import LocalVectorStore, VectorStore, matches_filter
+
+DIMENSION = 8
+
+def _vector(*values):
+    vector = np.zeros(DIMENSION, dtype=np.float32)
+    vector[:len(values)] = values
+    return vector
+
+@pytest.fixture
+def store(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    store.ensure_index("jobs", dimension=DIMENSION)
+    return store
+
+def test_interface_is_abstract():
+    with pytest.raises(TypeError):
+        VectorStore()
+
+def test_fetch_returns_normalized_vectors_and_metadata(store):
+    store.upsert("jobs", [("a", _vector(3, 4), {"title": "A"})], namespace="jobs")
+
+    records = store.fetch("jobs", ["a", "missing"], namespace="jobs")
+
+    assert list(records) == ["a"]
+    np.testing.assert_allclose(records["a"].values, _vector(0.6, 0.8), rtol=1e-6)
+    assert records["a"].metadata == {"title": "A"}
+
+def test_query_ranks_by_cosine_similarity(store):
+    store.upsert("jobs", [
+        ("x", _vector(1, 0), {}),
+        ("y", _vector(0, 1), {}),
+        ("xy", _vector(1, 1), {})
+    ], namespace="jobs")
+
+    matches = store.query("jobs", _vector(2, 0.1), top_k=2, namespace="jobs")
+
+    assert [match.id for match in matches] == ["x", "xy"]
+    assert matches[0].score == pytest.approx(0.99875, abs=1e-4)
+
+def test_reupsert_reuses_the_row(store):
+    store.upsert("jobs", [("a", _vector(1, 0), {"v": 1}), ("b", _vector(0, 1), {})], namespace="jobs")
+    store.upsert("jobs", [("a", _vector(0, 1), {"v": 2})], namespace="jobs")
+
+    collection = store._collection("jobs", "jobs")
+    assert collection._ids == ["a", "b"]
+    assert store.fetch("jobs", ["a"], namespace="jobs")["a"].metadata == {"v": 2}
+    assert {match.id for match in store.query("jobs", _vector(0, 1), top_k=2, namespace="jobs")} == {"a", "b"}
+
+def test_namespaces_are_separate(store):
+    store.upsert("jobs", [("a", _vector(1), {})], namespace="one")
+
+    assert store.fetch("jobs", ["a"], namespace="two") == {}
+    assert store.query("jobs", _vector(1), top_k=5, namespace="two") == []
+
+def test_reopened_store_replays_the_log(store, tmp_path):
+    store.upsert("jobs", [(f"id-{i}", _vector(i + 1, 1), {"i": i}) for i in range(5)], namespace="jobs")
+    store.upsert("jobs", [("id-2", _vector(0, 1), {"i": 20})], namespace="jobs")
+
+    reopened = LocalVectorStore(str(tmp_path))
+    reopened.ensure_index("jobs", dimension=DIMENSION)
+    records = reopened.fetch("jobs", [f"id-{i}" for i in range(5)], namespace="jobs")
+
+    assert [records[f"id-{i}"].metadata["i"] for i in range(5)] == [0, 1, 20, 3, 4]
+    np.testing.assert_allclose(records["id-2"].values, _vector(0, 1))
+
+def test_other_instances_see_new_writes(store, tmp_path):
+    reader = LocalVectorStore(str(tmp_path))
+    reader.ensure_index("jobs", dimension=DIMENSION)
+    assert reader.query("jobs", _vector(1), top_k=1, namespace="jobs") == []
+
+    # Enough rows to grow the vectors file past its initial capacity
+    store.upsert("jobs", [(f"id-{i}", _vector(1, i), {}) for i in range(1500)], namespace="jobs")
+
+    assert len(reader.fetch("jobs", ["id-0", "id-1499"], namespace="jobs")) == 2
+    assert reader.query("jobs", _vector(1), top_k=1, namespace="jobs")[0].id == "id-0"
+
+FILTER_ROWS = {
+    "python-us": {"skills": ["Python", "SQL"], "years": 5, "country": "US", "sponsorship": True},
+    "go-de": {"skills": ["Go"], "years": 2.0, "country": "DE", "sponsorship": False},
+    "legacy": {"skills": "Python,Go", "years": "3"},  # Written before metadata lists
+    "empty": {"skills": [], "years": 0, "country": ""}
+}
+
+@pytest.mark.parametrize("filter, expected", [
+    ({"country": "US"}, {"python-us"}),
+    ({"country": {"$eq": "US"}}, {"python-us"}),
+    ({"country": {"$ne": "US"}}, {"go-de", "legacy", "empty"}),
+    ({"skills": {"$eq": "Python"}}, {"python-us"}),
+    ({"skills": {"$in": ["Go", "SQL"]}}, {"python-us", "go-de"}),
+    ({"skills": {"$nin": ["Go", "SQL"]}}, {"legacy", "empty"}),
+    ({"years": {"$gt": 2}}, {"python-us"}),
+    ({"years": {"$gte": 2}}, {"python-us", "go-de"}),
+    ({"years": {"$lt": 2}}, {"empty"}),
+    ({"years": {"$lte": 2, "$gt": 0}}, {"go-de"}),
+    ({"years": {"$eq": 2}}, {"go-de"}),
+    ({"sponsorship": {"$eq": False}}, {"go-de"}),
+    ({"$and": [{"skills": {"$in": ["Python", "Go"]}}, {"years": {"$gte": 2}}]}, {"python-us", "go-de"}),
+    ({"$or": [{"country": "DE"}, {"skills": {"$eq": "SQL"}}]}, {"python-us", "go-de"}),
+    ({"country": {"$in": ["US"]}, "years": {"$lt": 3}}, set()),
+])
+def test_query_filters_match_matches_filter(store, filter, expected):
+    store.upsert("jobs", [(id, _vector(i + 1, 1), metadata) for i, (id, metadata) in enumerate(FILTER_ROWS.items())], namespace="jobs")
+
+    matches = store.query("jobs", _vector(1), top_k=10, namespace="jobs", filter=filter)
+
+    assert {match.id for match in matches} == expected
+    assert {id for id, metadata in FILTER_ROWS.items() if matches_filter(metadata, filter)} == expected
+
+def test_filters_see_metadata_written_after_the_last_query(store):
+    store.upsert("jobs", [("a", _vector(1), {"country": "US"})], namespace="jobs")
+    assert [match.id for match in store.query("jobs", _vector(1), top_k=5, namespace="jobs", filter={"country": "US"})] == ["a"]
+
+    store.upsert("jobs", [("a", _vector(1), {"country": "DE"}), ("b", _vector(1, 1), {"country": "US"})], namespace="jobs")
+
+    assert [match.id for match in store.query("jobs", _vector(1), top_k=5, namespace="jobs", filter={"country": "US"})] == ["b"]
@@ -0,0 +1,103 @@
+import os
+import tempfile
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from typing import Optional, Union
+
+# Upload limits. Uploads up to UPLOAD_SPOOL_BYTES are processed in memory;
+# larger ones are spooled to a temp file. Anything above MAX_UPLOAD_BYTES is rejected.
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_SPOOL_BYTES = int(os.getenv("UPLOAD_SPOOL_BYTES", str(2 * 1024 * 1024)))
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR") or None
+# Limit for the whole request to the bulk ingestion endpoints
+MAX_BATCH_UPLOAD_BYTES = int(os.getenv("MAX_BATCH_UPLOAD_BYTES", str(1024 * 1024 * 1024)))
+UPLOAD_CHUNK_BYTES = 64 * 1024
+
+class UploadTooLarge(Exception):
+    pass
+
+class UploadedDocument:
+    """An uploaded file held in memory, or in a spooled temp file above the threshold."""
+
+    def __init__(self, filename: str, data: Optional[bytes] = None, path: Optional[str] = None, size: int = 0):
+        self.filename = filename
+        self.data = data
+        self.path = path
+        self.size = size
+
+    @property
+    def source(self) -> Union[bytes, str]:
+        """The bytes of an in-memory upload, or the path of a spooled one."""
+        return self.data if self.path is None else self.path
+
+    async def read(self) -> bytes:
+        if self.path is None:
+            return self.data
+        return await run_in_threadpool(_read_file, self.path)
+
+    async def text(self) -> str:
+        return (await self.read()).decode("utf-8", errors="replace")
+
+    def close(self):
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+async def read_upload(
+    file: UploadFile,
+    max_bytes: int = MAX_UPLOAD_BYTES,
+    spool_bytes: int = UPLOAD_SPOOL_BYTES
+) -> UploadedDocument:
+    """Read an upload into memory, spooling to disk past spool_bytes.
+
+    Raises UploadTooLarge as soon as more than max_bytes have been seen.
+    """
+    if file.size is not None and file.size > max_bytes:
+        raise UploadTooLarge(f"Upload exceeds the maximum size of {max_bytes} bytes")
+
+    buffer = bytearray()
+    spool = None
+    size = 0
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLarge(f"Upload exceeds the maximum size of {max_bytes} bytes")
+
+            if spool is None and size > spool_bytes:
+                # Past the threshold: move what we have so far to a temp file
+                spool = tempfile.NamedTemporaryFile(delete=False, dir=UPLOAD_SPOOL_DIR)
+                await run_in_threadpool(spool.write, bytes(buffer))
+                buffer = bytearray()
+
+            if spool is None:
+                buffer.extend(chunk)
+            else:
+                await run_in_threadpool(spool.write, chunk)
+    except BaseException:
+        if spool is not None:
+            spool.close()
+            os.unlink(spool.name)
+        raise
+
+    if spool is None:
+        return UploadedDocument(file.filename, data=bytes(buffer), size=size)
+
+    spool.close()
+    return UploadedDocument(file.filename, path=spool.name, size=size)
@@ -0,0 +1,592 @@
+import os
+import json
+import time
+import fcntl
+import threading
+import numpy as np
+from abc import ABC, abstractmethod
+from concurrent.futures import Future
+from typing import Dict, List, Any, Optional, Tuple, NamedTuple
+from .cache import CACHE_DIR, ChangeLog, LRUCache, register_cache
+
+# Vector store configuration
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "pinecone")
+VECTOR_STORE_PATH = os.getenv("VECTOR_STORE_PATH", "./data/vectors")
+
+EMBEDDING_DIMENSION = 768  # Dimension of the embedding model
+
+# Records of a remote store kept in process memory (0 MB disables the cache).
+# Upserts by other processes on this host evict the record on their next
+# fetch; upserts from other hosts are seen once the cached record expires.
+VECTOR_CACHE_MAX_MB = int(os.getenv("VECTOR_CACHE_MAX_MB", "256"))
+VECTOR_CACHE_ENTRIES = int(os.getenv("VECTOR_CACHE_ENTRIES", "100000"))
+VECTOR_CACHE_TTL_SECONDS = float(os.getenv("VECTOR_CACHE_TTL_SECONDS", "600"))
+
+class VectorRecord(NamedTuple):
+    id: str
+    values: Any
+    metadata: Dict[str, Any]
+
+class QueryMatch(NamedTuple):
+    id: str
+    score: float
+    metadata: Dict[str, Any]
+
+class VectorStore(ABC):
+    """Interface shared by the vector store backends."""
+
+    # Calls go over the network and can fail transiently, so batched calls are retried
+    remote = False
+
+    @abstractmethod
+    def ensure_index(self, name: str, dimension: int = EMBEDDING_DIMENSION):
+        ...
+
+    @abstractmethod
+    def upsert(self, index: str, vectors: List[Tuple[str, Any, Dict[str, Any]]], namespace: str):
+        ...
+
+    @abstractmethod
+    def fetch(self, index: str, ids: List[str], namespace: str) -> Dict[str, VectorRecord]:
+        ...
+
+    @abstractmethod
+    def query(
+        self,
+        index: str,
+        vector: Any,
+        top_k: int,
+        namespace: str,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[QueryMatch]:
+        """Top matches among the vectors whose metadata matches filter
+        (Pinecone filter syntax: $eq, $ne, $in, $nin, $gt, $gte, $lt, $lte, $and, $or)."""
+
+class PineconeVectorStore(VectorStore):
+    """Vector store backed by Pinecone serverless indexes."""
+
+    remote = True
+
+    def __init__(self):
+        from .clients import get_pinecone
+        self.pc = get_pinecone()
+
+    def _index(self, name: str):
+        from .clients import get_pinecone_index
+        return get_pinecone_index(name)
+
+    def ensure_index(self, name: str, dimension: int = EMBEDDING_DIMENSION):
+        from pinecone import ServerlessSpec
+        current_indexes = [index.name for index in self.pc.list_indexes()]
+
+        if name not in current_indexes:
+            self.pc.create_index(
+                name=name,
+                dimension=dimension,
+                metric="cosine",
+                spec=ServerlessSpec(cloud="aws", region="us-east-1")
+            )
+
+    def upsert(self, index: str, vectors: List[Tuple[str, Any, Dict[str, Any]]], namespace: str):
+        vectors = [(id, [float(v) for v in values], metadata) for id, values, metadata in vectors]
+        self._index(index).upsert(vectors=vectors, namespace=namespace)
+
+    def fetch(self, index: str, ids: List[str], namespace: str) -> Dict[str, VectorRecord]:
+        response = self._index(index).fetch(ids=ids, namespace=namespace)
+        return {
+            id: VectorRecord(id, vector.values, vector.metadata or {})
+            for id, vector in response.vectors.items()
+        }
+
+    def query(
+        self,
+        index: str,
+        vector: Any,
+        top_k: int,
+        namespace: str,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[QueryMatch]:
+        response = self._index(index).query(
+            vector=[float(v) for v in vector],
+            top_k=top_k,
+            namespace=namespace,
+            filter=filter,
+            include_metadata=True
+        )
+        return [
+            QueryMatch(match.id, match.score, match.metadata or {})
+            for match in response.matches
+        ]
+
+class _LocalCollection:
+    """Normalized vectors for one index namespace, kept in a memory-mapped matrix.
+
+    Rows live in ``<namespace>.vectors`` (float32, grown by doubling) and the
+    id/metadata for each row is appended to ``<namespace>.log``. A log line is
+    only written after its row has been flushed, so the log is the commit point:
+    on restart the matrix is mapped as-is and the log is replayed. Readers in
+    other processes pick up new lines on their next call. Filtered fields are
+    indexed into NumPy columns on first use and rebuilt after metadata changes.
+    """
+
+    def __init__(self, directory: str, namespace: str, dimension: int):
+        os.makedirs(directory, exist_ok=True)
+        self.dimension = dimension
+        self.vectors_path = os.path.join(directory, f"{namespace}.vectors")
+        self.log_path = os.path.join(directory, f"{namespace}.log")
+        self.lock_path = os.path.join(directory, f"{namespace}.lock")
+        self._lock = threading.RLock()
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._metadata: List[Dict[str, Any]] = []
+        self._columns: Dict[str, _MetadataColumn] = {}  # Built on first filter, dropped on change
+        self._matrix = None
+        self._capacity = 0
+        self._log_offset = 0
+        self._refresh()
+
+    def _map(self):
+        """Map the vectors file, picking up growth from other processes."""
+        if not os.path.exists(self.vectors_path):
+            self._matrix, self._capacity = None, 0
+            return
+        capacity = os.path.getsize(self.vectors_path) // (self.dimension * 4)
+        if capacity != self._capacity:
+            self._matrix = np.memmap(
+                self.vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dimension)
+            ) if capacity else None
+            self._capacity = capacity
+
+    def _refresh(self):
+        """Replay log lines written since the last refresh."""
+        with self._lock:
+            if os.path.exists(self.log_path) and os.path.getsize(self.log_path) > self._log_offset:
+                with open(self.log_path, "rb") as f:
+                    f.seek(self._log_offset)
+                    for line in f:
+                        if not line.endswith(b"\n"):
+                            break  # Partially written line, pick it up next time
+                        self._log_offset += len(line)
+                        entry = json.loads(line)
+                        self._apply(entry["id"], entry["row"], entry["metadata"])
+                        self._columns.clear()
+            self._map()
+
+    def _apply(self, id: str, row: int, metadata: Dict[str, Any]):
+        if row == len(self._ids):
+            self._ids.append(id)
+            self._metadata.append(metadata)
+        else:
+            self._ids[row] = id
+            self._metadata[row] = metadata
+        self._rows[id] = row
+
+    def _reserve(self, count: int):
+        """Grow the vectors file so it holds at least ``count`` rows."""
+        if count <= self._capacity:
+            return
+        capacity = max(1024, self._capacity)
+        while capacity < count:
+            capacity *= 2
+        with open(self.vectors_path, "ab") as f:
+            f.truncate(capacity * self.dimension * 4)
+        self._map()
+
+    def upsert(self, vectors: List[Tuple[str, Any, Dict[str, Any]]]):
+        with self._lock, open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._refresh()
+
+                # Assign rows, reusing the existing row for known ids
+                assigned = {}
+                next_row = len(self._ids)
+                for id, _, _ in vectors:
+                    if id not in self._rows and id not in assigned:
+                        assigned[id] = next_row
+                        next_row += 1
+                self._reserve(next_row)
+
+                lines = []
+                for id, values, metadata in vectors:
+                    row = self._rows.get(id, assigned.get(id))
+                    self._matrix[row] = _normalize(values)
+                    lines.append(json.dumps({"id": id, "row": row, "metadata": metadata}) + "\n")
+                self._matrix.flush()
+
+                with open(self.log_path, "ab") as f:
+                    f.write("".join(lines).encode("utf-8"))
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            self._refresh()
+
+    def fetch(self, ids: List[str]) -> Dict[str, VectorRecord]:
+        self._refresh()
+        records = {}
+        for id in ids:
+            row = self._rows.get(id)
+            if row is not None:
+                records[id] = VectorRecord(id, np.array(self._matrix[row]), self._metadata[row])
+        return records
+
+    def _column(self, key: str) -> "_MetadataColumn":
+        column = self._columns.get(key)
+        if column is None:
+            column = self._columns[key] = _MetadataColumn.build(self._metadata, key)
+        return column
+
+    def query(self, vector: Any, top_k: int, filter: Optional[Dict[str, Any]] = None) -> List[QueryMatch]:
+        self._refresh()
+        with self._lock:
+            count = len(self._ids)
+            if count == 0 or top_k <= 0:
+                return []
+
+            # Score only the rows that pass the filter
+            rows = np.flatnonzero(_filter_mask(filter, self._column, count)) if filter else None
+
+        if rows is not None:
+            if len(rows) == 0:
+                return []
+            scores = self._matrix[rows] @ _normalize(vector)
+        else:
+            scores = self._matrix[:count] @ _normalize(vector)
+
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        if rows is not None:
+            return [QueryMatch(self._ids[rows[i]], float(scores[i]), self._metadata[rows[i]]) for i in top]
+        return [QueryMatch(self._ids[row], float(scores[row]), self._metadata[row]) for row in top]
+
+class LocalVectorStore(VectorStore):
+    """In-process vector store doing brute-force cosine search over mmapped matrices."""
+
+    def __init__(self, path: str = VECTOR_STORE_PATH):
+        self.path = path
+        self._dimensions: Dict[str, int] = {}
+        self._collections: Dict[Tuple[str, str], _LocalCollection] = {}
+        self._lock = threading.Lock()
+
+    def _collection(self, index: str, namespace: str) -> _LocalCollection:
+        key = (index, namespace)
+        with self._lock:
+            if key not in self._collections:
+                self._collections[key] = _LocalCollection(
+                    os.path.join(self.path, index),
+                    namespace,
+                    self._dimensions.get(index, EMBEDDING_DIMENSION)
+                )
+            return self._collections[key]
+
+    def ensure_index(self, name: str, dimension: int = EMBEDDING_DIMENSION):
+        os.makedirs(os.path.join(self.path, name), exist_ok=True)
+        self._dimensions[name] = dimension
+
+    def upsert(self, index: str, vectors: List[Tuple[str, Any, Dict[str, Any]]], namespace: str):
+        if vectors:
+            self._collection(index, namespace).upsert(vectors)
+
+    def fetch(self, index: str, ids: List[str], namespace: str) -> Dict[str, VectorRecord]:
+        return self._collection(index, namespace).fetch(ids)
+
+    def query(
+        self,
+        index: str,
+        vector: Any,
+        top_k: int,
+        namespace: str,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[QueryMatch]:
+        return self._collection(index, namespace).query(vector, top_k, filter)
+
+class CachedVectorStore(VectorStore):
+    """Keeps records written to and fetched from another store in memory.
+
+    Records are held as float32 vectors in an LRU bounded by total size.
+    An upsert replaces the cached records, so this process reads its own
+    writes without a round trip, and is logged in a ChangeLog shared with
+    the other processes on the host: a fetch drops cached records that
+    another process has upserted since they were cached. A fetch takes what
+    it can from the cache and asks the backend for the rest in one call; ids
+    another thread is already fetching are waited on rather than fetched twice.
+    """
+
+    def __init__(
+        self,
+        backend: VectorStore,
+        max_bytes: int = VECTOR_CACHE_MAX_MB * 1024 * 1024,
+        max_entries: int = VECTOR_CACHE_ENTRIES,
+        ttl: Optional[float] = VECTOR_CACHE_TTL_SECONDS,
+        changes_path: str = os.path.join(CACHE_DIR, "vector_changes.sqlite")
+    ):
+        self.backend = backend
+        self.remote = backend.remote
+        self.records = LRUCache(max_entries, ttl=ttl, max_bytes=max_bytes, sizeof=_cached_size)
+        self.changes = ChangeLog(changes_path, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Future] = {}  # Cache key -> fetch in flight
+        register_cache("vectors", self)
+
+    def ensure_index(self, name: str, dimension: int = EMBEDDING_DIMENSION):
+        self.backend.ensure_index(name, dimension)
+
+    def upsert(self, index: str, vectors: List[Tuple[str, Any, Dict[str, Any]]], namespace: str):
+        self.backend.upsert(index, vectors, namespace)
+        now = time.time()
+        self.changes.touch([_cache_key(index, namespace, id) for id, _, _ in vectors], now)
+        with self._lock:
+            for id, values, metadata in vectors:
+                key = _cache_key(index, namespace, id)
+                # A fetch still in flight may return the old record; don't let it cache that
+                self._pending.pop(key, None)
+                record = VectorRecord(id, np.asarray(values, dtype=np.float32), _stored_metadata(metadata))
+                self.records.set(key, _CachedRecord(record, now))
+
+    def fetch(self, index: str, ids: List[str], namespace: str) -> Dict[str, VectorRecord]:
+        keys = {id: _cache_key(index, namespace, id) for id in dict.fromkeys(ids)}
+        cached = {}
+        for id, key in keys.items():
+            entry = self.records.get(key)
+            if entry is not None:
+                cached[id] = entry
+        
+        # Drop records another process has upserted since they were cached
+        if cached:
+            stale = self.changes.changed_since({keys[id]: entry.cached_at for id, entry in cached.items()})
+            for id in [id for id in cached if keys[id] in stale]:
+                self.records.pop(keys[id])
+                del cached[id]
+                self.invalidations += 1
+
+        records = {}
+        waiting: Dict[str, Future] = {}
+        fetching: Dict[str, Future] = {}
+        with self._lock:
+            for id, key in keys.items():
+                if id in cached:
+                    records[id] = cached[id].record
+                elif key in self._pending:
+                    waiting[id] = self._pending[key]
+                else:
+                    fetching[id] = self._pending[key] = Future()
+            self.hits += len(records)
+            self.misses += len(waiting) + len(fetching)
+
+        if fetching:
+            # Upserts logged from here on may not be in the fetched records
+            started_at = time.time()
+            try:
+                fetched = self.backend.fetch(index, ids=list(fetching), namespace=namespace)
+            except BaseException as e:
+                with self._lock:
+                    for id, future in fetching.items():
+                        if self._pending.get(keys[id]) is future:
+                            del self._pending[keys[id]]
+                        future.set_exception(e)
+                raise
+
+            with self._lock:
+                for id, future in fetching.items():
+                    record = fetched.get(id)
+                    if record is not None:
+                        record = VectorRecord(id, np.asarray(record.values, dtype=np.float32), record.metadata)
+                        records[id] = record
+                    key = keys[id]
+                    if self._pending.get(key) is future:
+                        del self._pending[key]
+                        if record is not None:
+                            self.records.set(key, _CachedRecord(record, started_at))
+                    future.set_result(record)
+
+        for id, future in waiting.items():
+            record = future.result()
+            if record is not None:
+                records[id] = record
+        return records
+
+    def query(
+        self,
+        index: str,
+        vector: Any,
+        top_k: int,
+        namespace: str,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[QueryMatch]:
+        return self.backend.query(index, vector, top_k, namespace, filter)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "memory_hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "memory_entries": len(self.records),
+            "memory_bytes": self.records.bytes
+        }
+
+def _cache_key(index: str, namespace: str, id: str) -> str:
+    return f"{index}/{namespace}/{id}"
+
+class _CachedRecord(NamedTuple):
+    record: VectorRecord
+    cached_at: float  # Upserts logged after this time replace the record
+
+def _cached_size(entry: _CachedRecord) -> int:
+    return entry.record.values.nbytes + len(json.dumps(entry.record.metadata, default=str))
+
+def _stored_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Metadata as a fetch returns it: Pinecone stores every number as a float."""
+    return {
+        key: float(value) if isinstance(value, int) and not isinstance(value, bool) else value
+        for key, value in metadata.items()
+    }
+
+def matches_filter(metadata: Dict[str, Any], filter: Dict[str, Any]) -> bool:
+    """Evaluate a Pinecone-style metadata filter.
+
+    As in Pinecone, a condition on a list field holds if it holds for any
+    element ($ne and $nin: for none).
+    """
+    for key, condition in filter.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, sub) for sub in condition):
+                return False
+        else:
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+            value = metadata.get(key)
+            values = value if isinstance(value, list) else [value]
+            for op, operand in condition.items():
+                if not _FILTER_OPS[op](values, operand):
+                    return False
+    return True
+
+def _compare(values: List[Any], operand: Any, compare) -> bool:
+    return any(
+        isinstance(value, (int, float)) and not isinstance(value, bool) and compare(value, operand)
+        for value in values
+    )
+
+_FILTER_OPS = {
+    "$eq": lambda values, operand: operand in values,
+    "$ne": lambda values, operand: operand not in values,
+    "$in": lambda values, operand: any(value in operand for value in values),
+    "$nin": lambda values, operand: not any(value in operand for value in values),
+    "$gt": lambda values, operand: _compare(values, operand, lambda a, b: a > b),
+    "$gte": lambda values, operand: _compare(values, operand, lambda a, b: a >= b),
+    "$lt": lambda values, operand: _compare(values, operand, lambda a, b: a < b),
+    "$lte": lambda values, operand: _compare(values, operand, lambda a, b: a <= b),
+}
+
+class _MetadataColumn(NamedTuple):
+    """One metadata field across a collection's rows, for filtering with NumPy.
+
+    List fields are flattened to one entry per element; a missing field is a
+    single None entry, like in matches_filter.
+    """
+    rows: np.ndarray  # Entry -> row
+    codes: np.ndarray  # Entry -> interned value id (-1 if unhashable)
+    numbers: np.ndarray  # Entry -> numeric value, NaN if not a number
+    lookup: Dict[Any, int]  # Value -> interned id
+
+    @classmethod
+    def build(cls, metadata: List[Dict[str, Any]], key: str) -> "_MetadataColumn":
+        rows, codes, numbers = [], [], []
+        lookup: Dict[Any, int] = {}
+        for row, item in enumerate(metadata):
+            value = item.get(key)
+            for element in value if isinstance(value, list) else [value]:
+                try:
+                    code = lookup.setdefault(element, len(lookup))
+                except TypeError:
+                    code = -1
+                rows.append(row)
+                codes.append(code)
+                numbers.append(element if isinstance(element, (int, float)) and not isinstance(element, bool) else np.nan)
+        return cls(
+            np.array(rows, dtype=np.intp),
+            np.array(codes, dtype=np.int64),
+            np.array(numbers, dtype=np.float64),
+            lookup
+        )
+
+    def rows_with(self, hits: np.ndarray, count: int) -> np.ndarray:
+        """Mask of the rows with at least one entry in hits."""
+        mask = np.zeros(count, dtype=bool)
+        mask[self.rows[hits]] = True
+        return mask
+
+    def rows_in(self, values: List[Any], count: int) -> np.ndarray:
+        codes = []
+        for value in values:
+            try:
+                code = self.lookup.get(value)
+            except TypeError:
+                code = None
+            if code is not None:
+                codes.append(code)
+        return self.rows_with(np.isin(self.codes, codes), count)
+
+def _filter_mask(filter: Dict[str, Any], column, count: int) -> np.ndarray:
+    """Rows whose metadata matches filter, with the same semantics as
+    matches_filter. column(key) returns the _MetadataColumn for a field."""
+    mask = np.ones(count, dtype=bool)
+    for key, condition in filter.items():
+        if key == "$and":
+            for sub in condition:
+                mask &= _filter_mask(sub, column, count)
+        elif key == "$or":
+            matched = np.zeros(count, dtype=bool)
+            for sub in condition:
+                matched |= _filter_mask(sub, column, count)
+            mask &= matched
+        else:
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+            values = column(key)
+            for op, operand in condition.items():
+                if op in ("$eq", "$ne"):
+                    matched = values.rows_in([operand], count)
+                elif op in ("$in", "$nin"):
+                    matched = values.rows_in(operand, count)
+                else:
+                    matched = values.rows_with(_RANGE_OPS[op](values.numbers, operand), count)
+                mask &= ~matched if op in ("$ne", "$nin") else matched
+    return mask
+
+_RANGE_OPS = {
+    "$gt": np.greater,
+    "$gte": np.greater_equal,
+    "$lt": np.less,
+    "$lte": np.less_equal,
+}
+
+def _normalize(values: Any) -> np.ndarray:
+    vector = np.asarray(values, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+_vector_store: Optional[VectorStore] = None
+
+def get_vector_store() -> VectorStore:
+    """Return the process-wide vector store selected by VECTOR_STORE_BACKEND."""
+    global _vector_store
+    if _vector_store is None:
+        if VECTOR_STORE_BACKEND == "local":
+            _vector_store = LocalVectorStore()
+        elif VECTOR_STORE_BACKEND == "pinecone":
+            _vector_store = PineconeVectorStore()
+            # The local store reads from memory already; Pinecone fetches are a round trip
+            if VECTOR_CACHE_MAX_MB > 0:
+                _vector_store = CachedVectorStore(_vector_store)
+        else:
+            raise ValueError(f"Unknown VECTOR_STORE_BACKEND: {VECTOR_STORE_BACKEND}")
+    return _vector_store